@@ -0,0 +1,169 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+
+from app.data.connection import Database
+from app.data.db import get_db
+from app.schemas.admin import CollectionIndexes, IndexInfo, IngestTierLatency
+from app.utils.auth import verify_api_key
+
+db_dep = Depends(get_db)
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[db_dep, Depends(verify_api_key)],
+)
+
+
+async def describe_indexes(db: Database, event_type: str) -> CollectionIndexes:
+    """
+    Compares the indexes existing on a collection with the declared ones.
+    """
+    models = db.indexes.index_models(
+        event_type,
+        timeseries=await db.is_timeseries(event_type),
+    )
+    declared = {model.document["name"] for model in models}
+    existing = await db.indexes.describe(event_type)
+
+    return CollectionIndexes(
+        event_type=event_type,
+        indexes=[
+            IndexInfo(
+                name=index["name"],
+                keys=index["key"],
+                unique=index.get("unique", False),
+                declared=index["name"] in declared,
+            )
+            for index in existing
+        ],
+        missing=sorted(declared - {index["name"] for index in existing}),
+    )
+
+
+async def _require_collection(db: Database, event_type: str) -> None:
+    if not await db.collection_exists(event_type):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No events of type '{event_type}' found",
+        )
+
+
+@router.get(
+    "/indexes",
+    summary="List indexes of all event collections",
+    description=(
+        "Returns the indexes of every event_type collection, flagging the "
+        "declared ones and listing declared indexes that are missing."
+    ),
+    response_model=list[CollectionIndexes],
+    status_code=status.HTTP_200_OK,
+    operation_id="listEventIndexes",
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Invalid or missing API Key",
+        },
+    },
+)
+async def list_indexes(db: Database = db_dep) -> list[CollectionIndexes]:
+    return [
+        await describe_indexes(db, event_type) for event_type in await db.event_types()
+    ]
+
+
+@router.get(
+    "/indexes/{event_type}",
+    summary="List indexes of one event collection",
+    response_model=CollectionIndexes,
+    status_code=status.HTTP_200_OK,
+    operation_id="getEventIndexes",
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Invalid or missing API Key",
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "No such event_type collection exists",
+        },
+    },
+)
+async def get_indexes(
+    event_type: str = Path(
+        description="Name of the event_type / MongoDB collection",
+    ),
+    db: Database = db_dep,
+) -> CollectionIndexes:
+    await _require_collection(db, event_type)
+    return await describe_indexes(db, event_type)
+
+
+@router.post(
+    "/indexes/{event_type}/rebuild",
+    summary="Rebuild indexes of one event collection",
+    description=(
+        "Drops every index of the collection except `_id` and creates the "
+        "declared ones again. Queries on the collection may be slow until "
+        "the indexes are built."
+    ),
+    response_model=CollectionIndexes,
+    status_code=status.HTTP_200_OK,
+    operation_id="rebuildEventIndexes",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "A declared index could not be created",
+        },
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Invalid or missing API Key",
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "No such event_type collection exists",
+        },
+    },
+)
+async def rebuild_indexes(
+    event_type: str = Path(
+        description="Name of the event_type / MongoDB collection",
+    ),
+    db: Database = db_dep,
+) -> CollectionIndexes:
+    await _require_collection(db, event_type)
+
+    try:
+        await db.indexes.rebuild(
+            event_type,
+            timeseries=await db.is_timeseries(event_type),
+        )
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to rebuild indexes: {exc}",
+        ) from exc
+
+    return await describe_indexes(db, event_type)
+
+
+@router.get(
+    "/ingest/latency",
+    summary="Ingest latency per write tier",
+    description=(
+        "Latency of single-event inserts in this process, per write policy "
+        "(`EVENT_WRITE_POLICIES`), to compare what the cheaper tiers save."
+    ),
+    response_model=list[IngestTierLatency],
+    status_code=status.HTTP_200_OK,
+    operation_id="getIngestLatency",
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Invalid or missing API Key",
+        },
+    },
+)
+async def ingest_latency(db: Database = db_dep) -> list[IngestTierLatency]:
+    return [
+        IngestTierLatency(
+            tier=tier,
+            count=stats.count,
+            mean_ms=stats.mean_seconds * 1000,
+            p50_ms=stats.percentile(50) * 1000,
+            p99_ms=stats.percentile(99) * 1000,
+        )
+        for tier, stats in sorted(db.ingest_latency.items())
+    ]
@@ -0,0 +1,430 @@
+import asyncio
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
+from pymongo.errors import ExecutionTimeout, OperationFailure
+
+from app.data.aggregations import (
+    Bucket,
+    count_over_time_pipeline,
+    distinct_users_pipeline,
+    top_values_pipeline,
+    validate_field_path,
+)
+from app.data.connection import Database
+from app.data.db import get_db, get_rollups
+from app.data.rollups import Granularity, RollupStore, plan_rollup_query
+from app.schemas.analytics import CountSeries, DistinctUsers, TopValues
+
+db_dep = Depends(get_db)
+rollups_dep = Depends(get_rollups)
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    dependencies=[db_dep],
+)
+
+AGGREGATION_ERRORS: dict[int | str, dict[str, Any]] = {
+    status.HTTP_400_BAD_REQUEST: {
+        "description": "Invalid field path or time zone",
+    },
+    status.HTTP_404_NOT_FOUND: {
+        "description": "No such event_type collection exists",
+    },
+    status.HTTP_503_SERVICE_UNAVAILABLE: {
+        "description": "Aggregation timed out, narrow the time range",
+    },
+}
+
+
+async def run_aggregation(
+    request: Request,
+    db: Database,
+    event_type: str,
+    pipeline: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """
+    Runs a bounded aggregation pipeline over an event collection, allowed to
+    spill to disk and limited to ANALYTICS_MAX_TIME_MS.
+    """
+    if not await db.collection_exists(event_type):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No events of type '{event_type}' found",
+        )
+
+    coll = await db.ensure_collection(event_type)
+    try:
+        cursor = coll.aggregate(
+            pipeline,
+            allowDiskUse=True,
+            maxTimeMS=request.app.state.settings.ANALYTICS_MAX_TIME_MS,
+        )
+        return await cursor.to_list(length=None)
+    except ExecutionTimeout as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Aggregation timed out, narrow the time range",
+        ) from exc
+    except OperationFailure as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Aggregation failed: {exc}",
+        ) from exc
+
+
+async def counts_from_rollups(
+    request: Request,
+    db: Database,
+    rollups: RollupStore,
+    event_type: str,
+    bucket: Bucket,
+    *,
+    start_time: datetime | None,
+    end_time: datetime | None,
+) -> dict[datetime, int] | None:
+    """
+    Event counts per UTC bucket, read from rollups where they are complete
+    and from raw events for the rest of the range. None if no part of the
+    range is covered by rollups.
+    """
+    granularity: Granularity = "hour" if bucket == "hour" else "day"
+    plan = plan_rollup_query(
+        start_time,
+        end_time,
+        await rollups.complete_from(event_type),
+        granularity,
+    )
+    if plan.rollup is None:
+        return None
+
+    counts: Counter[datetime] = Counter()
+    for rollup_bucket, count in (
+        await rollups.counts(event_type, granularity, *plan.rollup)
+    ).items():
+        if bucket == "week":
+            counts[rollup_bucket - timedelta(days=rollup_bucket.weekday())] += count
+        else:
+            counts[rollup_bucket] += count
+
+    for raw in plan.raw:
+        rows = await run_aggregation(
+            request,
+            db,
+            event_type,
+            count_over_time_pipeline(
+                bucket,
+                raw.start,
+                raw.end,
+                request.app.state.settings.ANALYTICS_MAX_BUCKETS,
+                end_exclusive=raw.end_exclusive,
+            ),
+        )
+        for row in rows:
+            counts[row["_id"].replace(tzinfo=UTC)] += row["count"]
+
+    return counts
+
+
+async def top_values_from_rollups(
+    request: Request,
+    db: Database,
+    rollups: RollupStore,
+    event_type: str,
+    field: str,
+    *,
+    start_time: datetime | None,
+    end_time: datetime | None,
+) -> Counter[Any] | None:
+    """
+    Value counts of a rollup dimension, read from daily rollups where they
+    are complete and from raw events for the rest of the range. Each part
+    contributes at most ANALYTICS_MAX_BUCKETS values. None if the field is
+    not a rollup dimension or no part of the range is covered by rollups.
+    """
+    if field not in rollups.dimensions_for(event_type):
+        return None
+
+    plan = plan_rollup_query(
+        start_time,
+        end_time,
+        await rollups.complete_from(event_type),
+        "day",
+    )
+    if plan.rollup is None:
+        return None
+
+    max_values = request.app.state.settings.ANALYTICS_MAX_BUCKETS
+    counts: Counter[Any] = Counter()
+    for row in await rollups.top_values(event_type, field, *plan.rollup, max_values):
+        counts[row["_id"]] += row["count"]
+
+    for raw in plan.raw:
+        rows = await run_aggregation(
+            request,
+            db,
+            event_type,
+            top_values_pipeline(
+                field,
+                max_values,
+                raw.start,
+                raw.end,
+                end_exclusive=raw.end_exclusive,
+            ),
+        )
+        for row in rows:
+            counts[row["_id"]] += row["count"]
+
+    return counts
+
+
+def field_path(path: str) -> str:
+    try:
+        return validate_field_path(path)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+
+@router.get(
+    "/{event_type}/counts",
+    summary="Event counts over time",
+    description=(
+        "Counts events of type `event_type` per hour, day or week (weeks start "
+        "on Monday), optionally within a time range. Buckets without events "
+        "are omitted. Returned as columns: `timestamps[i]` has `counts[i]` events. "
+        "UTC buckets are read from the pre-aggregated rollups where available."
+    ),
+    response_model=CountSeries,
+    status_code=status.HTTP_200_OK,
+    operation_id="getEventCounts",
+    responses=AGGREGATION_ERRORS,
+)
+async def event_counts(
+    request: Request,
+    *,
+    event_type: str = Path(
+        description="Name of the event_type / MongoDB collection",
+    ),
+    bucket: Bucket = Query("day", description="Time bucket size"),  # noqa: B008
+    start_time: datetime | None = Query(  # noqa: B008
+        None,
+        description="Only events on or after this ISO timestamp",
+    ),
+    end_time: datetime | None = Query(  # noqa: B008
+        None,
+        description="Only events on or before this ISO timestamp",
+    ),
+    timezone: str = Query(
+        "UTC",
+        description="Olson time zone the buckets are aligned to, e.g. Europe/Skopje",
+    ),
+    source: Literal["auto", "raw"] = Query(
+        "auto",
+        description="'raw' to always aggregate raw events instead of rollups",
+    ),
+    db: Database = db_dep,
+    rollups: RollupStore | None = rollups_dep,
+) -> CountSeries:
+    counts = None
+    if rollups is not None and source == "auto" and timezone == "UTC":
+        counts = await counts_from_rollups(
+            request,
+            db,
+            rollups,
+            event_type,
+            bucket,
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+    if counts is not None:
+        timestamps = sorted(counts)[: request.app.state.settings.ANALYTICS_MAX_BUCKETS]
+        return CountSeries(
+            event_type=event_type,
+            bucket=bucket,
+            source="rollups",
+            timestamps=timestamps,
+            counts=[counts[timestamp] for timestamp in timestamps],
+        )
+
+    rows = await run_aggregation(
+        request,
+        db,
+        event_type,
+        count_over_time_pipeline(
+            bucket,
+            start_time,
+            end_time,
+            request.app.state.settings.ANALYTICS_MAX_BUCKETS,
+            timezone,
+        ),
+    )
+
+    return CountSeries(
+        event_type=event_type,
+        bucket=bucket,
+        source="raw",
+        timestamps=[row["_id"] for row in rows],
+        counts=[row["count"] for row in rows],
+    )
+
+
+@router.get(
+    "/{event_type}/top",
+    summary="Most frequent values of a field",
+    description=(
+        "Returns the `limit` most frequent values of a dotted field (e.g. "
+        "`payload.keyword`, `metadata.commandName`, `metadata.guildId`) among "
+        "events of type `event_type`, optionally within a time range. "
+        "Returned as columns: `values[i]` occurs in `counts[i]` events. "
+        "Fields configured as rollup dimensions are read from the "
+        "pre-aggregated rollups where available."
+    ),
+    response_model=TopValues,
+    status_code=status.HTTP_200_OK,
+    operation_id="getTopValues",
+    responses=AGGREGATION_ERRORS,
+)
+async def top_values(
+    request: Request,
+    *,
+    event_type: str = Path(
+        description="Name of the event_type / MongoDB collection",
+    ),
+    field: str = Query(description="Dotted field path, e.g. payload.keyword"),
+    limit: int = Query(10, ge=1, le=1000, description="Number of values to return"),
+    start_time: datetime | None = Query(  # noqa: B008
+        None,
+        description="Only events on or after this ISO timestamp",
+    ),
+    end_time: datetime | None = Query(  # noqa: B008
+        None,
+        description="Only events on or before this ISO timestamp",
+    ),
+    source: Literal["auto", "raw"] = Query(
+        "auto",
+        description="'raw' to always aggregate raw events instead of rollups",
+    ),
+    db: Database = db_dep,
+    rollups: RollupStore | None = rollups_dep,
+) -> TopValues:
+    field = field_path(field)
+
+    counts = None
+    if rollups is not None and source == "auto":
+        counts = await top_values_from_rollups(
+            request,
+            db,
+            rollups,
+            event_type,
+            field,
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+    if counts is not None:
+        top = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))[:limit]
+        return TopValues(
+            event_type=event_type,
+            field=field,
+            source="rollups",
+            values=[value for value, _ in top],
+            counts=[count for _, count in top],
+        )
+
+    rows = await run_aggregation(
+        request,
+        db,
+        event_type,
+        top_values_pipeline(field, limit, start_time, end_time),
+    )
+
+    return TopValues(
+        event_type=event_type,
+        field=field,
+        source="raw",
+        values=[row["_id"] for row in rows],
+        counts=[row["count"] for row in rows],
+    )
+
+
+@router.get(
+    "/{event_type}/distinct-users",
+    summary="Distinct user counts",
+    description=(
+        "Counts distinct users (distinct values of `user_field`) among events "
+        "of type `event_type`, optionally within a time range, in total and, "
+        "if `bucket` is given, per time bucket as columns: `timestamps[i]` "
+        "has `users[i]` distinct users."
+    ),
+    response_model=DistinctUsers,
+    status_code=status.HTTP_200_OK,
+    operation_id="getDistinctUsers",
+    responses=AGGREGATION_ERRORS,
+)
+async def distinct_users(
+    request: Request,
+    *,
+    event_type: str = Path(
+        description="Name of the event_type / MongoDB collection",
+    ),
+    user_field: str = Query(
+        "metadata.callerId",
+        description="Dotted field path identifying the user",
+    ),
+    bucket: Bucket | None = Query(  # noqa: B008
+        None,
+        description="Time bucket size of the series",
+    ),
+    start_time: datetime | None = Query(  # noqa: B008
+        None,
+        description="Only events on or after this ISO timestamp",
+    ),
+    end_time: datetime | None = Query(  # noqa: B008
+        None,
+        description="Only events on or before this ISO timestamp",
+    ),
+    timezone: str = Query(
+        "UTC",
+        description="Olson time zone the buckets are aligned to, e.g. Europe/Skopje",
+    ),
+    db: Database = db_dep,
+) -> DistinctUsers:
+    user_field = field_path(user_field)
+    total_pipeline = distinct_users_pipeline(user_field, start_time, end_time)
+
+    if bucket is None:
+        total_rows = await run_aggregation(request, db, event_type, total_pipeline)
+        series_rows: list[dict[str, Any]] = []
+    else:
+        total_rows, series_rows = await asyncio.gather(
+            run_aggregation(request, db, event_type, total_pipeline),
+            run_aggregation(
+                request,
+                db,
+                event_type,
+                distinct_users_pipeline(
+                    user_field,
+                    start_time,
+                    end_time,
+                    bucket=bucket,
+                    max_buckets=request.app.state.settings.ANALYTICS_MAX_BUCKETS,
+                    timezone=timezone,
+                ),
+            ),
+        )
+
+    return DistinctUsers(
+        event_type=event_type,
+        user_field=user_field,
+        total=total_rows[0]["users"] if total_rows else 0,
+        bucket=bucket,
+        timestamps=[row["_id"] for row in series_rows],
+        users=[row["users"] for row in series_rows],
+    )
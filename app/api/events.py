@@ -1,30 +1,65 @@
+import asyncio
+import logging
 import uuid
+from collections import defaultdict
 from datetime import UTC, datetime
+from functools import partial
+from typing import Any, Literal
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     HTTPException,
     Path,
     Query,
+    Request,
+    Response,
     status,
 )
+from fastapi.responses import StreamingResponse
+from pymongo.errors import BulkWriteError
 
+from app.data.aggregations import timestamp_query
+from app.data.buffer import BufferFullError
 from app.data.connection import Database
-from app.data.db import get_db
-from app.extractors.context_faq_extractor import (
-    perform_context_faq_extraction_and_update,
-    prepare_context_faq_data,
+from app.data.db import get_db, get_job_queue, get_response_cache, get_rollups
+from app.data.jobs import ExtractionJobQueue, JobSpec
+from app.data.rollups import RollupStore
+from app.extractors.faq_event_extractor import (
+    FaqEventExtractionData,
+    document_group_key,
+    prepare_faq_event_data,
 )
-from app.extractors.targeted_faq_extractor import (
-    perform_direct_faq_extraction_and_update,
-    prepare_direct_faq_data,
+from app.extractors.worker import JOB_KIND_FAQ_EVENT
+from app.schemas.events import (
+    BatchIngestItemResult,
+    BatchIngestResponse,
+    EventTypeSummary,
+    IngestResponse,
+    UsageEvent,
 )
-from app.schemas.events import IngestResponse, UsageEvent
 from app.utils.auth import verify_api_key
+from app.utils.export import DEFAULT_CSV_FIELDS, iter_csv, iter_ndjson, parse_fields
+from app.utils.log import bind_event_id, event_id_var
+from app.utils.pagination import SORT_KEYS, encode_cursor, keyset_filter
+from app.utils.parser import NDJSON_CONTENT_TYPES, parse_event_batch
+from app.utils.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    etag_matches,
+    make_cache_key,
+    make_etag,
+    window_version,
+)
+from app.utils.serialization import EVENT_FIELDS, EVENT_PROJECTION, dump_events
+from app.utils.tracing import span
+
+logger = logging.getLogger(__name__)
 
 db_dep = Depends(get_db)
+job_queue_dep = Depends(get_job_queue)
+rollups_dep = Depends(get_rollups)
+response_cache_dep = Depends(get_response_cache)
 
 router = APIRouter(
     prefix="/events",
@@ -33,6 +68,22 @@ router = APIRouter(
 )
 
 
+def prepare_event_document(event: UsageEvent) -> dict[str, Any]:
+    """
+    Fills in a missing `event_id`/`timestamp`, marks FAQ events that can be
+    extracted as pending extraction and returns the document to store.
+    `timestamp` is kept as a datetime, so it is stored as a native BSON date.
+    """
+    if not event.event_id:
+        event.event_id = str(uuid.uuid4())
+    if not event.timestamp:
+        event.timestamp = datetime.now(UTC)
+    if prepare_faq_event_data(event) is not None:
+        event.extraction_status = "pending"
+
+    return event.model_dump(exclude_none=True)
+
+
 @router.post(
     "/ingest",
     summary="Ingest a usage event",
@@ -40,8 +91,14 @@ router = APIRouter(
         "Accepts a `UsageEvent` JSON body, auto-generates `event_id` and "
         "`timestamp` if omitted, then persists it into the MongoDB collection "
         "named by `event_type`. Collections are created on first insert. "
-        "For 'faq' events, an answer extraction task is queued in the background, "
-        "using either direct user message or context analysis."
+        "For 'faq' events, an answer extraction job is queued for the extraction "
+        "workers, using either direct user message or context analysis; no LLM "
+        "call is made before responding. The progress of the extraction is "
+        "recorded in the event's `extraction_status`. "
+        "When the write-behind buffer runs in fast-ack mode, non-FAQ events are "
+        "acknowledged with 202 as soon as they are queued for writing. Events "
+        "of types with the `unacknowledged` write policy are acknowledged with "
+        "202 as soon as they are handed to the database driver."
     ),
     response_model=IngestResponse,
     status_code=status.HTTP_201_CREATED,
@@ -54,90 +111,329 @@ router = APIRouter(
         status.HTTP_401_UNAUTHORIZED: {
             "description": "Invalid or missing API Key",
         },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Write buffer is full, retry later",
+        },
     },
     dependencies=[Depends(verify_api_key)],
 )
 async def ingest_event(
     event: UsageEvent,
-    background_tasks: BackgroundTasks,
+    request: Request,
+    response: Response,
+    *,
     db: Database = db_dep,
+    job_queue: ExtractionJobQueue = job_queue_dep,
+    rollups: RollupStore | None = rollups_dep,
+    response_cache: ResponseCache = response_cache_dep,
 ) -> IngestResponse:
-    if not event.event_id:
-        event.event_id = str(uuid.uuid4())
-    if not event.timestamp:
-        event.timestamp = datetime.now(UTC)
+    with span("ingest.prepare_document"):
+        doc = prepare_event_document(event)
+        faq_data = prepare_faq_event_data(event)
+    # Correlates the log records of this request (and its task) with the
+    # event, once a missing event_id has been generated
+    event_id_var.set(event.event_id)
 
-    coll = db.get_collection(event.event_type)
-    doc = event.model_dump(mode="json", exclude_none=True)
+    # FAQ events always wait for the write, since extraction updates the stored document
+    fast_ack = (
+        request.app.state.settings.INGEST_FAST_ACK
+        and db.write_buffer is not None
+        and faq_data is None
+    )
 
     try:
-        result = await coll.insert_one(doc)
-        inserted_id_str = str(result.inserted_id)
+        with span("ingest.insert", event_type=event.event_type, wait=not fast_ack):
+            inserted_id_str = await db.insert_event(
+                event.event_type,
+                doc,
+                wait=not fast_ack,
+            )
+    except BufferFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ingest buffer is full, retry later",
+        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to insert event: {exc}",
         ) from exc
 
-    if event.event_type == "faq":
-        direct_faq_data = prepare_direct_faq_data(event)
+    # With fast ack the document may still fail to be written, which is only
+    # logged by the buffer; the event is then counted in the rollups anyway
+    response_cache.invalidate(event.event_type)
+    if rollups is not None:
+        rollups.record(event.event_type, doc)
 
-        if direct_faq_data:
-            print(
-                f"FAQ event {event.event_id}: Direct question found. Queuing direct extraction.",
+    if faq_data:
+        logger.info("Queuing FAQ extraction")
+        with span("ingest.queue_extraction"):
+            await queue_faq_extraction(
+                job_queue,
+                [faq_data],
+                request.app.state.settings.EXTRACTION_GROUP_DELAY_SECONDS,
             )
-            background_tasks.add_task(
-                perform_direct_faq_extraction_and_update,
-                db,
-                direct_faq_data,
-            )
-        else:
-            context_faq_data = await prepare_context_faq_data(event)
-
-            if context_faq_data:
-                print(
-                    f"FAQ event {event.event_id}: No direct question, but relevant message found in context. Queuing context extraction.",
-                )
-                background_tasks.add_task(
-                    perform_context_faq_extraction_and_update,
-                    db,
-                    context_faq_data,
-                )
-            else:
-                print(
-                    f"FAQ event {event.event_id}: No direct question and no relevant message found in context. Skipping extraction.",
-                )
     else:
-        print(
-            f"Event {event.event_id} (type: {event.event_type}): Not an FAQ event, skipping extraction logic.",
-        )
+        logger.debug("Not an extractable FAQ event, skipping extraction")
+
+    accepted = fast_ack or db.is_unacknowledged(event.event_type)
+    if accepted:
+        response.status_code = status.HTTP_202_ACCEPTED
 
     return IngestResponse(
-        status="ok",
+        status="accepted" if accepted else "ok",
         event_type=event.event_type,
         event_id=event.event_id,
         inserted_id=inserted_id_str,
     )
 
 
+async def queue_faq_extraction(
+    job_queue: ExtractionJobQueue,
+    faq_data: list[FaqEventExtractionData],
+    delay: float,
+) -> None:
+    """
+    Queues one chained extraction job (question identification, then answer
+    extraction) per stored FAQ event, with a single insert. Jobs are keyed by
+    their document so workers can extract answers for several events at once.
+    Failing to queue is logged and does not fail the ingest.
+    """
+    try:
+        await job_queue.enqueue_many(
+            [
+                JobSpec(
+                    JOB_KIND_FAQ_EVENT,
+                    data["event_type"],
+                    data["event_id"],
+                    dict(data),
+                    group_key=document_group_key(data),
+                )
+                for data in faq_data
+            ],
+            delay=delay,
+        )
+    except Exception:
+        logger.exception("Failed to queue FAQ extraction for %d events", len(faq_data))
+
+
+async def _insert_event_group(
+    db: Database,
+    event_type: str,
+    docs: list[dict[str, Any]],
+) -> dict[int, str]:
+    """
+    Writes all documents of one event_type with a single unordered insert_many.
+    Returns a mapping of group-local indexes to the error of each failed document.
+    """
+    try:
+        coll = await db.ensure_collection(event_type)
+        await coll.insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        return {
+            err["index"]: err.get("errmsg", "Write error")
+            for err in exc.details.get("writeErrors", [])
+        }
+    except Exception as exc:
+        return dict.fromkeys(range(len(docs)), f"Failed to insert event: {exc}")
+    return {}
+
+
+@router.post(
+    "/ingest/batch",
+    summary="Ingest a batch of usage events",
+    description=(
+        "Accepts either a JSON array of `UsageEvent` objects or an NDJSON stream "
+        "(`Content-Type: application/x-ndjson`, one event per line). Events are "
+        "grouped by `event_type` and each group is written with a single unordered "
+        "bulk insert. Invalid events do not reject the batch: the outcome of every "
+        "event is reported individually, in submission order. Extraction jobs for "
+        "all stored 'faq' events are queued with a single insert."
+    ),
+    response_model=BatchIngestResponse,
+    status_code=status.HTTP_200_OK,
+    response_description="Per-event outcome of the batch",
+    operation_id="ingestUsageEventBatch",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Body is neither a JSON array nor an NDJSON stream",
+        },
+        status.HTTP_401_UNAUTHORIZED: {
+            "description": "Invalid or missing API Key",
+        },
+        status.HTTP_413_CONTENT_TOO_LARGE: {
+            "description": "Batch contains more events than allowed",
+        },
+    },
+    dependencies=[Depends(verify_api_key)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/UsageEvent"},
+                    },
+                },
+                NDJSON_CONTENT_TYPES[0]: {
+                    "schema": {
+                        "type": "string",
+                        "description": "One `UsageEvent` JSON object per line",
+                    },
+                },
+            },
+        },
+    },
+)
+async def ingest_event_batch(
+    request: Request,
+    db: Database = db_dep,
+    job_queue: ExtractionJobQueue = job_queue_dep,
+    rollups: RollupStore | None = rollups_dep,
+    response_cache: ResponseCache = response_cache_dep,
+) -> BatchIngestResponse:
+    max_events = request.app.state.settings.INGEST_BATCH_MAX_EVENTS
+
+    try:
+        parsed = parse_event_batch(
+            await request.body(),
+            request.headers.get("content-type", ""),
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    if len(parsed) > max_events:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Batch contains {len(parsed)} events, at most {max_events} are allowed",
+        )
+
+    results: list[BatchIngestItemResult] = []
+    groups: defaultdict[str, list[tuple[int, UsageEvent, dict[str, Any]]]] = (
+        defaultdict(list)
+    )
+
+    for index, item in enumerate(parsed):
+        if isinstance(item, str):
+            results.append(
+                BatchIngestItemResult(index=index, status="error", error=item),
+            )
+            continue
+        groups[item.event_type].append((index, item, prepare_event_document(item)))
+
+    group_items = list(groups.items())
+    group_errors = await asyncio.gather(
+        *(
+            _insert_event_group(db, event_type, [doc for _, _, doc in items])
+            for event_type, items in group_items
+        ),
+    )
+
+    faq_data: list[FaqEventExtractionData] = []
+    for (_, items), errors in zip(group_items, group_errors, strict=True):
+        for position, (index, event, doc) in enumerate(items):
+            error = errors.get(position)
+            if error is not None:
+                with bind_event_id(event.event_id):
+                    logger.warning("Event of a batch was not stored: %s", error)
+                results.append(
+                    BatchIngestItemResult(
+                        index=index,
+                        status="error",
+                        event_type=event.event_type,
+                        event_id=event.event_id,
+                        error=error,
+                    ),
+                )
+                continue
+
+            results.append(
+                BatchIngestItemResult(
+                    index=index,
+                    status="ok",
+                    event_type=event.event_type,
+                    event_id=event.event_id,
+                    inserted_id=str(doc["_id"]),
+                ),
+            )
+            response_cache.invalidate(event.event_type)
+            if rollups is not None:
+                rollups.record(event.event_type, doc)
+            if (event_faq_data := prepare_faq_event_data(event)) is not None:
+                faq_data.append(event_faq_data)
+
+    if faq_data:
+        logger.info("Queuing FAQ extraction for %d events", len(faq_data))
+        await queue_faq_extraction(
+            job_queue,
+            faq_data,
+            request.app.state.settings.EXTRACTION_GROUP_DELAY_SECONDS,
+        )
+
+    results.sort(key=lambda result: result.index)
+    inserted = sum(1 for result in results if result.status == "ok")
+    failed = len(results) - inserted
+
+    return BatchIngestResponse(
+        status="ok" if not failed else "partial" if inserted else "error",
+        inserted=inserted,
+        failed=failed,
+        results=results,
+    )
+
+
+@router.get(
+    "/",
+    summary="List event types",
+    description=(
+        "Returns every event type with the approximate number of stored "
+        "events and the timestamp of the newest one. Served from a cache "
+        "refreshed every `EVENT_TYPES_CACHE_TTL_SECONDS`."
+    ),
+    response_model=list[EventTypeSummary],
+    status_code=status.HTTP_200_OK,
+    operation_id="listEventTypes",
+)
+async def list_event_types(db: Database = db_dep) -> list[EventTypeSummary]:
+    return [EventTypeSummary(**stats) for stats in await db.registry.stats()]
+
+
 @router.get(
     "/{event_type}/",
     summary="List usage events",
     description=(
         "Return events of type `event_type` with optional filtering "
-        "by timestamp. Results are sorted newest first."
+        "by timestamp. Results are sorted newest first (by `timestamp`, then "
+        "`event_id`). When more events may follow, the response carries a "
+        '`Link: <...>; rel="next"` header and an opaque `X-Next-Cursor` '
+        "token; pass it back as `cursor` to fetch the next page. Unlike `skip`, "
+        "which is kept for backwards compatibility, cursor pages take the same "
+        "time at any depth. Responses carry an `ETag` that changes when events "
+        "are added to the time window; send it as `If-None-Match` to get a 304 "
+        "without a body while nothing changed."
     ),
     response_model=list[UsageEvent],
     status_code=status.HTTP_200_OK,
     response_description="A page of matching usage events",
     operation_id="listUsageEvents",
     responses={
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "No events were added to the window since the given ETag",
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Invalid cursor, or both `cursor` and `skip` given",
+        },
         status.HTTP_404_NOT_FOUND: {
             "description": "No such event_type collection exists",
         },
     },
 )
 async def list_events(
+    request: Request,
     event_type: str = Path(
         description="Name of the event_type / MongoDB collection",
     ),
@@ -152,7 +448,12 @@ async def list_events(
     skip: int = Query(
         0,
         ge=0,
-        description="Number of events to skip (offset for pagination)",
+        description="Number of events to skip (offset for pagination, "
+        "deprecated in favour of `cursor`)",
+    ),
+    cursor: str | None = Query(
+        None,
+        description="Opaque token from `X-Next-Cursor` of the previous page",
     ),
     limit: int = Query(
         100,
@@ -161,25 +462,191 @@ async def list_events(
         description="Max number of events to return (capped at 10 000)",
     ),
     db: Database = db_dep,
-) -> list[UsageEvent]:
-    coll = db.get_collection(event_type)
-
-    query: dict = {}
-    if start_time or end_time:
-        ts_filter: dict = {}
-        if start_time:
-            ts_filter["$gte"] = start_time
-        if end_time:
-            ts_filter["$lte"] = end_time
-        query["timestamp"] = ts_filter
-
-    if event_type not in await db.db.list_collection_names():
+    response_cache: ResponseCache = response_cache_dep,
+) -> Response:
+    window = query = timestamp_query(start_time, end_time)
+
+    if cursor is not None:
+        if skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="`cursor` and `skip` cannot be combined",
+            )
+        try:
+            query = {"$and": [query, keyset_filter(cursor)]}
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc),
+            ) from exc
+
+    if not await db.collection_exists(event_type):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No events of type '{event_type}' found",
         )
 
-    cursor = coll.find(query, {"_id": 0}).sort("timestamp", -1).skip(skip).limit(limit)
-    events = await cursor.to_list(length=limit)
+    coll = await db.ensure_collection(event_type)
+
+    key = make_cache_key(event_type, request.query_params.multi_items())
+    cached = response_cache.get(key)
+    if cached is not None:
+        etag = cached.etag
+    else:
+        with span("list_events.window_version"):
+            etag = make_etag(
+                key,
+                *await window_version(coll, window),
+                await db.modification_version(event_type),
+            )
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag},
+        )
 
-    return events
+    if cached is None:
+        with span("list_events.query", limit=limit):
+            find_cursor = (
+                coll.find(query, EVENT_PROJECTION)
+                .sort(SORT_KEYS)
+                .skip(skip)
+                .limit(limit)
+            )
+            events = await find_cursor.to_list(length=limit)
+        with span("list_events.enrich"):
+            await db.enrich_events(event_type, events, fields=EVENT_FIELDS)
+
+        headers = {}
+        if len(events) == limit:
+            next_cursor = encode_cursor(events[-1])
+            next_url = request.url.remove_query_params("skip").include_query_params(
+                cursor=next_cursor,
+            )
+            headers["Link"] = f'<{next_url}>; rel="next"'
+            headers["X-Next-Cursor"] = next_cursor
+
+        with span("list_events.serialize", rows=len(events)):
+            body = dump_events(events)
+        cached = CachedResponse(etag, body, headers)
+        response_cache.set(key, cached)
+
+    return Response(
+        cached.body,
+        media_type="application/json",
+        headers={"ETag": etag, **cached.headers},
+    )
+
+
+@router.get(
+    "/{event_type}/export",
+    summary="Export usage events",
+    description=(
+        "Streams all events of type `event_type` (optionally filtered by "
+        "timestamp) as NDJSON or CSV, newest first, without an upper limit. "
+        "Events are read from MongoDB and written in batches of `batch_size`, "
+        "so memory use stays constant regardless of the export size. "
+        "`fields` restricts the export to a comma-separated list of dotted "
+        "field paths, which also become the CSV columns."
+    ),
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    response_description="NDJSON or CSV stream of matching usage events",
+    operation_id="exportUsageEvents",
+    responses={
+        status.HTTP_200_OK: {
+            "content": {
+                NDJSON_CONTENT_TYPES[0]: {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "Invalid field projection",
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "No such event_type collection exists",
+        },
+    },
+)
+async def export_events(
+    request: Request,
+    *,
+    event_type: str = Path(
+        description="Name of the event_type / MongoDB collection",
+    ),
+    export_format: Literal["ndjson", "csv"] = Query(
+        "ndjson",
+        alias="format",
+        description="Output format",
+    ),
+    fields: str | None = Query(
+        None,
+        description="Comma-separated dotted field paths to export, "
+        "e.g. `event_id,payload.content,extracted_answer` (default: all fields)",
+    ),
+    start_time: datetime | None = Query(  # noqa: B008
+        None,
+        description="Only events on or after this ISO timestamp",
+    ),
+    end_time: datetime | None = Query(  # noqa: B008
+        None,
+        description="Only events on or before this ISO timestamp",
+    ),
+    batch_size: int | None = Query(
+        None,
+        ge=1,
+        le=50000,
+        description="Events read from MongoDB and written per chunk",
+    ),
+    db: Database = db_dep,
+) -> StreamingResponse:
+    try:
+        projected_fields = parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    query = timestamp_query(start_time, end_time)
+
+    if not await db.collection_exists(event_type):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No events of type '{event_type}' found",
+        )
+
+    batch_size = batch_size or request.app.state.settings.EXPORT_BATCH_SIZE
+    projection = {"_id": 0, **dict.fromkeys(projected_fields, 1)}
+    coll = await db.ensure_collection(event_type)
+
+    enrich = None
+    if await db.is_timeseries(event_type):
+        enrich = partial(db.enrich_events, event_type, fields=projected_fields)
+        if projected_fields:
+            projection["event_id"] = 1
+
+    find_cursor = coll.find(query, projection, batch_size=batch_size).sort(SORT_KEYS)
+
+    if export_format == "csv":
+        return StreamingResponse(
+            iter_csv(
+                find_cursor,
+                batch_size,
+                projected_fields or DEFAULT_CSV_FIELDS,
+                enrich,
+            ),
+            media_type="text/csv; charset=utf-8",
+            headers={
+                "Content-Disposition": f'attachment; filename="{event_type}.csv"',
+            },
+        )
+
+    return StreamingResponse(
+        iter_ndjson(find_cursor, batch_size, enrich),
+        media_type=NDJSON_CONTENT_TYPES[0],
+        headers={
+            "Content-Disposition": f'attachment; filename="{event_type}.ndjson"',
+        },
+    )
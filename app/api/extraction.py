@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, status
+
+from app.data.connection import Database
+from app.data.db import get_db, get_extraction_pool, get_job_queue
+from app.data.jobs import ExtractionJobQueue
+from app.extractors.core import result_cache
+from app.extractors.worker import ExtractionWorkerPool
+from app.schemas.extraction import (
+    ExtractionQueueDepth,
+    ExtractionResultBufferStats,
+    ExtractionStats,
+    ExtractionWorkerStats,
+    LLMCacheStats,
+)
+
+router = APIRouter(
+    prefix="/extraction",
+    tags=["Extraction"],
+)
+
+
+@router.get(
+    "/stats",
+    summary="FAQ extraction queue and worker statistics",
+    description=(
+        "Returns the depth of the durable extraction job queue per status "
+        "and the counters of the worker pool, result buffer and LLM result cache "
+        "running in this process."
+    ),
+    response_model=ExtractionStats,
+    status_code=status.HTTP_200_OK,
+    operation_id="getExtractionStats",
+)
+async def extraction_stats(
+    queue: ExtractionJobQueue = Depends(get_job_queue),  # noqa: B008
+    pool: ExtractionWorkerPool = Depends(get_extraction_pool),  # noqa: B008
+    db: Database = Depends(get_db),  # noqa: B008
+) -> ExtractionStats:
+    processed = pool.succeeded + pool.retried + pool.failed
+    hits = result_cache.memory_hits + result_cache.mongo_hits
+    lookups = hits + result_cache.misses
+    buffer = db.update_buffer
+
+    return ExtractionStats(
+        queue=ExtractionQueueDepth(**await queue.depth()),
+        workers=ExtractionWorkerStats(
+            concurrency=pool.concurrency,
+            in_flight=pool.in_flight,
+            succeeded=pool.succeeded,
+            retried=pool.retried,
+            failed=pool.failed,
+            throughput_per_second=pool.throughput(),
+            average_duration_seconds=pool.total_duration / processed
+            if processed
+            else 0.0,
+        ),
+        results=ExtractionResultBufferStats(
+            enabled=buffer is not None,
+            pending=buffer.pending_count if buffer else 0,
+            written=buffer.written if buffer else 0,
+            failed=buffer.failed if buffer else 0,
+            bulk_writes=buffer.bulk_writes if buffer else 0,
+        ),
+        cache=LLMCacheStats(
+            enabled=result_cache.enabled,
+            entries=result_cache.size,
+            memory_hits=result_cache.memory_hits,
+            mongo_hits=result_cache.mongo_hits,
+            misses=result_cache.misses,
+            hit_ratio=hits / lookups if lookups else 0.0,
+        ),
+    )
@@ -0,0 +1,31 @@
+import logging
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+
+from app.data.db import get_job_queue
+from app.data.jobs import ExtractionJobQueue
+from app.utils.metrics import EXTRACTION_QUEUE_DEPTH, render_metrics
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(
+    queue: ExtractionJobQueue = Depends(get_job_queue),  # noqa: B008
+) -> Response:
+    """
+    Prometheus exposition of the metrics of all workers of this instance.
+    """
+    try:
+        depth = await queue.depth()
+    except Exception as e:
+        logger.warning("Failed to read the extraction queue depth: %s", e)
+    else:
+        for job_status, count in depth.items():
+            EXTRACTION_QUEUE_DEPTH.labels(status=job_status).set(count)
+
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
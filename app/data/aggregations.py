@@ -0,0 +1,188 @@
+import re
+from datetime import datetime
+from typing import Any, Literal
+
+type Bucket = Literal["hour", "day", "week"]
+
+FIELD_PATH_PATTERN = re.compile(r"^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$")
+
+
+def validate_field_path(path: str) -> str:
+    """
+    Checks that `path` is a plain dotted field path (no `$` operators), so it
+    can safely be interpolated into an aggregation pipeline.
+    Raises ValueError otherwise.
+    """
+    if not FIELD_PATH_PATTERN.match(path):
+        raise ValueError(f"Invalid field path '{path}'")
+    return path
+
+
+def timestamp_query(
+    start_time: datetime | None,
+    end_time: datetime | None,
+    *,
+    end_exclusive: bool = False,
+) -> dict[str, Any]:
+    """
+    Builds the query selecting events within an optional timestamp range.
+    """
+    query: dict[str, Any] = {}
+    if start_time or end_time:
+        ts_filter: dict = {}
+        if start_time:
+            ts_filter["$gte"] = start_time
+        if end_time:
+            ts_filter["$lt" if end_exclusive else "$lte"] = end_time
+        query["timestamp"] = ts_filter
+    return query
+
+
+def match_stage(
+    start_time: datetime | None,
+    end_time: datetime | None,
+    extra: dict[str, Any] | None = None,
+    *,
+    end_exclusive: bool = False,
+) -> dict[str, Any]:
+    """
+    `$match` on the timestamp range (served by the timestamp index) plus
+    any extra conditions.
+    """
+    return {
+        "$match": {
+            **(extra or {}),
+            **timestamp_query(start_time, end_time, end_exclusive=end_exclusive),
+        },
+    }
+
+
+def bucket_expression(bucket: Bucket, timezone: str = "UTC") -> dict[str, Any]:
+    """
+    Truncates `timestamp` to the start of its hour, day or week (Monday).
+    """
+    expression: dict[str, Any] = {
+        "date": "$timestamp",
+        "unit": bucket,
+        "timezone": timezone,
+    }
+    if bucket == "week":
+        expression["startOfWeek"] = "monday"
+    return {"$dateTrunc": expression}
+
+
+def count_over_time_pipeline(
+    bucket: Bucket,
+    start_time: datetime | None,
+    end_time: datetime | None,
+    max_buckets: int,
+    timezone: str = "UTC",
+    *,
+    end_exclusive: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Number of events per time bucket, oldest bucket first.
+    """
+    return [
+        match_stage(start_time, end_time, end_exclusive=end_exclusive),
+        {
+            "$group": {
+                "_id": bucket_expression(bucket, timezone),
+                "count": {"$sum": 1},
+            },
+        },
+        {"$sort": {"_id": 1}},
+        {"$limit": max_buckets},
+    ]
+
+
+def top_values_pipeline(
+    field: str,
+    limit: int,
+    start_time: datetime | None,
+    end_time: datetime | None,
+    *,
+    end_exclusive: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    The `limit` most frequent values of a dotted field, most frequent first.
+    Events without the field are ignored.
+    """
+    return [
+        match_stage(
+            start_time,
+            end_time,
+            {field: {"$exists": True, "$ne": None}},
+            end_exclusive=end_exclusive,
+        ),
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+
+
+def distinct_users_pipeline(
+    user_field: str,
+    start_time: datetime | None,
+    end_time: datetime | None,
+    *,
+    bucket: Bucket | None = None,
+    max_buckets: int = 0,
+    timezone: str = "UTC",
+) -> list[dict[str, Any]]:
+    """
+    Number of distinct values of `user_field`, in total (`bucket` None) or
+    per time bucket, oldest bucket first.
+    """
+    match = match_stage(
+        start_time,
+        end_time,
+        {user_field: {"$exists": True, "$ne": None}},
+    )
+    if bucket is None:
+        return [
+            match,
+            {"$group": {"_id": f"${user_field}"}},
+            {"$count": "users"},
+        ]
+
+    return [
+        match,
+        {
+            "$group": {
+                "_id": {
+                    "bucket": bucket_expression(bucket, timezone),
+                    "user": f"${user_field}",
+                },
+            },
+        },
+        {"$group": {"_id": "$_id.bucket", "users": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+        {"$limit": max_buckets},
+    ]
+
+
+def values_over_time_pipeline(
+    field: str,
+    bucket: Bucket,
+    start_time: datetime | None,
+    end_time: datetime | None,
+) -> list[dict[str, Any]]:
+    """
+    Number of events per (time bucket, value of a dotted field) in a
+    half-open time range. Events without the field are ignored.
+    """
+    return [
+        match_stage(
+            start_time,
+            end_time,
+            {field: {"$exists": True, "$ne": None}},
+            end_exclusive=True,
+        ),
+        {
+            "$group": {
+                "_id": {"bucket": bucket_expression(bucket), "value": f"${field}"},
+                "count": {"$sum": 1},
+            },
+        },
+    ]
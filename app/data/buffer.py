@@ -0,0 +1,298 @@
+import asyncio
+import contextlib
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Sized
+from typing import Any
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFullError(Exception):
+    """
+    Raised when the write-behind buffer stays full for longer than allowed.
+    """
+
+
+type PendingWrite = tuple[dict[str, Any], asyncio.Future[None] | None]
+type PendingUpdate = tuple[dict[str, Any], list[asyncio.Future[None]]]
+type UpdateWriter = Callable[[str, list[tuple[str, dict[str, Any]]]], Awaitable[None]]
+
+
+class _BatchingBuffer[B: Sized](ABC):
+    """
+    Pending writes batched per collection. A background task flushes a
+    batch as soon as it holds `max_batch` writes, or once its oldest write
+    has waited `max_delay` seconds. Subclasses implement `_flush`.
+    """
+
+    def __init__(
+        self,
+        new_batch: Callable[[], B],
+        max_batch: int,
+        max_delay: float,
+    ) -> None:
+        self.new_batch = new_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._pending: dict[str, B] = {}
+        self._oldest: dict[str, float] = {}
+        self._wakeup = asyncio.Event()
+        self._flushes: set[asyncio.Task[None]] = set()
+        self._runner: asyncio.Task[None] | None = None
+        self._closed = False
+
+    def start(self) -> None:
+        """
+        Start the background flusher. Must be called from a running event loop.
+        """
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def drain(self) -> None:
+        """
+        Stop accepting writes, flush everything pending and wait for in-flight writes.
+        """
+        self._closed = True
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+
+        for collection in list(self._pending):
+            self._schedule_flush(collection)
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(batch) for batch in self._pending.values())
+
+    def _batch(self, collection: str) -> B:
+        if collection not in self._pending:
+            self._pending[collection] = self.new_batch()
+            self._oldest[collection] = asyncio.get_running_loop().time()
+        return self._pending[collection]
+
+    def _added(self, collection: str) -> None:
+        if len(self._pending[collection]) >= self.max_batch:
+            self._schedule_flush(collection)
+        else:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._oldest:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            now = loop.time()
+            for collection, oldest in list(self._oldest.items()):
+                if now - oldest >= self.max_delay:
+                    self._schedule_flush(collection)
+
+            if self._oldest:
+                next_deadline = min(self._oldest.values()) + self.max_delay
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        max(next_deadline - loop.time(), 0),
+                    )
+                self._wakeup.clear()
+
+    def _schedule_flush(self, collection: str) -> None:
+        batch = self._pending.pop(collection, None)
+        self._oldest.pop(collection, None)
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._flush(collection, batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    @abstractmethod
+    async def _flush(self, collection: str, batch: B) -> None:
+        """
+        Write a batch taken from the pending writes of a collection.
+        """
+
+
+class WriteBehindBuffer(_BatchingBuffer[list[PendingWrite]]):
+    """
+    Coalesces single-document inserts coming from many requests into
+    unordered insert_many calls, one per collection.
+
+    A collection is flushed as soon as it has `max_batch` pending documents,
+    or once its oldest pending document has waited `max_delay` seconds.
+    At most `max_pending` documents can wait at once; further writers block
+    (backpressure) and give up with BufferFullError after `full_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        get_collection: Callable[[str], AsyncIOMotorCollection],
+        max_batch: int = 500,
+        max_delay: float = 0.05,
+        max_pending: int = 10000,
+        full_timeout: float = 1.0,
+    ) -> None:
+        super().__init__(list, max_batch, max_delay)
+        self.get_collection = get_collection
+        self.full_timeout = full_timeout
+        self._slots = asyncio.Semaphore(max_pending)
+
+    async def insert(
+        self,
+        collection: str,
+        doc: dict[str, Any],
+        *,
+        wait: bool = True,
+    ) -> ObjectId:
+        """
+        Queue a document for insertion and return its `_id`.
+        With `wait=True` this returns only once the document has been written
+        (and raises if the write failed); otherwise it returns immediately and
+        failures are only logged.
+        """
+        if self._closed:
+            raise RuntimeError("Write-behind buffer is closed")
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.full_timeout)
+        except TimeoutError as exc:
+            raise BufferFullError("Write-behind buffer is full") from exc
+
+        doc.setdefault("_id", ObjectId())
+        future = asyncio.get_running_loop().create_future() if wait else None
+        self._batch(collection).append((doc, future))
+        self._added(collection)
+
+        if future is not None:
+            await future
+        return doc["_id"]
+
+    async def _flush(self, collection: str, batch: list[PendingWrite]) -> None:
+        errors: dict[int, Exception] = {}
+        try:
+            await self.get_collection(collection).insert_many(
+                [doc for doc, _ in batch],
+                ordered=False,
+            )
+        except BulkWriteError as exc:
+            for err in exc.details.get("writeErrors", []):
+                errors[err["index"]] = RuntimeError(err.get("errmsg", "Write error"))
+        except Exception as exc:
+            errors = dict.fromkeys(range(len(batch)), exc)
+        finally:
+            for _ in batch:
+                self._slots.release()
+
+        if errors:
+            logger.warning(
+                "%d/%d buffered documents failed to insert into '%s'",
+                len(errors),
+                len(batch),
+                collection,
+            )
+
+        for index, (_, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(None)
+
+
+class UpdateBuffer(_BatchingBuffer[dict[str, PendingUpdate]]):
+    """
+    Coalesces `$set` updates of stored events, such as the extraction
+    results written by workers, into unordered bulk writes made by
+    `write_updates` (one per event type and flush).
+
+    An event type is flushed as soon as `max_batch` of its events have
+    pending updates, or once its oldest pending update has waited `max_delay`
+    seconds. Updates of the same event waiting together are merged (later
+    fields win), so their order is kept within the unordered write. Every
+    writer waits for its own update, which fails only if that event's write
+    failed.
+    """
+
+    def __init__(
+        self,
+        write_updates: UpdateWriter,
+        max_batch: int = 200,
+        max_delay: float = 0.1,
+    ) -> None:
+        super().__init__(dict, max_batch, max_delay)
+        self.write_updates = write_updates
+        self.written = 0
+        self.failed = 0
+        self.bulk_writes = 0
+
+    async def update(
+        self,
+        collection: str,
+        event_id: str,
+        fields: dict[str, Any],
+    ) -> None:
+        """
+        Queue fields to set on an event and return once they are written.
+        Raises if the write of this event failed.
+        """
+        if self._closed:
+            raise RuntimeError("Update buffer is closed")
+
+        future = asyncio.get_running_loop().create_future()
+        pending_fields, futures = self._batch(collection).setdefault(
+            event_id,
+            ({}, []),
+        )
+        pending_fields.update(fields)
+        futures.append(future)
+        self._added(collection)
+        await future
+
+    async def _flush(
+        self,
+        collection: str,
+        batch: dict[str, PendingUpdate],
+    ) -> None:
+        event_ids = list(batch)
+        errors: dict[int, Exception] = {}
+        try:
+            await self.write_updates(
+                collection,
+                [(event_id, batch[event_id][0]) for event_id in event_ids],
+            )
+        except BulkWriteError as exc:
+            for err in exc.details.get("writeErrors", []):
+                errors[err["index"]] = RuntimeError(err.get("errmsg", "Write error"))
+        except Exception as exc:
+            errors = dict.fromkeys(range(len(event_ids)), exc)
+
+        self.bulk_writes += 1
+        self.failed += len(errors)
+        self.written += len(event_ids) - len(errors)
+        if errors:
+            logger.warning(
+                "%d/%d buffered updates failed to write to '%s'",
+                len(errors),
+                len(event_ids),
+                collection,
+            )
+
+        for index, event_id in enumerate(event_ids):
+            for future in batch[event_id][1]:
+                if future.done():
+                    continue
+                if index in errors:
+                    future.set_exception(errors[index])
+                else:
+                    future.set_result(None)
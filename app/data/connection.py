@@ -1,27 +1,415 @@
+import time
+from collections.abc import Callable
+from typing import Any
+
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import ASCENDING, UpdateOne
+
+from app.data.buffer import UpdateBuffer, WriteBehindBuffer
+from app.data.indexes import IndexManager
+from app.data.registry import CollectionRegistry
+from app.data.timeseries import (
+    TimeSeriesOptions,
+    create_timeseries_collection,
+    is_timeseries_collection,
+)
+from app.data.write_policy import (
+    DEFAULT_TIER,
+    WRITE_CONCERNS,
+    LatencyStats,
+    WritePolicy,
+)
+from app.utils.metrics import MongoCommandMetrics
+from app.utils.settings import Settings
+
+
+def client_options(settings: Settings) -> dict[str, Any]:
+    """
+    Connection pool, compression, read preference and write concern options
+    of the Mongo client. Unset ones are left to MONGO_URL or the driver
+    defaults; set ones override MONGO_URL. With METRICS_ENABLED the latency
+    of every command is recorded by a command listener.
+    """
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "compressors": ",".join(settings.MONGO_COMPRESSORS) or None,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+        "w": settings.MONGO_WRITE_CONCERN,
+        "journal": settings.MONGO_WRITE_JOURNAL,
+        "event_listeners": [MongoCommandMetrics()]
+        if settings.METRICS_ENABLED
+        else None,
+    }
+    return {name: value for name, value in options.items() if value is not None}
 
 
 class Database:
-    def __init__(self, dsn: str) -> None:
+    def __init__(
+        self,
+        dsn: str,
+        extra_indexes: dict[str, list[str]] | None = None,
+        timeseries: TimeSeriesOptions | None = None,
+        registry_ttl_seconds: float = 30.0,
+        *,
+        db_name: str = "usage_data",
+        internal_db_name: str = "usage_internal",
+        options: dict[str, Any] | None = None,
+        write_policies: dict[str, WritePolicy] | None = None,
+    ) -> None:
         """
-        Initialize the database connection.
+        Initialize the database connection. `extra_indexes` declares index
+        specs per event_type on top of the default ones (see IndexManager).
+        With `timeseries` set, new event collections are created as
+        time-series collections; existing ones keep their kind.
+        The known event types are cached for `registry_ttl_seconds`
+        (see CollectionRegistry). `options` are passed to the Mongo client.
+        `write_policies` sets the write concern of inserts per event_type.
         """
         self.dsn = dsn
+        self.db_name = db_name
+        self.internal_db_name = internal_db_name
+        self.options = options or {}
+        self.write_policies = write_policies or {}
+        self.ingest_latency: dict[str, LatencyStats] = {}
+        self.extra_indexes = extra_indexes
+        self.timeseries = timeseries
+        self.registry_ttl_seconds = registry_ttl_seconds
+        self.write_buffer: WriteBehindBuffer | None = None
+        self.update_buffer: UpdateBuffer | None = None
+        # Called with the event type after stored events were updated
+        self.update_listeners: list[Callable[[str], None]] = []
+        self._timeseries_kinds: dict[str, bool] = {}
+        self._enrichment_indexed = False
+
+    @classmethod
+    def from_settings(cls, settings: Settings, **overrides: Any) -> "Database":  # noqa: ANN401
+        """
+        Database configured from the application settings. The client is
+        only created by `init`, so call it after forking (in each worker).
+        """
+        kwargs: dict[str, Any] = {
+            "dsn": settings.MONGO_URL,
+            "extra_indexes": settings.EVENT_INDEXES,
+            "timeseries": TimeSeriesOptions(
+                settings.TIMESERIES_GRANULARITY,
+                settings.EVENT_RETENTION_SECONDS,
+            )
+            if settings.TIMESERIES_ENABLED
+            else None,
+            "registry_ttl_seconds": settings.EVENT_TYPES_CACHE_TTL_SECONDS,
+            "db_name": settings.MONGO_DB_NAME,
+            "internal_db_name": settings.MONGO_INTERNAL_DB_NAME,
+            "options": client_options(settings),
+            "write_policies": settings.EVENT_WRITE_POLICIES,
+        }
+        return cls(**(kwargs | overrides))
 
     def init(self) -> None:
         """
-        Connect to Mongo and pick a hard-coded DB name.
-        Collections are created on-the-fly by name.
+        Connect to Mongo and pick the configured DB names.
+        Collections are created on-the-fly by name. Dates are read back as
+        timezone-aware (UTC) datetimes.
+        Service-internal collections (job queues etc.) live in a separate DB,
+        so they never show up as event types.
         """
-        self.client: AsyncIOMotorClient = AsyncIOMotorClient(self.dsn)
-        self.db = self.client["usage_data"]
+        self.client: AsyncIOMotorClient = AsyncIOMotorClient(
+            self.dsn,
+            tz_aware=True,
+            **self.options,
+        )
+        self.db = self.client[self.db_name]
+        self.internal_db = self.client[self.internal_db_name]
+        self.indexes = IndexManager(self.db, self.extra_indexes)
+        self.registry = CollectionRegistry(self.db, self.registry_ttl_seconds)
+
+        for listener in self.options.get("event_listeners", []):
+            if isinstance(listener, MongoCommandMetrics):
+                listener.watch_event_types(self.db_name, self.registry.cached_names)
+
+    def start_write_buffer(
+        self,
+        max_batch: int,
+        max_delay: float,
+        max_pending: int,
+        full_timeout: float,
+    ) -> None:
+        """
+        Route inserts made through `insert_event` via a write-behind buffer
+        that coalesces them into insert_many calls. Must be called from a
+        running event loop, after `init`.
+        """
+        self.write_buffer = WriteBehindBuffer(
+            self.get_collection,
+            max_batch=max_batch,
+            max_delay=max_delay,
+            max_pending=max_pending,
+            full_timeout=full_timeout,
+        )
+        self.write_buffer.start()
+
+    def start_update_buffer(self, max_batch: int, max_delay: float) -> None:
+        """
+        Route updates made through `update_event` via a buffer that coalesces
+        them into unordered bulk writes (see `update_events`). Must be called
+        from a running event loop, after `init`.
+        """
+        self.update_buffer = UpdateBuffer(
+            self.update_events,
+            max_batch=max_batch,
+            max_delay=max_delay,
+        )
+        self.update_buffer.start()
 
     def get_collection(self, name: str) -> AsyncIOMotorCollection:
         """
-        Return a collection by event_type. If it doesn't exist, Mongo
+        Return a collection by event_type, with the write concern of its
+        write policy if one is configured. If it doesn't exist, Mongo
         will create it on first insert.
         """
-        return self.db[name]
+        policy = self.write_policies.get(name)
+        if policy is None:
+            return self.db[name]
+        return self.db.get_collection(name, write_concern=WRITE_CONCERNS[policy])
+
+    def write_tier(self, name: str) -> str:
+        """
+        Return the write policy of an event_type, or DEFAULT_TIER.
+        """
+        return self.write_policies.get(name, DEFAULT_TIER)
+
+    def is_unacknowledged(self, name: str) -> bool:
+        """
+        Return whether inserts of an event_type are not acknowledged, i.e.
+        return as soon as the document is handed to the driver.
+        """
+        return self.write_policies.get(name) == "unacknowledged"
+
+    async def ensure_collection(self, name: str) -> AsyncIOMotorCollection:
+        """
+        Return a collection by event_type, making sure it exists with the
+        configured kind and its indexes the first time it is touched in
+        this process.
+        """
+        if name not in self._timeseries_kinds and self.timeseries is not None:
+            await create_timeseries_collection(self.db, name, self.timeseries)
+
+        timeseries = await self.is_timeseries(name)
+        if timeseries and not self._enrichment_indexed:
+            await self.get_enrichment_collection().create_index(
+                [("event_type", ASCENDING), ("event_id", ASCENDING)],
+                name="event_type_event_id_unique",
+                unique=True,
+            )
+            self._enrichment_indexed = True
+
+        await self.indexes.ensure(name, timeseries=timeseries)
+        self.registry.add(name)
+        return self.get_collection(name)
+
+    async def is_timeseries(self, name: str) -> bool:
+        """
+        Return whether events of type `name` are stored in a time-series
+        collection. Looked up once per process; a collection migrated while
+        the process runs is only picked up after a restart.
+        """
+        if name not in self._timeseries_kinds:
+            kind = await is_timeseries_collection(self.db, name)
+            if kind is None and self.timeseries is not None:
+                # Not created yet, `ensure_collection` will create it as
+                # time-series.
+                return False
+            self._timeseries_kinds[name] = bool(kind)
+        return self._timeseries_kinds[name]
+
+    async def collection_exists(self, name: str) -> bool:
+        """
+        Return whether events of type `name` were ever stored.
+        """
+        return await self.registry.exists(name)
+
+    async def event_types(self) -> list[str]:
+        """
+        Return the names of all event types, sorted.
+        """
+        return sorted(await self.registry.names())
+
+    def get_internal_collection(self, name: str) -> AsyncIOMotorCollection:
+        """
+        Return a service-internal collection by name.
+        """
+        return self.internal_db[name]
+
+    def get_enrichment_collection(self) -> AsyncIOMotorCollection:
+        """
+        Return the collection holding fields set after ingest (extraction
+        results) on events stored in time-series collections, keyed by
+        `event_type` and `event_id`.
+        """
+        return self.internal_db["event_enrichment"]
+
+    async def modification_version(self, name: str) -> int:
+        """
+        Return a counter of the updates made to stored events of type `name`
+        after ingest (by any process), which changes whenever `update_event`
+        or `update_events` wrote to them. Inserts do not change it.
+        """
+        doc = await self.internal_db["event_versions"].find_one({"_id": name})
+        return doc["version"] if doc else 0
+
+    async def _bump_modification_version(self, name: str) -> None:
+        await self.internal_db["event_versions"].update_one(
+            {"_id": name},
+            {"$inc": {"version": 1}},
+            upsert=True,
+        )
+        for listener in self.update_listeners:
+            listener(name)
+
+    async def update_event(
+        self,
+        name: str,
+        event_id: str,
+        fields: dict[str, Any],
+    ) -> bool:
+        """
+        Set fields on a stored event. Events in time-series collections are
+        not updated in place, the fields are upserted into the enrichment
+        collection instead and merged back by `enrich_events`.
+        Every write bumps `modification_version` of the event type.
+        Returns whether anything changed. When the update buffer is enabled
+        the update is written with others in a bulk write, which does not
+        report changes per event; it then returns True once written.
+        """
+        if self.update_buffer is not None:
+            await self.update_buffer.update(name, event_id, fields)
+            return True
+
+        if await self.is_timeseries(name):
+            result = await self.get_enrichment_collection().update_one(
+                {"event_type": name, "event_id": event_id},
+                {"$set": fields},
+                upsert=True,
+            )
+            updated = result.modified_count > 0 or result.upserted_id is not None
+        else:
+            result = await self.db[name].update_one(
+                {"event_id": event_id},
+                {"$set": fields},
+            )
+            updated = result.modified_count > 0
+
+        if updated:
+            await self._bump_modification_version(name)
+        return updated
+
+    async def update_events(
+        self,
+        name: str,
+        updates: list[tuple[str, dict[str, Any]]],
+    ) -> None:
+        """
+        Set fields on many stored events of one type, as (event_id, fields)
+        pairs, in a single unordered bulk write (see `update_event`).
+        """
+        if not updates:
+            return
+
+        if await self.is_timeseries(name):
+            coll = self.get_enrichment_collection()
+            operations = [
+                UpdateOne(
+                    {"event_type": name, "event_id": event_id},
+                    {"$set": fields},
+                    upsert=True,
+                )
+                for event_id, fields in updates
+            ]
+        else:
+            coll = self.db[name]
+            operations = [
+                UpdateOne({"event_id": event_id}, {"$set": fields})
+                for event_id, fields in updates
+            ]
+
+        try:
+            await coll.bulk_write(operations, ordered=False)
+        finally:
+            # Unordered writes apply the operations that did not fail
+            await self._bump_modification_version(name)
+
+    async def enrich_events(
+        self,
+        name: str,
+        docs: list[dict[str, Any]],
+        *,
+        fields: list[str] | None = None,
+    ) -> None:
+        """
+        Merge the enrichment of events read from a time-series collection
+        into the documents, in place. No-op for regular collections.
+        With `fields` (a projected read) only those fields are merged and
+        `event_id`, needed for the lookup, is removed again unless listed.
+        """
+        if not docs or not await self.is_timeseries(name):
+            return
+
+        projection: dict[str, int] = {"_id": 0, "event_type": 0}
+        if fields:
+            projection = {"_id": 0, "event_id": 1, **dict.fromkeys(fields, 1)}
+
+        event_ids = [doc["event_id"] for doc in docs if doc.get("event_id")]
+        cursor = self.get_enrichment_collection().find(
+            {"event_type": name, "event_id": {"$in": event_ids}},
+            projection,
+        )
+        enrichment = {row.pop("event_id"): row async for row in cursor}
+
+        for doc in docs:
+            doc.update(enrichment.get(doc.get("event_id"), {}))
+            if fields and "event_id" not in fields:
+                doc.pop("event_id", None)
+
+    async def insert_event(
+        self,
+        name: str,
+        doc: dict[str, Any],
+        *,
+        wait: bool = True,
+    ) -> str:
+        """
+        Insert a document into the named collection and return its `_id`.
+        When the write-behind buffer is enabled the insert is coalesced with
+        others; `wait=False` then returns before the document is written.
+        The latency is recorded per write tier in `ingest_latency`.
+        """
+        coll = await self.ensure_collection(name)
+        start = time.perf_counter()
+        tier = self.write_tier(name)
+
+        if self.write_buffer is None:
+            result = await coll.insert_one(doc)
+            inserted_id = result.inserted_id
+        else:
+            inserted_id = await self.write_buffer.insert(name, doc, wait=wait)
+            if not wait:
+                tier = "buffered"
+
+        self.ingest_latency.setdefault(tier, LatencyStats()).record(
+            time.perf_counter() - start,
+        )
+        return str(inserted_id)
+
+    async def drain(self) -> None:
+        """
+        Flush any buffered writes and updates. Call before disconnecting.
+        """
+        if self.write_buffer is not None:
+            await self.write_buffer.drain()
+        if self.update_buffer is not None:
+            await self.update_buffer.drain()
 
     def disconnect(self) -> None:
         """
@@ -1,6 +1,10 @@
 from fastapi import Request
 
 from app.data.connection import Database
+from app.data.jobs import ExtractionJobQueue
+from app.data.rollups import RollupStore
+from app.extractors.worker import ExtractionWorkerPool
+from app.utils.response_cache import ResponseCache
 
 
 def get_db(request: Request) -> Database:
@@ -8,3 +12,31 @@ def get_db(request: Request) -> Database:
     Dependency to retrieve the Database instance from app.state.
     """
     return request.app.state.db
+
+
+def get_job_queue(request: Request) -> ExtractionJobQueue:
+    """
+    Dependency to retrieve the extraction job queue from app.state.
+    """
+    return request.app.state.job_queue
+
+
+def get_rollups(request: Request) -> RollupStore | None:
+    """
+    Dependency to retrieve the rollup store from app.state (None if disabled).
+    """
+    return request.app.state.rollups
+
+
+def get_extraction_pool(request: Request) -> ExtractionWorkerPool:
+    """
+    Dependency to retrieve this process' extraction worker pool from app.state.
+    """
+    return request.app.state.extraction_pool
+
+
+def get_response_cache(request: Request) -> ResponseCache:
+    """
+    Dependency to retrieve this process' event query response cache from app.state.
+    """
+    return request.app.state.response_cache
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Any
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEXES = [
+    IndexModel(
+        [("event_id", ASCENDING)],
+        name="event_id_unique",
+        unique=True,
+        partialFilterExpression={"event_id": {"$type": "string"}},
+    ),
+    IndexModel(
+        [("timestamp", DESCENDING), ("event_id", DESCENDING)],
+        name="timestamp_event_id_desc",
+    ),
+]
+
+# Time-series collections do not support unique indexes, so `event_id` is
+# only indexed there; duplicates are not rejected.
+TIMESERIES_INDEXES = [
+    IndexModel([("event_id", ASCENDING)], name="event_id"),
+    DEFAULT_INDEXES[1],
+]
+
+
+def parse_index_spec(spec: str) -> IndexModel:
+    """
+    Parses a declarative index spec: comma-separated dotted field paths,
+    each prefixed with '-' for a descending key, e.g. 'metadata.guildId,-timestamp'.
+    """
+    keys = []
+    for part in spec.split(","):
+        field = part.strip()
+        if not field:
+            continue
+        if field.startswith("-"):
+            keys.append((field[1:], DESCENDING))
+        else:
+            keys.append((field, ASCENDING))
+
+    if not keys:
+        raise ValueError(f"Empty index spec '{spec}'")
+
+    return IndexModel(keys)
+
+
+class IndexManager:
+    """
+    Makes sure every event_type collection has the default indexes (unique
+    `event_id`, descending `timestamp` + `event_id` for listing and keyset
+    pagination) plus the extra indexes declared for
+    its event type. Collections are checked once per process; `ensure` is
+    a set lookup afterwards. Time-series collections get a non-unique
+    `event_id` index instead.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        extra_indexes: dict[str, list[str]] | None = None,
+    ) -> None:
+        self.db = db
+        self.extra_indexes = {
+            event_type: [parse_index_spec(spec) for spec in specs]
+            for event_type, specs in (extra_indexes or {}).items()
+        }
+        self._ensured: set[str] = set()
+        self._lock = asyncio.Lock()
+
+    def index_models(
+        self,
+        event_type: str,
+        *,
+        timeseries: bool = False,
+    ) -> list[IndexModel]:
+        """
+        Returns the indexes declared for an event type.
+        """
+        defaults = TIMESERIES_INDEXES if timeseries else DEFAULT_INDEXES
+        return defaults + self.extra_indexes.get(event_type, [])
+
+    async def ensure(self, event_type: str, *, timeseries: bool = False) -> None:
+        """
+        Creates the declared indexes of a collection the first time it is
+        touched in this process. Failures are logged and not retried until
+        the next `rebuild`, so a bad index never fails ingestion.
+        """
+        if event_type in self._ensured:
+            return
+
+        async with self._lock:
+            if event_type in self._ensured:
+                return
+            try:
+                await self.db[event_type].create_indexes(
+                    self.index_models(event_type, timeseries=timeseries),
+                )
+            except Exception as e:
+                logger.warning(
+                    "Failed to create indexes for collection '%s': %s",
+                    event_type,
+                    e,
+                )
+            self._ensured.add(event_type)
+
+    async def describe(self, event_type: str) -> list[dict[str, Any]]:
+        """
+        Returns the indexes that exist on a collection, with their options.
+        """
+        information = await self.db[event_type].index_information()
+        return [{"name": name, **options} for name, options in information.items()]
+
+    async def rebuild(self, event_type: str, *, timeseries: bool = False) -> list[str]:
+        """
+        Drops every index of a collection (except `_id`) and creates the
+        declared ones again. Returns the names of the created indexes.
+        """
+        async with self._lock:
+            self._ensured.discard(event_type)
+            coll = self.db[event_type]
+            await coll.drop_indexes()
+            names = await coll.create_indexes(
+                self.index_models(event_type, timeseries=timeseries),
+            )
+            self._ensured.add(event_type)
+        return names
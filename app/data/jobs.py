@@ -0,0 +1,252 @@
+import random
+from datetime import UTC, datetime, timedelta
+from typing import Any, Literal, NamedTuple, TypedDict
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+
+type JobStatus = Literal["queued", "running", "done", "failed"]
+
+JOB_STATUSES: tuple[JobStatus, ...] = ("queued", "running", "done", "failed")
+
+
+class JobSpec(NamedTuple):
+    kind: str
+    event_type: str
+    event_id: str
+    data: dict[str, Any]
+    group_key: str | None = None
+
+
+class ExtractionJob(TypedDict):
+    _id: ObjectId
+    kind: str
+    event_type: str
+    event_id: str
+    data: dict[str, Any]
+    group_key: str | None
+    status: JobStatus
+    attempts: int
+    available_at: datetime
+    lease_expires_at: datetime | None
+    worker_id: str | None
+    last_error: str | None
+    created_at: datetime
+    updated_at: datetime
+
+
+class ExtractionJobQueue:
+    """
+    Durable FAQ extraction job queue stored in a MongoDB collection.
+
+    Workers claim a job atomically with find_one_and_update, which hands them
+    a lease. A job whose lease expires (e.g. its worker died) becomes claimable
+    again. Failed jobs are retried with exponential backoff until
+    `max_attempts` is reached, after which they are marked as failed.
+    Finished jobs are removed by a TTL index after `retention_seconds`.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        *,
+        lease_seconds: int = 300,
+        max_attempts: int = 5,
+        backoff_base: float = 2.0,
+        backoff_max: float = 600.0,
+        retention_seconds: int = 7 * 24 * 3600,
+    ) -> None:
+        self.collection = collection
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retention_seconds = retention_seconds
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(
+            [
+                IndexModel([("status", ASCENDING), ("available_at", ASCENDING)]),
+                IndexModel(
+                    [
+                        ("group_key", ASCENDING),
+                        ("status", ASCENDING),
+                        ("available_at", ASCENDING),
+                    ],
+                ),
+                IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)]),
+                IndexModel([("event_type", ASCENDING), ("event_id", ASCENDING)]),
+                IndexModel(
+                    [("finished_at", ASCENDING)],
+                    expireAfterSeconds=self.retention_seconds,
+                ),
+            ],
+        )
+
+    @staticmethod
+    def _new_job(
+        spec: JobSpec,
+        now: datetime,
+        available_at: datetime,
+    ) -> dict[str, Any]:
+        return {
+            "kind": spec.kind,
+            "event_type": spec.event_type,
+            "event_id": spec.event_id,
+            "data": spec.data,
+            "group_key": spec.group_key,
+            "status": "queued",
+            "attempts": 0,
+            "available_at": available_at,
+            "lease_expires_at": None,
+            "worker_id": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    async def enqueue(self, spec: JobSpec, delay: float = 0.0) -> ObjectId:
+        """
+        Queue a single job, claimable after `delay` seconds, and return its id.
+        """
+        return (await self.enqueue_many([spec], delay))[0]
+
+    async def enqueue_many(
+        self,
+        specs: list[JobSpec],
+        delay: float = 0.0,
+    ) -> list[ObjectId]:
+        """
+        Queue several jobs with one insert, claimable after `delay` seconds.
+        A delay lets jobs sharing a `group_key` accumulate so workers can
+        claim and process them together.
+        """
+        if not specs:
+            return []
+
+        now = datetime.now(UTC)
+        available_at = now + timedelta(seconds=delay)
+        result = await self.collection.insert_many(
+            [self._new_job(spec, now, available_at) for spec in specs],
+            ordered=False,
+        )
+        return result.inserted_ids
+
+    def _lease_update(self, worker_id: str, now: datetime) -> dict[str, Any]:
+        return {
+            "$set": {
+                "status": "running",
+                "lease_expires_at": now + self.lease,
+                "worker_id": worker_id,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        }
+
+    async def claim(self, worker_id: str) -> ExtractionJob | None:
+        """
+        Atomically lease the oldest available job, or return None if there is none.
+        """
+        now = datetime.now(UTC)
+        return await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "available_at": {"$lte": now}},
+                    {"status": "running", "lease_expires_at": {"$lte": now}},
+                ],
+            },
+            self._lease_update(worker_id, now),
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def claim_group(
+        self,
+        worker_id: str,
+        group_key: str,
+        limit: int,
+    ) -> list[ExtractionJob]:
+        """
+        Lease up to `limit` more available jobs sharing `group_key`,
+        to be processed together with one already claimed.
+        """
+        jobs: list[ExtractionJob] = []
+        now = datetime.now(UTC)
+
+        while len(jobs) < limit:
+            job = await self.collection.find_one_and_update(
+                {
+                    "group_key": group_key,
+                    "status": "queued",
+                    "available_at": {"$lte": now},
+                },
+                self._lease_update(worker_id, now),
+                sort=[("available_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if job is None:
+                break
+            jobs.append(job)
+
+        return jobs
+
+    async def complete(self, job: ExtractionJob) -> None:
+        now = datetime.now(UTC)
+        await self.collection.update_one(
+            {"_id": job["_id"], "worker_id": job["worker_id"]},
+            {
+                "$set": {
+                    "status": "done",
+                    "lease_expires_at": None,
+                    "updated_at": now,
+                    "finished_at": now,
+                },
+            },
+        )
+
+    def backoff_delay(self, attempts: int) -> float:
+        """
+        Exponential backoff with jitter for the given attempt number.
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** max(attempts - 1, 0))
+        return random.uniform(ceiling / 2, ceiling)  # noqa: S311
+
+    async def fail(self, job: ExtractionJob, error: str) -> bool:
+        """
+        Record a failed attempt. Returns True if the job will be retried,
+        False if it ran out of attempts and was marked as failed.
+        """
+        now = datetime.now(UTC)
+        retry = job["attempts"] < self.max_attempts
+
+        update: dict[str, Any] = {
+            "lease_expires_at": None,
+            "last_error": error[:1000],
+            "updated_at": now,
+        }
+        if retry:
+            update["status"] = "queued"
+            update["available_at"] = now + timedelta(
+                seconds=self.backoff_delay(job["attempts"]),
+            )
+        else:
+            update["status"] = "failed"
+            update["finished_at"] = now
+
+        await self.collection.update_one(
+            {"_id": job["_id"], "worker_id": job["worker_id"]},
+            {"$set": update},
+        )
+        return retry
+
+    async def depth(self) -> dict[str, int]:
+        """
+        Number of jobs per status.
+        """
+        counts: dict[str, int] = dict.fromkeys(JOB_STATUSES, 0)
+        async for row in self.collection.aggregate(
+            [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+        ):
+            counts[row["_id"]] = row["count"]
+        return counts
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import TypedDict
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DESCENDING
+from pymongo.errors import OperationFailure
+
+from app.data.timeseries import MIGRATION_SOURCE_SUFFIX
+
+# Minimum time between catalog refreshes triggered by lookups of unknown
+# event types, so polling a missing type cannot hammer the catalog.
+MISS_REFRESH_SECONDS = 1.0
+
+
+class EventTypeStats(TypedDict):
+    event_type: str
+    count: int
+    last_seen: datetime | None
+
+
+class CollectionRegistry:
+    """
+    Keeps the set of event types (collections of the events database) in
+    memory, so existence checks do not need a catalog round trip. The set is
+    refreshed from `list_collection_names` every `ttl_seconds`, when an
+    unknown event type is looked up (at most every MISS_REFRESH_SECONDS) and
+    updated directly when this process creates a collection. Collections
+    created by other processes show up within `ttl_seconds`.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, ttl_seconds: float) -> None:
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self._names: set[str] = set()
+        self._refreshed_at: float | None = None
+        self._stats: list[EventTypeStats] = []
+        self._stats_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def _age(self, since: float | None) -> float:
+        return float("inf") if since is None else time.monotonic() - since
+
+    async def refresh(self) -> None:
+        """
+        Reloads the event types from the catalog. Internal collections
+        (`system.*`, e.g. time-series buckets) and the sources of time-series
+        migrations are not event types.
+        """
+        names = await self.db.list_collection_names()
+        self._names = {
+            name
+            for name in names
+            if not name.startswith("system.")
+            and not name.endswith(MIGRATION_SOURCE_SUFFIX)
+        }
+        self._refreshed_at = time.monotonic()
+
+    def cached_names(self) -> set[str]:
+        """
+        Returns the event types as last loaded, without refreshing them.
+        """
+        return self._names
+
+    async def names(self) -> set[str]:
+        """
+        Returns the known event types, refreshed if older than the TTL.
+        """
+        if self._age(self._refreshed_at) >= self.ttl_seconds:
+            async with self._lock:
+                if self._age(self._refreshed_at) >= self.ttl_seconds:
+                    await self.refresh()
+        return self._names
+
+    async def exists(self, name: str) -> bool:
+        """
+        Returns whether events of type `name` were ever stored.
+        """
+        if name in await self.names():
+            return True
+
+        if self._age(self._refreshed_at) >= MISS_REFRESH_SECONDS:
+            async with self._lock:
+                if self._age(self._refreshed_at) >= MISS_REFRESH_SECONDS:
+                    await self.refresh()
+        return name in self._names
+
+    def add(self, name: str) -> None:
+        """
+        Records an event type whose collection this process created.
+        """
+        if name not in self._names:
+            self._names.add(name)
+            self._stats_at = None
+
+    async def _collection_stats(self, name: str) -> EventTypeStats:
+        coll = self.db[name]
+        try:
+            count = await coll.estimated_document_count()
+        except OperationFailure:
+            # Not supported on time-series collections by older servers
+            count = await coll.count_documents({})
+
+        newest = await coll.find_one(
+            {},
+            {"_id": 0, "timestamp": 1},
+            sort=[("timestamp", DESCENDING)],
+        )
+        return EventTypeStats(
+            event_type=name,
+            count=count,
+            last_seen=newest.get("timestamp") if newest else None,
+        )
+
+    async def stats(self) -> list[EventTypeStats]:
+        """
+        Returns the approximate number of events and the newest event
+        timestamp of every event type, sorted by name and cached for the TTL.
+        """
+        if self._age(self._stats_at) >= self.ttl_seconds:
+            names = sorted(await self.names())
+            self._stats = list(
+                await asyncio.gather(*(self._collection_stats(name) for name in names)),
+            )
+            self._stats_at = time.monotonic()
+        return self._stats
@@ -0,0 +1,445 @@
+import asyncio
+import contextlib
+import logging
+from collections import Counter
+from collections.abc import Hashable
+from datetime import UTC, datetime, timedelta
+from typing import Any, Literal, NamedTuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DeleteMany, IndexModel, InsertOne, UpdateOne
+
+from app.data.aggregations import count_over_time_pipeline, values_over_time_pipeline
+from app.utils.export import get_field
+
+logger = logging.getLogger(__name__)
+
+type Granularity = Literal["hour", "day"]
+type RollupKey = tuple[str, Granularity, datetime, str, Hashable]
+
+GRANULARITIES: dict[Granularity, timedelta] = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Dimension name of the documents counting all events of a bucket
+TOTAL_DIMENSION = ""
+
+
+def floor_time(timestamp: datetime, granularity: Granularity) -> datetime:
+    """
+    Start of the UTC hour or day containing `timestamp`.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    timestamp = timestamp.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+
+def ceil_time(timestamp: datetime, granularity: Granularity) -> datetime:
+    """
+    Start of the first UTC hour or day at or after `timestamp`.
+    """
+    floored = floor_time(timestamp, granularity)
+    if floored == timestamp:
+        return floored
+    return floored + GRANULARITIES[granularity]
+
+
+class RawRange(NamedTuple):
+    start: datetime | None
+    end: datetime | None
+    end_exclusive: bool
+
+
+class RollupPlan(NamedTuple):
+    """
+    How to answer a query over [start, end]: `rollup` is the bucket-aligned
+    half-open range read from rollups (None if unused), `raw` the ranges
+    that have to be aggregated from raw events.
+    """
+
+    rollup: tuple[datetime, datetime | None] | None
+    raw: list[RawRange]
+
+
+def plan_rollup_query(
+    start_time: datetime | None,
+    end_time: datetime | None,
+    complete_from: datetime | None,
+    granularity: Granularity,
+) -> RollupPlan:
+    """
+    Splits a query range into the part covered by complete rollup buckets
+    and the parts (unaligned edges, history before `complete_from`) that
+    must be read from raw events.
+    """
+    everything_raw = RollupPlan(None, [RawRange(start_time, end_time, False)])
+    if complete_from is None:
+        return everything_raw
+
+    rollup_start = complete_from
+    if start_time is not None:
+        rollup_start = max(rollup_start, ceil_time(start_time, granularity))
+    rollup_end = floor_time(end_time, granularity) if end_time is not None else None
+    if rollup_end is not None and rollup_start >= rollup_end:
+        return everything_raw
+
+    raw = []
+    if start_time is None or start_time < rollup_start:
+        raw.append(RawRange(start_time, rollup_start, True))
+    if end_time is not None:
+        raw.append(RawRange(rollup_end, end_time, False))
+
+    return RollupPlan((rollup_start, rollup_end), raw)
+
+
+class RollupStore:
+    """
+    Hourly and daily event counts per event_type, in total and per value of
+    the dimensions configured for the event type (dotted field paths).
+
+    Ingest calls `record`, which only bumps an in-memory counter; a
+    background flusher `$inc`s the counters into the rollup collection every
+    `flush_interval` seconds with one unordered bulk write. The first flush
+    of an event type marks rollups as complete from the next UTC day on
+    (`complete_from`); `rebuild` recomputes the days before the current one
+    from raw events and moves `complete_from` back to the first event.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        state_collection: AsyncIOMotorCollection,
+        dimensions: dict[str, list[str]] | None = None,
+        *,
+        flush_interval: float = 5.0,
+    ) -> None:
+        self.collection = collection
+        self.state_collection = state_collection
+        self.dimensions = dimensions or {}
+        self.flush_interval = flush_interval
+
+        self._counts: Counter[RollupKey] = Counter()
+        self._tracked: set[str] = set()
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(
+            [
+                IndexModel(
+                    [
+                        ("event_type", ASCENDING),
+                        ("granularity", ASCENDING),
+                        ("dimension", ASCENDING),
+                        ("bucket", ASCENDING),
+                        ("value", ASCENDING),
+                    ],
+                    unique=True,
+                ),
+            ],
+        )
+
+    def dimensions_for(self, event_type: str) -> list[str]:
+        return self.dimensions.get(event_type, [])
+
+    def record(self, event_type: str, doc: dict[str, Any]) -> None:
+        """
+        Counts a stored event towards its rollup buckets. Values that are
+        missing, objects or arrays are not counted for their dimension.
+        """
+        timestamp = doc.get("timestamp")
+        if not isinstance(timestamp, datetime):
+            return
+
+        values: list[tuple[str, Hashable]] = [(TOTAL_DIMENSION, None)]
+        for dimension in self.dimensions_for(event_type):
+            value = get_field(doc, dimension)
+            if value is not None and isinstance(value, Hashable):
+                values.append((dimension, value))
+
+        for granularity in GRANULARITIES:
+            bucket = floor_time(timestamp, granularity)
+            for dimension, value in values:
+                self._counts[(event_type, granularity, bucket, dimension, value)] += 1
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the flusher and writes the remaining counters.
+        """
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            await self.flush()
+
+    async def _track(self, event_type: str) -> None:
+        """
+        Marks rollups of an event type as complete from the next UTC day on,
+        unless it is already tracked.
+        """
+        if event_type in self._tracked:
+            return
+        await self.state_collection.update_one(
+            {"_id": event_type},
+            {
+                "$setOnInsert": {
+                    "complete_from": ceil_time(datetime.now(UTC), "day"),
+                },
+            },
+            upsert=True,
+        )
+        self._tracked.add(event_type)
+
+    async def flush(self) -> None:
+        """
+        Writes the accumulated counters with one unordered bulk write.
+        On failure the counters are kept for the next flush.
+        """
+        if not self._counts:
+            return
+
+        counts, self._counts = self._counts, Counter()
+        try:
+            for event_type in {key[0] for key in counts}:
+                await self._track(event_type)
+            await self.collection.bulk_write(
+                [
+                    UpdateOne(
+                        {
+                            "event_type": event_type,
+                            "granularity": granularity,
+                            "dimension": dimension,
+                            "bucket": bucket,
+                            "value": value,
+                        },
+                        {"$inc": {"count": count}},
+                        upsert=True,
+                    )
+                    for (event_type, granularity, bucket, dimension, value), count in (
+                        counts.items()
+                    )
+                ],
+                ordered=False,
+            )
+        except Exception as e:
+            logger.warning("Failed to flush %d rollup counters: %s", len(counts), e)
+            self._counts.update(counts)
+
+    async def complete_from(self, event_type: str) -> datetime | None:
+        """
+        Start of the range for which the rollups of an event type are
+        complete, None if the event type has no rollups.
+        """
+        state = await self.state_collection.find_one({"_id": event_type})
+        if state is None:
+            return None
+        return state["complete_from"].replace(tzinfo=UTC)
+
+    async def counts(
+        self,
+        event_type: str,
+        granularity: Granularity,
+        start: datetime,
+        end: datetime | None,
+    ) -> dict[datetime, int]:
+        """
+        Event counts per bucket in the half-open range [start, end).
+        """
+        bucket_filter: dict[str, Any] = {"$gte": start}
+        if end is not None:
+            bucket_filter["$lt"] = end
+
+        cursor = self.collection.find(
+            {
+                "event_type": event_type,
+                "granularity": granularity,
+                "dimension": TOTAL_DIMENSION,
+                "bucket": bucket_filter,
+            },
+            {"_id": 0, "bucket": 1, "count": 1},
+        )
+        return {doc["bucket"].replace(tzinfo=UTC): doc["count"] async for doc in cursor}
+
+    async def top_values(
+        self,
+        event_type: str,
+        dimension: str,
+        start: datetime,
+        end: datetime | None,
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        """
+        The `limit` most frequent values of a dimension in the half-open range
+        [start, end), read from the daily rollups.
+        """
+        bucket_filter: dict[str, Any] = {"$gte": start}
+        if end is not None:
+            bucket_filter["$lt"] = end
+
+        cursor = self.collection.aggregate(
+            [
+                {
+                    "$match": {
+                        "event_type": event_type,
+                        "granularity": "day",
+                        "dimension": dimension,
+                        "bucket": bucket_filter,
+                    },
+                },
+                {"$group": {"_id": "$value", "count": {"$sum": "$count"}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": limit},
+            ],
+            allowDiskUse=True,
+        )
+        return await cursor.to_list(length=None)
+
+    async def _rebuild_shard(
+        self,
+        events: AsyncIOMotorCollection,
+        event_type: str,
+        start: datetime,
+        end: datetime,
+    ) -> int:
+        """
+        Recomputes all rollup documents of the whole UTC days in [start, end)
+        from raw events and replaces the stored ones. Returns the number of
+        events in the shard.
+        """
+        hourly: Counter[tuple[datetime, str, Hashable]] = Counter()
+
+        hours = int((end - start) / GRANULARITIES["hour"])
+        totals = events.aggregate(
+            count_over_time_pipeline("hour", start, end, hours, end_exclusive=True),
+            allowDiskUse=True,
+        )
+        async for row in totals:
+            hourly[(row["_id"].replace(tzinfo=UTC), TOTAL_DIMENSION, None)] += row[
+                "count"
+            ]
+
+        for dimension in self.dimensions_for(event_type):
+            values = events.aggregate(
+                values_over_time_pipeline(dimension, "hour", start, end),
+                allowDiskUse=True,
+            )
+            async for row in values:
+                value = row["_id"]["value"]
+                if isinstance(value, dict | list):
+                    continue
+                bucket = row["_id"]["bucket"].replace(tzinfo=UTC)
+                hourly[(bucket, dimension, value)] += row["count"]
+
+        daily: Counter[tuple[datetime, str, Hashable]] = Counter()
+        for (bucket, dimension, value), count in hourly.items():
+            daily[(floor_time(bucket, "day"), dimension, value)] += count
+
+        operations: list[DeleteMany | InsertOne] = [
+            DeleteMany(
+                {"event_type": event_type, "bucket": {"$gte": start, "$lt": end}},
+            ),
+        ]
+        for granularity, counter in (("hour", hourly), ("day", daily)):
+            operations.extend(
+                InsertOne(
+                    {
+                        "event_type": event_type,
+                        "granularity": granularity,
+                        "dimension": dimension,
+                        "bucket": bucket,
+                        "value": value,
+                        "count": count,
+                    },
+                )
+                for (bucket, dimension, value), count in counter.items()
+            )
+        await self.collection.bulk_write(operations, ordered=True)
+
+        return sum(
+            count
+            for (_, dimension, _), count in hourly.items()
+            if dimension == TOTAL_DIMENSION
+        )
+
+    async def rebuild(
+        self,
+        events: AsyncIOMotorCollection,
+        event_type: str,
+        *,
+        shard_days: int = 7,
+        concurrency: int = 4,
+    ) -> dict[str, int]:
+        """
+        Recomputes the rollups of an event type from its raw events, from the
+        first event up to the start of the current UTC day, in shards of
+        `shard_days` UTC days processed `concurrency` at a time. Afterwards
+        the rollups are complete from the first event on. Returns counts of
+        shards and events.
+
+        Buckets of the current day are never replaced, as live increments
+        still write to them. Raises RuntimeError if the rollups of the event
+        type are only complete from a later day on (tracking started today),
+        as the current day could not be rebuilt. Events ingested during a
+        rebuild with timestamps before the current day (backfills) may be
+        lost or counted twice.
+        """
+        first = await events.find_one(
+            {"timestamp": {"$type": "date"}},
+            {"timestamp": 1},
+            sort=[("timestamp", ASCENDING)],
+        )
+        if first is None:
+            return {"shards": 0, "events": 0}
+
+        await self._track(event_type)
+        complete_from = await self.complete_from(event_type)
+        if complete_from is None:
+            raise RuntimeError(f"Rollup state of '{event_type}' is missing")
+
+        cutoff = floor_time(datetime.now(UTC), "day")
+        if complete_from > cutoff:
+            raise RuntimeError(
+                f"Rollups of '{event_type}' are maintained since today; "
+                f"rebuild them on or after {complete_from:%Y-%m-%d}",
+            )
+
+        first_day = floor_time(first["timestamp"], "day")
+        start = first_day
+        shards = []
+        while start < cutoff:
+            end = min(start + timedelta(days=shard_days), cutoff)
+            shards.append((start, end))
+            start = end
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(shard_start: datetime, shard_end: datetime) -> int:
+            async with semaphore:
+                return await self._rebuild_shard(
+                    events,
+                    event_type,
+                    shard_start,
+                    shard_end,
+                )
+
+        counts = await asyncio.gather(*(run(s, e) for s, e in shards))
+
+        await self.state_collection.update_one(
+            {"_id": event_type},
+            {"$set": {"complete_from": min(first_day, complete_from)}},
+        )
+        return {"shards": len(shards), "events": sum(counts)}
@@ -0,0 +1,76 @@
+from typing import Any, Literal, NamedTuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+NAMESPACE_EXISTS = 48
+
+# Suffix of the collection an event collection is renamed to while it is
+# migrated to a time-series collection (app.tools.migrate_timeseries). It
+# holds a copy of the events, not an event type of its own.
+MIGRATION_SOURCE_SUFFIX = "__pre_timeseries"
+
+type TimeSeriesGranularity = Literal["seconds", "minutes", "hours"]
+
+# Fields written by FAQ extraction after ingest. Events in time-series
+# collections are not updated in place; these go to the enrichment collection.
+ENRICHMENT_FIELDS = (
+    "extraction_status",
+    "extraction_error",
+    "extracted_answer",
+    "identified_user_question",
+    "extraction_prompt_version",
+)
+
+
+class TimeSeriesOptions(NamedTuple):
+    granularity: TimeSeriesGranularity = "seconds"
+    retention: dict[str, int] = {}  # noqa: RUF012
+
+
+async def create_timeseries_collection(
+    db: AsyncIOMotorDatabase,
+    name: str,
+    options: TimeSeriesOptions,
+) -> bool:
+    """
+    Creates an event collection as a time-series collection with `timestamp`
+    as timeField and `metadata` as metaField, expiring events after the
+    retention configured for the event type (if any).
+    Returns False if the collection already exists.
+    """
+    kwargs: dict[str, Any] = {}
+    if name in options.retention:
+        kwargs["expireAfterSeconds"] = options.retention[name]
+
+    try:
+        await db.create_collection(
+            name,
+            timeseries={
+                "timeField": "timestamp",
+                "metaField": "metadata",
+                "granularity": options.granularity,
+            },
+            check_exists=True,
+            **kwargs,
+        )
+    except CollectionInvalid:
+        return False
+    except OperationFailure as exc:
+        # Created concurrently by another process.
+        if exc.code != NAMESPACE_EXISTS:
+            raise
+        return False
+    return True
+
+
+async def is_timeseries_collection(db: AsyncIOMotorDatabase, name: str) -> bool | None:
+    """
+    Returns whether a collection is a time-series collection, None if it
+    does not exist.
+    """
+    cursor = await db.list_collections(filter={"name": name})
+    infos = await cursor.to_list(length=1)
+    if not infos:
+        return None
+    return infos[0].get("type") == "timeseries"
@@ -0,0 +1,47 @@
+import statistics
+from collections import deque
+from typing import Literal
+
+from pymongo import WriteConcern
+
+type WritePolicy = Literal["unacknowledged", "acknowledged", "majority", "journaled"]
+
+WRITE_CONCERNS: dict[WritePolicy, WriteConcern] = {
+    "unacknowledged": WriteConcern(w=0),
+    "acknowledged": WriteConcern(w=1),
+    "majority": WriteConcern(w="majority"),
+    "journaled": WriteConcern(w=1, j=True),
+}
+
+# Tier of event types without a configured write policy (the client's
+# write concern, see MONGO_WRITE_CONCERN)
+DEFAULT_TIER = "default"
+
+
+class LatencyStats:
+    """
+    Latency of the inserts of one write tier: totals since start and
+    percentiles over the last `window` inserts.
+    """
+
+    def __init__(self, window: int = 1000) -> None:
+        self.count = 0
+        self.total_seconds = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self._recent.append(seconds)
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+    def percentile(self, percent: int) -> float:
+        """
+        Percentile (1-99) of the recent latencies, 0 if there are none.
+        """
+        if len(self._recent) < 2:
+            return self._recent[0] if self._recent else 0.0
+        return statistics.quantiles(self._recent, n=100)[percent - 1]
@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from collections import defaultdict
+from typing import Protocol, TypedDict
+
+import openai
+from openai.types.chat import ChatCompletionMessageParam
+from openai.types.chat.completion_create_params import ResponseFormat
+
+from app.data.connection import Database
+from app.extractors.core import (
+    BATCH_EXTRACTION_RESPONSE_FORMAT,
+    EXTRACTION_PROMPT_VERSION,
+    build_batch_extraction_messages,
+    parse_batch_extraction_response,
+)
+from app.extractors.llm import ChatClient, LLMCallError
+from app.utils.metrics import record_extraction_outcome
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchRequest(TypedDict):
+    custom_id: str
+    messages: list[ChatCompletionMessageParam]
+    model: str
+    max_tokens: int
+    response_format: ResponseFormat | None
+
+
+class PendingAnswer(TypedDict):
+    event_type: str
+    event_id: str
+    question: str
+    document_content: str
+
+
+class BatchBackend(Protocol):
+    async def submit(self, requests: list[BatchRequest]) -> str: ...
+
+    async def status(self, batch_id: str) -> str: ...
+
+    async def results(self, batch_id: str) -> dict[str, str | None]: ...
+
+
+class OpenAIBatchBackend:
+    def __init__(self, client: openai.AsyncOpenAI) -> None:
+        """
+        Submits requests through the OpenAI Batch API (results within 24h,
+        at a lower price than synchronous calls).
+        """
+        self.client = client
+
+    async def submit(self, requests: list[BatchRequest]) -> str:
+        lines = []
+        for request in requests:
+            body: dict = {
+                "model": request["model"],
+                "messages": request["messages"],
+                "temperature": 0.0,
+                "max_tokens": request["max_tokens"],
+            }
+            if request["response_format"] is not None:
+                body["response_format"] = request["response_format"]
+            lines.append(
+                json.dumps(
+                    {
+                        "custom_id": request["custom_id"],
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": body,
+                    },
+                    ensure_ascii=False,
+                ),
+            )
+
+        input_file = await self.client.files.create(
+            file=("faq-extraction.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        batch = await self.client.batches.retrieve(batch_id)
+        return batch.status
+
+    async def results(self, batch_id: str) -> dict[str, str | None]:
+        batch = await self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+
+        output = await self.client.files.content(batch.output_file_id)
+        results: dict[str, str | None] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            response = row.get("response") or {}
+            if response.get("status_code") != 200:
+                results[row["custom_id"]] = None
+                continue
+            results[row["custom_id"]] = response["body"]["choices"][0]["message"][
+                "content"
+            ]
+        return results
+
+
+class LocalBatchBackend:
+    def __init__(self, client: ChatClient, concurrency: int = 4) -> None:
+        """
+        Runs batch requests in-process through a chat client, so backfills
+        can be run (and tested offline with StubChatClient) without the Batch API.
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self._batches: dict[str, dict[str, str | None]] = {}
+
+    async def submit(self, requests: list[BatchRequest]) -> str:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(request: BatchRequest) -> str | None:
+            async with semaphore:
+                try:
+                    return await self.client.complete(
+                        request["messages"],
+                        request["model"],
+                        request["max_tokens"],
+                        response_format=request["response_format"],
+                    )
+                except Exception as e:
+                    logger.warning(
+                        "Local batch request %s failed: %s",
+                        request["custom_id"],
+                        e,
+                    )
+                    return None
+
+        outputs = await asyncio.gather(*(run(request) for request in requests))
+
+        batch_id = f"local-{uuid.uuid4()}"
+        self._batches[batch_id] = {
+            request["custom_id"]: output
+            for request, output in zip(requests, outputs, strict=True)
+        }
+        return batch_id
+
+    async def status(self, batch_id: str) -> str:
+        return "completed" if batch_id in self._batches else "failed"
+
+    async def results(self, batch_id: str) -> dict[str, str | None]:
+        return self._batches.get(batch_id, {})
+
+
+def build_batch_requests(
+    pending: list[PendingAnswer],
+    max_questions: int,
+    model_name: str = "gpt-4o-mini",
+) -> tuple[list[BatchRequest], dict[str, list[PendingAnswer]]]:
+    """
+    Groups pending answers by document into multi-question requests of at
+    most `max_questions` questions. Returns the requests and, per request
+    `custom_id`, the pending answers it covers (in question order).
+    """
+    by_document: defaultdict[str, list[PendingAnswer]] = defaultdict(list)
+    for item in pending:
+        key = hashlib.sha256(item["document_content"].encode("utf-8")).hexdigest()
+        by_document[key].append(item)
+
+    requests: list[BatchRequest] = []
+    covered: dict[str, list[PendingAnswer]] = {}
+    for key, items in by_document.items():
+        for offset in range(0, len(items), max_questions):
+            chunk = items[offset : offset + max_questions]
+            custom_id = f"{key[:16]}-{offset // max_questions}"
+            requests.append(
+                BatchRequest(
+                    custom_id=custom_id,
+                    messages=build_batch_extraction_messages(
+                        [item["question"] for item in chunk],
+                        chunk[0]["document_content"],
+                    ),
+                    model=model_name,
+                    max_tokens=256 * len(chunk),
+                    response_format=BATCH_EXTRACTION_RESPONSE_FORMAT,
+                ),
+            )
+            covered[custom_id] = chunk
+
+    return requests, covered
+
+
+async def run_batch_extraction(
+    db_connection: Database,
+    backend: BatchBackend,
+    pending: list[PendingAnswer],
+    max_questions: int = 8,
+    poll_interval: float = 30.0,
+) -> dict[str, int]:
+    """
+    Submits answer extraction for `pending` events as one batch, waits for
+    it to finish and writes the answers back with one bulk write per collection.
+    Returns counts of answered, unanswered and failed events.
+    """
+    counts = {"answered": 0, "unanswered": 0, "failed": 0}
+    if not pending:
+        return counts
+
+    requests, covered = build_batch_requests(pending, max_questions)
+    batch_id = await backend.submit(requests)
+    logger.info("Submitted %d requests as batch %s", len(requests), batch_id)
+
+    while True:
+        status = await backend.status(batch_id)
+        if status in TERMINAL_BATCH_STATUSES:
+            break
+        await asyncio.sleep(poll_interval)
+    logger.info("Batch %s finished with status '%s'", batch_id, status)
+
+    results = await backend.results(batch_id)
+    updates: defaultdict[str, list[tuple[str, dict[str, str]]]] = defaultdict(list)
+
+    for custom_id, items in covered.items():
+        if results.get(custom_id) is None:
+            counts["failed"] += len(items)
+            continue
+
+        try:
+            answers = parse_batch_extraction_response(results[custom_id], len(items))
+        except LLMCallError as e:
+            logger.warning("Unusable batch response for %s: %s", custom_id, e)
+            counts["failed"] += len(items)
+            continue
+
+        for item, answer in zip(items, answers, strict=True):
+            update_fields = {
+                "identified_user_question": item["question"],
+                "extraction_status": "answered" if answer is not None else "identified",
+                "extraction_prompt_version": EXTRACTION_PROMPT_VERSION,
+            }
+            if answer is not None:
+                update_fields["extracted_answer"] = answer
+                counts["answered"] += 1
+            else:
+                counts["unanswered"] += 1
+            updates[item["event_type"]].append((item["event_id"], update_fields))
+
+    for event_type, event_updates in updates.items():
+        await db_connection.update_events(event_type, event_updates)
+
+    record_extraction_outcome("answered", counts["answered"])
+    record_extraction_outcome("unanswered", counts["unanswered"])
+    return counts
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+type CachedResult = tuple[str | None, float]
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalizes a question for cache lookups, so questions differing only in
+    letter case or whitespace share an entry.
+    """
+    return " ".join(question.casefold().split())
+
+
+def make_cache_key(
+    system_prompt: str,
+    model_name: str,
+    question: str,
+    document_content: str,
+) -> str:
+    """
+    Content-addressed cache key of one LLM call.
+    """
+    material = json.dumps(
+        [system_prompt, model_name, normalize_question(question), document_content],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """
+    Two-tier cache of LLM results keyed by `make_cache_key`.
+
+    The first tier is an in-process LRU of at most `max_entries` results.
+    The second tier is an optional MongoDB collection (see `attach`) shared
+    by all processes, whose entries are removed by a TTL index.
+    Negative results (None, i.e. 'not found') are cached as well,
+    for `negative_ttl_seconds` instead of `ttl_seconds`.
+    Errors of the Mongo tier are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10000,
+        ttl_seconds: int = 30 * 24 * 3600,
+        negative_ttl_seconds: int = 24 * 3600,
+        enabled: bool = True,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.enabled = enabled
+        self.collection: AsyncIOMotorCollection | None = None
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+
+    def attach(self, collection: AsyncIOMotorCollection) -> None:
+        """
+        Enables the MongoDB tier.
+        """
+        self.collection = collection
+
+    async def ensure_indexes(self) -> None:
+        if self.collection is None:
+            return
+        await self.collection.create_indexes(
+            [IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)],
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, value: str | None, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> tuple[bool, str | None]:
+        """
+        Returns (True, result) on a hit and (False, None) on a miss.
+        """
+        if not self.enabled:
+            return False, None
+
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return True, value
+            del self._entries[key]
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one(
+                    {"_id": key, "expires_at": {"$gt": datetime.now(UTC)}},
+                )
+            except Exception as e:
+                logger.warning("LLM cache lookup failed: %s", e)
+                doc = None
+
+            if doc is not None:
+                expires_at = doc["expires_at"].replace(tzinfo=UTC).timestamp()
+                self._remember(key, doc.get("value"), expires_at)
+                self.mongo_hits += 1
+                return True, doc.get("value")
+
+        self.misses += 1
+        return False, None
+
+    async def set(self, key: str, value: str | None) -> None:
+        """
+        Stores a result in both tiers. None is stored as a negative result.
+        """
+        if not self.enabled:
+            return
+
+        ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+        now = datetime.now(UTC)
+        self._remember(key, value, now.timestamp() + ttl)
+
+        if self.collection is None:
+            return
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {
+                    "$set": {
+                        "value": value,
+                        "created_at": now,
+                        "expires_at": now + timedelta(seconds=ttl),
+                    },
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning("LLM cache store failed: %s", e)
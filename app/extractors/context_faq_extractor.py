@@ -1,12 +1,18 @@
+import logging
 from typing import TypedDict
 
 from app.data.connection import Database
 from app.extractors.core import (
+    EXTRACTION_PROMPT_VERSION,
     DiscordMessage,
     extract_answer_from_llm,
     identify_relevant_message_with_llm,
 )
 from app.schemas.events import UsageEvent
+from app.utils.metrics import record_extraction_outcome
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 
 class FaqContextExtractionData(TypedDict):
@@ -16,6 +22,7 @@ class FaqContextExtractionData(TypedDict):
     document_content: str
 
 
+@traced("extraction.prepare_context")
 async def prepare_context_faq_data(
     event: UsageEvent,
 ) -> FaqContextExtractionData | None:
@@ -58,14 +65,17 @@ async def prepare_context_faq_data(
             )
 
     if not valid_messages:
-        print(
-            f"Warning: No valid messages in context for event {event.event_id} to identify question.",
+        logger.warning(
+            "No valid messages in context to identify the question",
+            extra={"event_id": event.event_id},
         )
         return None
 
+    keyword = event.payload.get("keyword")
     identified_question = await identify_relevant_message_with_llm(
         document_content=document_content,
         message_context=valid_messages,
+        keyword=keyword if isinstance(keyword, str) else None,
     )
 
     if not identified_question:
@@ -79,16 +89,18 @@ async def prepare_context_faq_data(
     )
 
 
+@traced("extraction.context")
 async def perform_context_faq_extraction_and_update(
     db_connection: Database,
     data: FaqContextExtractionData,
 ) -> None:
     """
     Performs LLM answer extraction and updates MongoDB for contextual FAQ events.
+    Errors are re-raised so the extraction worker can retry the job.
     """
-    print(
-        f"Background task (Contextual FAQ): Starting answer extraction for event {data['event_id']} "
-        f"and identified question: '{data['identified_question'][:50]}...'",
+    logger.info(
+        "Starting answer extraction for identified question '%.50s'",
+        data["identified_question"],
     )
     extracted_answer = await extract_answer_from_llm(
         question=data["identified_question"],
@@ -99,28 +111,27 @@ async def perform_context_faq_extraction_and_update(
     if extracted_answer is not None:
         update_fields["extracted_answer"] = extracted_answer
     update_fields["identified_user_question"] = data["identified_question"]
+    update_fields["extraction_status"] = (
+        "answered" if extracted_answer is not None else "identified"
+    )
+    update_fields["extraction_prompt_version"] = EXTRACTION_PROMPT_VERSION
 
     if update_fields:
         try:
-            coll = db_connection.get_collection(data["event_type"])
-            result = await coll.update_one(
-                {"event_id": data["event_id"]},
-                {"$set": update_fields},
+            updated = await db_connection.update_event(
+                data["event_type"],
+                data["event_id"],
+                update_fields,
             )
-            if result.modified_count > 0:
-                print(
-                    f"Background task (Contextual FAQ): Successfully updated event {data['event_id']} "
-                    f"with answer and identified question.",
-                )
+            if updated:
+                logger.info("Updated event with answer and identified question")
             else:
-                print(
-                    f"Background task (Contextual FAQ): Event {data['event_id']} not found or no change after extraction.",
-                )
+                logger.warning("Event not found or no change after extraction")
         except Exception as e:
-            print(
-                f"Background task (Contextual FAQ): Error updating event {data['event_id']} in MongoDB: {e}",
-            )
-    else:
-        print(
-            f"Background task (Contextual FAQ): No answer extracted and no question identified for event {data['event_id']}.",
+            logger.warning("Error updating event in MongoDB: %s", e)
+            raise
+        record_extraction_outcome(
+            "answered" if extracted_answer is not None else "unanswered",
         )
+    else:
+        logger.info("No answer extracted and no question identified")
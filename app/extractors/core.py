@@ -1,3 +1,6 @@
+import hashlib
+import json
+import logging
 from typing import TypedDict
 
 import openai
@@ -5,11 +8,25 @@ from openai.types.chat import (
     ChatCompletionMessageParam,
     ChatCompletionSystemMessageParam,
 )
+from openai.types.chat.completion_create_params import ResponseFormat
 
+from app.extractors.cache import LLMResultCache, make_cache_key
+from app.extractors.llm import ChatClient, LLMCallError, make_chat_client
+from app.extractors.prefilter import rank_messages
+from app.utils.metrics import QUESTION_PREFILTER_DECISIONS
 from app.utils.settings import Settings
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 settings = Settings()
-openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+chat_client = make_chat_client(settings)
+result_cache = LLMResultCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.LLM_CACHE_NEGATIVE_TTL_SECONDS,
+    enabled=settings.LLM_CACHE_ENABLED,
+)
 
 EXTRACTION_SYSTEM_PROMPT: ChatCompletionSystemMessageParam = {
     "role": "system",
@@ -23,6 +40,49 @@ EXTRACTION_SYSTEM_PROMPT: ChatCompletionSystemMessageParam = {
     ),
 }
 
+NOT_FOUND_ANSWER = "Не е пронајдено"
+
+BATCH_EXTRACTION_SYSTEM_PROMPT: ChatCompletionSystemMessageParam = {
+    "role": "system",
+    "content": (
+        "Ти си искусен асистент чија единствена задача е да пронајде "
+        "директни одговори на дадените нумерирани прашања во дадениот текст. "
+        "Секој одговор мора да биде *точен извадок* од текстот, без никакво сумирање, "
+        "преформулирање или додавање дополнителни информации. "
+        "Ако одговорот на некое прашање не е експлицитно присутен во текстот, "
+        "за тоа прашање одговори со 'Не е пронајдено'. "
+        "За секое прашање врати го неговиот реден број и одговорот. "
+        "Одговорите секогаш врати ги на македонски јазик."
+    ),
+}
+
+BATCH_EXTRACTION_RESPONSE_FORMAT: ResponseFormat = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "faq_answers",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "answers": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "index": {"type": "integer"},
+                            "answer": {"type": "string"},
+                        },
+                        "required": ["index", "answer"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["answers"],
+            "additionalProperties": False,
+        },
+    },
+}
+
 IDENTIFY_QUESTION_SYSTEM_PROMPT: ChatCompletionSystemMessageParam = {
     "role": "system",
     "content": (
@@ -35,6 +95,27 @@ IDENTIFY_QUESTION_SYSTEM_PROMPT: ChatCompletionSystemMessageParam = {
     ),
 }
 
+# Single and batch extraction answers share cache entries, so their keys
+# depend on both prompts and a change of either one invalidates them
+ANSWER_CACHE_PROMPT = "\n".join(
+    str(prompt["content"])
+    for prompt in (EXTRACTION_SYSTEM_PROMPT, BATCH_EXTRACTION_SYSTEM_PROMPT)
+)
+
+
+# Recorded with every extraction result, so results of older prompts can be
+# found and re-extracted (see app.tools.reextract). Changes with any prompt.
+EXTRACTION_PROMPT_VERSION = hashlib.sha256(
+    "\n".join(
+        str(prompt["content"])
+        for prompt in (
+            EXTRACTION_SYSTEM_PROMPT,
+            BATCH_EXTRACTION_SYSTEM_PROMPT,
+            IDENTIFY_QUESTION_SYSTEM_PROMPT,
+        )
+    ).encode("utf-8"),
+).hexdigest()[:12]
+
 
 class DiscordMessage(TypedDict):
     authorId: str
@@ -43,19 +124,27 @@ class DiscordMessage(TypedDict):
     timestamp: str
 
 
+@traced("llm.extract_answer")
 async def extract_answer_from_llm(
     question: str,
     context: str,
     model_name: str = "gpt-4o-mini",
+    client: ChatClient | None = None,
 ) -> str | None:
     """
     Performs the actual LLM call to extract the answer from a document
-    given a direct question.
+    given a direct question. Results (including 'not found') are cached.
+    Raises LLMCallError if the call fails, so the caller can retry it.
     """
     if not question or not context:
-        print("Warning: Question or context is missing for LLM answer extraction.")
+        logger.warning("Question or context is missing for LLM answer extraction")
         return None
 
+    cache_key = make_cache_key(ANSWER_CACHE_PROMPT, model_name, question, context)
+    hit, cached_answer = await result_cache.get(cache_key)
+    if hit:
+        return cached_answer
+
     messages: list[ChatCompletionMessageParam] = [
         EXTRACTION_SYSTEM_PROMPT,
         {
@@ -65,48 +154,214 @@ async def extract_answer_from_llm(
     ]
 
     try:
-        chat_completion = await openai_client.chat.completions.create(
+        message_content = await (client or chat_client).complete(
+            messages,
             model=model_name,
-            messages=messages,
-            temperature=0.0,
             max_tokens=256,
         )
 
-        message_content = chat_completion.choices[0].message.content
-
         if message_content is None:
-            print("Warning: LLM returned None content for answer extraction.")
+            logger.warning("LLM returned no content for answer extraction")
             return None
 
-        answer = message_content.strip()
-
-        if answer == "Не е пронајдено":
-            return None
+        answer: str | None = message_content.strip()
+        if answer == NOT_FOUND_ANSWER:
+            answer = None
 
+        await result_cache.set(cache_key, answer)
         return answer  # noqa: TRY300
     except openai.APIError as e:
-        print(f"LLM Answer Extraction Call Error ({e.type}, {e.code}): {e.message}")
-        return None
+        logger.warning(
+            "LLM answer extraction call error (%s, %s): %s",
+            e.type,
+            e.code,
+            e.message,
+        )
+        raise LLMCallError(e.message) from e
     except Exception as e:
-        print(f"An unexpected error occurred during LLM answer extraction: {e}")
-        return None
+        logger.warning("Unexpected error during LLM answer extraction: %s", e)
+        raise LLMCallError(str(e)) from e
+
+
+def build_batch_extraction_messages(
+    questions: list[str],
+    context: str,
+) -> list[ChatCompletionMessageParam]:
+    """
+    Builds the prompt asking for the answers to several numbered questions
+    about one document, so the document is only sent once.
+    """
+    numbered_questions = "\n".join(
+        f"{index}. {question}" for index, question in enumerate(questions, start=1)
+    )
+    return [
+        BATCH_EXTRACTION_SYSTEM_PROMPT,
+        {
+            "role": "user",
+            "content": f"Текст: {context}\n\nПрашања:\n{numbered_questions}\n\nОдговори:",
+        },
+    ]
+
+
+def parse_batch_extraction_response(
+    content: str | None,
+    question_count: int,
+) -> list[str | None]:
+    """
+    Maps a structured multi-question response back to the questions, in order.
+    Questions without an answer (or answered with NOT_FOUND_ANSWER) map to None.
+    Raises LLMCallError if the response is not the expected JSON.
+    """
+    answers: list[str | None] = [None] * question_count
+    if content is None:
+        return answers
+
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise LLMCallError(f"Invalid structured extraction response: {e}") from e
+
+    for item in parsed.get("answers", []) if isinstance(parsed, dict) else []:
+        index = item.get("index")
+        answer = item.get("answer")
+        if not isinstance(index, int) or not 1 <= index <= question_count:
+            continue
+        if not isinstance(answer, str):
+            continue
+
+        answer = answer.strip()
+        if answer and answer != NOT_FOUND_ANSWER:
+            answers[index - 1] = answer
+
+    return answers
+
+
+@traced("llm.extract_answers")
+async def extract_answers_from_llm(
+    questions: list[str],
+    context: str,
+    model_name: str = "gpt-4o-mini",
+    client: ChatClient | None = None,
+) -> list[str | None]:
+    """
+    Extracts the answers to several questions about the same document with
+    a single structured-output LLM call. Returns one answer (or None) per question.
+    Answers are cached under the same keys as `extract_answer_from_llm`, and
+    only the questions missing from the cache are sent to the LLM.
+    Raises LLMCallError if the call fails, so the caller can retry it.
+    """
+    if not questions or not context:
+        logger.warning("Questions or context are missing for LLM batch extraction")
+        return [None] * len(questions)
+
+    answers: list[str | None] = [None] * len(questions)
+    cache_keys = [
+        make_cache_key(ANSWER_CACHE_PROMPT, model_name, question, context)
+        for question in questions
+    ]
+    missing: list[int] = []
+    for index, cache_key in enumerate(cache_keys):
+        hit, cached_answer = await result_cache.get(cache_key)
+        if hit:
+            answers[index] = cached_answer
+        else:
+            missing.append(index)
+
+    if not missing:
+        return answers
+
+    try:
+        message_content = await (client or chat_client).complete(
+            build_batch_extraction_messages(
+                [questions[index] for index in missing],
+                context,
+            ),
+            model=model_name,
+            max_tokens=256 * len(missing),
+            response_format=BATCH_EXTRACTION_RESPONSE_FORMAT,
+        )
+    except openai.APIError as e:
+        logger.warning(
+            "LLM batch extraction call error (%s, %s): %s",
+            e.type,
+            e.code,
+            e.message,
+        )
+        raise LLMCallError(e.message) from e
+    except Exception as e:
+        logger.warning("Unexpected error during LLM batch extraction: %s", e)
+        raise LLMCallError(str(e)) from e
 
+    extracted = parse_batch_extraction_response(message_content, len(missing))
+    for index, answer in zip(missing, extracted, strict=True):
+        answers[index] = answer
+        if message_content is not None:
+            await result_cache.set(cache_keys[index], answer)
 
+    return answers
+
+
+def prefilter_messages(
+    document_content: str,
+    message_context: list[DiscordMessage],
+    keyword: str | None = None,
+) -> list[DiscordMessage]:
+    """
+    Keeps the QUESTION_PREFILTER_TOP_K messages most similar to the document
+    that score at least QUESTION_PREFILTER_MIN_SCORE, in their original order.
+    """
+    scores = rank_messages(
+        document_content,
+        [msg.get("content", "") for msg in message_context],
+        keyword,
+    )
+    kept = sorted(
+        index
+        for index, score in scores[: settings.QUESTION_PREFILTER_TOP_K]
+        if score >= settings.QUESTION_PREFILTER_MIN_SCORE
+    )
+    if not kept:
+        decision = "skipped"
+    elif len(kept) < len(message_context):
+        decision = "trimmed"
+    else:
+        decision = "kept"
+    QUESTION_PREFILTER_DECISIONS.labels(decision=decision).inc()
+    return [message_context[index] for index in kept]
+
+
+@traced("llm.identify_question")
 async def identify_relevant_message_with_llm(
     document_content: str,
     message_context: list[DiscordMessage],
     model_name: str = "gpt-4o-mini",
+    client: ChatClient | None = None,
+    keyword: str | None = None,
 ) -> str | None:
     """
     Identifies the most relevant user message from a list of Discord messages
     that acts as a question for the given document content, using an LLM.
+    With QUESTION_PREFILTER_ENABLED, the messages are first ranked locally
+    by their similarity to the document and its `keyword`: only the top
+    QUESTION_PREFILTER_TOP_K are sent, and none (no LLM call) if all score
+    below QUESTION_PREFILTER_MIN_SCORE.
+    Results (including 'no relevant message') are cached.
+    Raises LLMCallError if the call fails, so the caller can retry it.
     """
     if not document_content or not message_context:
-        print(
-            "Warning: Document content or message context is missing for LLM question identification.",
+        logger.warning(
+            "Document content or message context is missing for LLM question identification",
         )
         return None
 
+    if settings.QUESTION_PREFILTER_ENABLED:
+        message_context = prefilter_messages(document_content, message_context, keyword)
+        if not message_context:
+            logger.info(
+                "No message is similar enough to the document, skipping the LLM",
+            )
+            return None
+
     formatted_messages = "\n".join(
         [
             f'- Порака: "{msg.get("content", "")}"'
@@ -116,11 +371,19 @@ async def identify_relevant_message_with_llm(
     )
 
     if not formatted_messages:
-        print(
-            "Warning: No valid messages found in context to process for LLM identification.",
-        )
+        logger.warning("No valid messages in context for LLM question identification")
         return None
 
+    cache_key = make_cache_key(
+        str(IDENTIFY_QUESTION_SYSTEM_PROMPT["content"]),
+        model_name,
+        formatted_messages,
+        document_content,
+    )
+    hit, cached_message = await result_cache.get(cache_key)
+    if hit:
+        return cached_message
+
     user_query = (
         f"Документ:\n{document_content}\n\n"
         f"Листа на пораки:\n{formatted_messages}\n\n"
@@ -133,28 +396,28 @@ async def identify_relevant_message_with_llm(
     ]
 
     try:
-        chat_completion = await openai_client.chat.completions.create(
+        identified_message = await (client or chat_client).complete(
+            messages,
             model=model_name,
-            messages=messages,
-            temperature=0.0,
             max_tokens=150,
         )
-
-        identified_message = chat_completion.choices[0].message.content
         if identified_message is None:
             return None
 
         identified_message = identified_message.strip()
-
         if identified_message == "Нема релевантна порака":
-            return None
+            identified_message = None
 
+        await result_cache.set(cache_key, identified_message)
         return identified_message  # noqa: TRY300
     except openai.APIError as e:
-        print(
-            f"LLM Question Identification Call Error ({e.type}, {e.code}): {e.message}",
+        logger.warning(
+            "LLM question identification call error (%s, %s): %s",
+            e.type,
+            e.code,
+            e.message,
         )
-        return None
+        raise LLMCallError(e.message) from e
     except Exception as e:
-        print(f"An unexpected error occurred during LLM question identification: {e}")
-        return None
+        logger.warning("Unexpected error during LLM question identification: %s", e)
+        raise LLMCallError(str(e)) from e
@@ -0,0 +1,119 @@
+import hashlib
+import logging
+from typing import Any, TypedDict
+
+from app.data.connection import Database
+from app.extractors.context_faq_extractor import (
+    perform_context_faq_extraction_and_update,
+    prepare_context_faq_data,
+)
+from app.extractors.core import EXTRACTION_PROMPT_VERSION
+from app.extractors.targeted_faq_extractor import (
+    perform_direct_faq_extraction_and_update,
+    prepare_direct_faq_data,
+)
+from app.schemas.events import UsageEvent
+from app.utils.metrics import record_extraction_outcome
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+class FaqEventExtractionData(TypedDict):
+    event_type: str
+    event_id: str
+    payload: dict[str, Any]
+
+
+def prepare_faq_event_data(event: UsageEvent) -> FaqEventExtractionData | None:
+    """
+    Returns the parts of an FAQ event needed to run the whole extraction
+    pipeline later in a worker, or None if it has no document to extract from.
+    """
+    if event.event_type != "faq" or not isinstance(event.payload, dict):
+        return None
+
+    document_content = event.payload.get("content")
+    if not isinstance(document_content, str) or not document_content:
+        return None
+
+    return FaqEventExtractionData(
+        event_type=event.event_type,
+        event_id=event.event_id or "",
+        payload=event.payload,
+    )
+
+
+def document_group_key(data: FaqEventExtractionData) -> str:
+    """
+    Key shared by all FAQ events about the same document, used to group
+    their extraction into one multi-question LLM call.
+    """
+    content = data["payload"]["content"]
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@traced("extraction.set_status")
+async def set_extraction_status(
+    db_connection: Database,
+    event_type: str,
+    event_id: str,
+    status: str,
+    **fields: Any,  # noqa: ANN401
+) -> None:
+    """
+    Records the extraction progress (and any extra fields) on the stored event.
+    """
+    await db_connection.update_event(
+        event_type,
+        event_id,
+        {"extraction_status": status, **fields},
+    )
+
+
+@traced("extraction.faq_event")
+async def perform_faq_event_extraction_and_update(
+    db_connection: Database,
+    data: FaqEventExtractionData,
+) -> None:
+    """
+    Runs the whole FAQ pipeline for one stored event as a single chained job:
+    direct extraction if it has a targetUserMessage, otherwise question
+    identification from context followed by answer extraction.
+    Errors are re-raised so the job can be retried.
+    """
+    event = UsageEvent(
+        event_type=data["event_type"],
+        event_id=data["event_id"],
+        payload=data["payload"],
+    )
+
+    direct_faq_data = prepare_direct_faq_data(event)
+    if direct_faq_data:
+        await perform_direct_faq_extraction_and_update(db_connection, direct_faq_data)
+        return
+
+    context_faq_data = await prepare_context_faq_data(event)
+    if context_faq_data:
+        await set_extraction_status(
+            db_connection,
+            data["event_type"],
+            data["event_id"],
+            "identified",
+            identified_user_question=context_faq_data["identified_question"],
+        )
+        await perform_context_faq_extraction_and_update(
+            db_connection,
+            context_faq_data,
+        )
+        return
+
+    logger.info("No direct question and no relevant message found, skipping extraction")
+    await set_extraction_status(
+        db_connection,
+        data["event_type"],
+        data["event_id"],
+        "skipped",
+        extraction_prompt_version=EXTRACTION_PROMPT_VERSION,
+    )
+    record_extraction_outcome("skipped")
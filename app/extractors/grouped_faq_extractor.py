@@ -0,0 +1,143 @@
+import asyncio
+import logging
+
+from app.data.connection import Database
+from app.extractors.context_faq_extractor import prepare_context_faq_data
+from app.extractors.core import EXTRACTION_PROMPT_VERSION, extract_answers_from_llm
+from app.extractors.faq_event_extractor import (
+    FaqEventExtractionData,
+    set_extraction_status,
+)
+from app.extractors.targeted_faq_extractor import prepare_direct_faq_data
+from app.schemas.events import UsageEvent
+from app.utils.log import event_id_var
+from app.utils.metrics import record_extraction_outcome
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+@traced("extraction.resolve_question")
+async def _resolve_question(
+    db_connection: Database,
+    data: FaqEventExtractionData,
+) -> str | None:
+    """
+    Returns the direct user question of an event, or identifies one from
+    its context with the LLM. Records 'identified'/'skipped' for context events.
+    """
+    # Runs in its own task (see gather below), so the id only tags this event
+    event_id_var.set(data["event_id"])
+    event = UsageEvent(
+        event_type=data["event_type"],
+        event_id=data["event_id"],
+        payload=data["payload"],
+    )
+
+    direct_faq_data = prepare_direct_faq_data(event)
+    if direct_faq_data:
+        return direct_faq_data["user_question"]
+
+    context_faq_data = await prepare_context_faq_data(event)
+    if context_faq_data:
+        await set_extraction_status(
+            db_connection,
+            data["event_type"],
+            data["event_id"],
+            "identified",
+            identified_user_question=context_faq_data["identified_question"],
+        )
+        return context_faq_data["identified_question"]
+
+    await set_extraction_status(
+        db_connection,
+        data["event_type"],
+        data["event_id"],
+        "skipped",
+        extraction_prompt_version=EXTRACTION_PROMPT_VERSION,
+    )
+    record_extraction_outcome("skipped")
+    return None
+
+
+@traced("extraction.grouped")
+async def perform_grouped_faq_extraction_and_update(
+    db_connection: Database,
+    items: list[FaqEventExtractionData],
+) -> list[Exception | None]:
+    """
+    Runs the FAQ pipeline for several events that share the same document.
+    Questions are resolved per event (direct message or LLM identification),
+    then all answers are extracted with one multi-question LLM call, so the
+    long document prompt is only sent once.
+    Returns the error of every event (None on success), in order.
+    """
+    outcomes: list[Exception | None] = [None] * len(items)
+
+    resolved = await asyncio.gather(
+        *(_resolve_question(db_connection, data) for data in items),
+        return_exceptions=True,
+    )
+
+    questions: list[tuple[int, str]] = []
+    for index, result in enumerate(resolved):
+        if isinstance(result, Exception):
+            outcomes[index] = result
+        elif isinstance(result, str):
+            questions.append((index, result))
+
+    if not questions:
+        return outcomes
+
+    logger.info(
+        "Extracting %d answers from one document with a single LLM call",
+        len(questions),
+    )
+    try:
+        answers = await extract_answers_from_llm(
+            questions=[question for _, question in questions],
+            context=items[questions[0][0]]["payload"]["content"],
+        )
+    except Exception as e:
+        for index, _ in questions:
+            outcomes[index] = e
+        return outcomes
+
+    updates: list[tuple[int, dict[str, str]]] = []
+    for (index, question), answer in zip(questions, answers, strict=True):
+        update_fields = {
+            "identified_user_question": question,
+            "extraction_status": "answered" if answer is not None else "identified",
+            "extraction_prompt_version": EXTRACTION_PROMPT_VERSION,
+        }
+        if answer is not None:
+            update_fields["extracted_answer"] = answer
+        updates.append((index, update_fields))
+
+    # Written concurrently, so the update buffer coalesces them into one bulk
+    # write instead of waiting for a flush per event
+    written = await asyncio.gather(
+        *(
+            db_connection.update_event(
+                items[index]["event_type"],
+                items[index]["event_id"],
+                update_fields,
+            )
+            for index, update_fields in updates
+        ),
+        return_exceptions=True,
+    )
+    for (index, update_fields), error in zip(updates, written, strict=True):
+        if isinstance(error, Exception):
+            logger.warning(
+                "Error updating event in MongoDB: %s",
+                error,
+                extra={"event_id": items[index]["event_id"]},
+            )
+            outcomes[index] = error
+        else:
+            record_extraction_outcome(
+                "answered" if "extracted_answer" in update_fields else "unanswered",
+            )
+
+    return outcomes
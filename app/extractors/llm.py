@@ -0,0 +1,223 @@
+import asyncio
+import json
+import re
+import time
+from typing import Protocol
+
+import openai
+from openai.types.chat import ChatCompletionMessageParam
+from openai.types.chat.completion_create_params import ResponseFormat
+
+from app.utils.metrics import LLM_CALL_LATENCY, LLM_TOKENS
+from app.utils.settings import Settings
+
+
+class LLMCallError(Exception):
+    """
+    Raised when a chat completion call fails. Callers running inside the
+    extraction worker pool let it propagate so the job is retried.
+    """
+
+
+class ChatClient(Protocol):
+    async def complete(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        model: str,
+        max_tokens: int,
+        response_format: ResponseFormat | None = None,
+    ) -> str | None: ...
+
+
+class OpenAIChatClient:
+    def __init__(self, api_key: str, timeout: float) -> None:
+        """
+        Chat client backed by the OpenAI API.
+        """
+        self.client = openai.AsyncOpenAI(api_key=api_key, timeout=timeout)
+
+    async def complete(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        model: str,
+        max_tokens: int,
+        response_format: ResponseFormat | None = None,
+    ) -> str | None:
+        chat_completion = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.0,
+            max_tokens=max_tokens,
+            response_format=response_format or openai.omit,
+        )
+        if chat_completion.usage is not None:
+            LLM_TOKENS.labels(model=model, kind="prompt").inc(
+                chat_completion.usage.prompt_tokens,
+            )
+            LLM_TOKENS.labels(model=model, kind="completion").inc(
+                chat_completion.usage.completion_tokens,
+            )
+        return chat_completion.choices[0].message.content
+
+
+QUOTED_MESSAGE_PATTERN = re.compile(r'^- Порака: "(.*)"$', re.MULTILINE)
+DOCUMENT_TEXT_PATTERN = re.compile(r"^Текст: (.+)$", re.MULTILINE)
+NUMBERED_QUESTION_PATTERN = re.compile(r"^(\d+)\. .*$", re.MULTILINE)
+
+
+class StubChatClient:
+    def __init__(self, latency: float = 0.0) -> None:
+        """
+        Offline stand-in for OpenAIChatClient, for tests and benchmarks.
+        Question identification returns the last listed message, answer
+        extraction returns the first line of the document text (for every
+        numbered question, as structured output, when a response format is given).
+        """
+        self.latency = latency
+        self.calls = 0
+
+    async def complete(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        model: str,
+        max_tokens: int,
+        response_format: ResponseFormat | None = None,
+    ) -> str | None:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        content = messages[-1].get("content")
+        if not isinstance(content, str):
+            return None
+
+        if response_format is not None:
+            match = DOCUMENT_TEXT_PATTERN.search(content)
+            answer = match.group(1).strip() if match else "Не е пронајдено"
+            return json.dumps(
+                {
+                    "answers": [
+                        {"index": int(index), "answer": answer}
+                        for index in NUMBERED_QUESTION_PATTERN.findall(content)
+                    ],
+                },
+            )
+
+        if quoted := QUOTED_MESSAGE_PATTERN.findall(content):
+            return quoted[-1]
+        if match := DOCUMENT_TEXT_PATTERN.search(content):
+            return match.group(1).strip()
+        return None
+
+
+class AsyncRateLimiter:
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        Token bucket allowing `rate` acquisitions per second on average,
+        with bursts of up to `burst`.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._updated) * self.rate,
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class RateLimitedChatClient:
+    def __init__(self, inner: ChatClient, limiter: AsyncRateLimiter) -> None:
+        """
+        Wraps a chat client so every call first takes a rate limiter token.
+        """
+        self.inner = inner
+        self.limiter = limiter
+
+    async def complete(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        model: str,
+        max_tokens: int,
+        response_format: ResponseFormat | None = None,
+    ) -> str | None:
+        await self.limiter.acquire()
+        return await self.inner.complete(
+            messages,
+            model,
+            max_tokens,
+            response_format=response_format,
+        )
+
+
+class InstrumentedChatClient:
+    def __init__(self, inner: ChatClient) -> None:
+        """
+        Wraps a chat client to record the latency of every call per model.
+        """
+        self.inner = inner
+
+    async def complete(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        model: str,
+        max_tokens: int,
+        response_format: ResponseFormat | None = None,
+    ) -> str | None:
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            content = await self.inner.complete(
+                messages,
+                model,
+                max_tokens,
+                response_format=response_format,
+            )
+            outcome = "ok"
+            return content
+        finally:
+            LLM_CALL_LATENCY.labels(model=model, outcome=outcome).observe(
+                time.perf_counter() - start,
+            )
+
+
+def make_chat_client(settings: Settings) -> ChatClient:
+    """
+    Build the chat client selected by `LLM_BACKEND`, instrumented if metrics
+    are enabled and rate limited if configured.
+    """
+    client: ChatClient
+    if settings.LLM_BACKEND == "stub":
+        client = StubChatClient(latency=settings.LLM_STUB_LATENCY_MS / 1000)
+    else:
+        client = OpenAIChatClient(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+        )
+
+    if settings.METRICS_ENABLED:
+        client = InstrumentedChatClient(client)
+
+    if settings.LLM_RATE_LIMIT_PER_SECOND > 0:
+        client = RateLimitedChatClient(
+            client,
+            AsyncRateLimiter(
+                rate=settings.LLM_RATE_LIMIT_PER_SECOND,
+                burst=settings.LLM_RATE_LIMIT_BURST,
+            ),
+        )
+
+    return client
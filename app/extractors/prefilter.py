@@ -0,0 +1,201 @@
+import math
+import re
+from collections import Counter
+
+# Cyrillic letters mapped to the Latin spelling used in chat, reduced to
+# one letter (the Latin digraphs are reduced the same way), so that
+# "studentskata sluzba" and "Студентската служба" normalize to the same text
+CYRILLIC_TO_LATIN = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "g",
+        "д": "d",
+        "ѓ": "g",
+        "е": "e",
+        "ж": "z",
+        "з": "z",
+        "ѕ": "z",
+        "и": "i",
+        "ј": "j",
+        "к": "k",
+        "л": "l",
+        "љ": "l",
+        "м": "m",
+        "н": "n",
+        "њ": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "ќ": "k",
+        "у": "u",
+        "ф": "f",
+        "х": "h",
+        "ц": "c",
+        "ч": "c",
+        "џ": "z",
+        "ш": "s",
+        # Latin letters with diacritics, as in the Latin alphabet of Macedonian
+        "š": "s",
+        "ž": "z",
+        "č": "c",
+        "ć": "c",
+        "đ": "g",
+        "ǵ": "g",
+        "ḱ": "k",
+    },
+)
+LATIN_DIGRAPHS = {
+    "zh": "z",
+    "ch": "c",
+    "sh": "s",
+    "kj": "k",
+    "gj": "g",
+    "dj": "g",
+    "dz": "z",
+    "lj": "l",
+    "nj": "n",
+}
+LATIN_DIGRAPH_PATTERN = re.compile("|".join(LATIN_DIGRAPHS))
+NON_WORD = re.compile(r"[^a-z0-9]+")
+PASSAGE_SEPARATORS = re.compile(r"\n+|(?<=[.!?])\s+")
+
+# Function words and chat filler that say nothing about the document,
+# in normalized form
+STOPWORDS = frozenset(
+    {
+        "a",
+        "ako",
+        "ali",
+        "da",
+        "dali",
+        "do",
+        "e",
+        "fala",
+        "i",
+        "ili",
+        "ima",
+        "imam",
+        "kade",
+        "kako",
+        "koga",
+        "koe",
+        "koi",
+        "koj",
+        "koja",
+        "kolku",
+        "li",
+        "me",
+        "mi",
+        "mnogu",
+        "na",
+        "ne",
+        "nekoj",
+        "od",
+        "ok",
+        "pa",
+        "po",
+        "prasane",
+        "se",
+        "so",
+        "sto",
+        "su",
+        "ta",
+        "taka",
+        "toa",
+        "vo",
+        "za",
+        "zdravo",
+        "zasto",
+        "znae",
+        "znaete",
+    },
+)
+
+NGRAM_SIZES = (3, 4)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercases text and transliterates Macedonian Cyrillic (and Latin with
+    diacritics or digraphs) to one reduced Latin spelling, keeping only
+    letters, digits and single spaces.
+    """
+    text = text.lower().translate(CYRILLIC_TO_LATIN)
+    text = LATIN_DIGRAPH_PATTERN.sub(lambda match: LATIN_DIGRAPHS[match.group(0)], text)
+    return NON_WORD.sub(" ", text).strip()
+
+
+def char_ngrams(text: str) -> Counter[str]:
+    """
+    Character n-grams of the words of normalized text (padded with spaces,
+    so word beginnings and ends count), stopwords excluded.
+    """
+    ngrams: Counter[str] = Counter()
+    for word in normalize_text(text).split():
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            ngrams.update(
+                padded[start : start + size] for start in range(len(padded) - size + 1)
+            )
+    return ngrams
+
+
+def _tfidf(ngrams: Counter[str], idf: dict[str, float]) -> dict[str, float]:
+    vector = {
+        ngram: (1 + math.log(count)) * idf[ngram] for ngram, count in ngrams.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {ngram: weight / norm for ngram, weight in vector.items()} if norm else {}
+
+
+def rank_messages(
+    document_content: str,
+    messages: list[str],
+    keyword: str | None = None,
+) -> list[tuple[int, float]]:
+    """
+    Scores how related every message is to a document, from 0 to 1: the
+    best cosine similarity of the message's character n-gram TF-IDF vector
+    with that of the keyword or of any passage (line or sentence) of the
+    document. IDF weights come from the passages and messages themselves.
+    Returns (message index, score) pairs, best first.
+    """
+    passages = [
+        passage
+        for passage in [keyword or "", *PASSAGE_SEPARATORS.split(document_content)]
+        if passage.strip()
+    ]
+    passage_ngrams = [char_ngrams(passage) for passage in passages]
+    message_ngrams = [char_ngrams(message) for message in messages]
+
+    texts = passage_ngrams + message_ngrams
+    document_frequency: Counter[str] = Counter()
+    for ngrams in texts:
+        document_frequency.update(ngrams.keys())
+    idf = {
+        ngram: math.log((1 + len(texts)) / (1 + frequency)) + 1
+        for ngram, frequency in document_frequency.items()
+    }
+
+    passage_vectors = [_tfidf(ngrams, idf) for ngrams in passage_ngrams]
+    scores = []
+    for index, ngrams in enumerate(message_ngrams):
+        vector = _tfidf(ngrams, idf)
+        score = max(
+            (
+                sum(
+                    weight * passage.get(ngram, 0.0) for ngram, weight in vector.items()
+                )
+                for passage in passage_vectors
+            ),
+            default=0.0,
+        )
+        scores.append((index, score))
+
+    return sorted(scores, key=lambda item: item[1], reverse=True)
@@ -1,8 +1,13 @@
+import logging
 from typing import TypedDict
 
 from app.data.connection import Database
-from app.extractors.core import extract_answer_from_llm
+from app.extractors.core import EXTRACTION_PROMPT_VERSION, extract_answer_from_llm
 from app.schemas.events import UsageEvent
+from app.utils.metrics import record_extraction_outcome
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 
 class FaqDirectExtractionData(TypedDict):
@@ -40,16 +45,18 @@ def prepare_direct_faq_data(event: UsageEvent) -> FaqDirectExtractionData | None
     )
 
 
+@traced("extraction.direct")
 async def perform_direct_faq_extraction_and_update(
     db_connection: Database,
     data: FaqDirectExtractionData,
 ) -> None:
     """
     Performs LLM answer extraction and updates MongoDB for direct FAQ events.
+    Errors are re-raised so the extraction worker can retry the job.
     """
-    print(
-        f"Background task (Direct FAQ): Starting answer extraction for event {data['event_id']} "
-        f"and question: '{data['user_question'][:50]}...'",
+    logger.info(
+        "Starting answer extraction for question '%.50s'",
+        data["user_question"],
     )
     extracted_answer = await extract_answer_from_llm(
         question=data["user_question"],
@@ -60,28 +67,27 @@ async def perform_direct_faq_extraction_and_update(
     if extracted_answer is not None:
         update_fields["extracted_answer"] = extracted_answer
     update_fields["identified_user_question"] = data["user_question"]
+    update_fields["extraction_status"] = (
+        "answered" if extracted_answer is not None else "identified"
+    )
+    update_fields["extraction_prompt_version"] = EXTRACTION_PROMPT_VERSION
 
     if update_fields:
         try:
-            coll = db_connection.get_collection(data["event_type"])
-            result = await coll.update_one(
-                {"event_id": data["event_id"]},
-                {"$set": update_fields},
+            updated = await db_connection.update_event(
+                data["event_type"],
+                data["event_id"],
+                update_fields,
             )
-            if result.modified_count > 0:
-                print(
-                    f"Background task (Direct FAQ): Successfully updated event {data['event_id']} "
-                    f"with answer and identified question.",
-                )
+            if updated:
+                logger.info("Updated event with answer and identified question")
             else:
-                print(
-                    f"Background task (Direct FAQ): Event {data['event_id']} not found or no change after extraction.",
-                )
+                logger.warning("Event not found or no change after extraction")
         except Exception as e:
-            print(
-                f"Background task (Direct FAQ): Error updating event {data['event_id']} in MongoDB: {e}",
-            )
-    else:
-        print(
-            f"Background task (Direct FAQ): No answer extracted and no question identified for event {data['event_id']}.",
+            logger.warning("Error updating event in MongoDB: %s", e)
+            raise
+        record_extraction_outcome(
+            "answered" if extracted_answer is not None else "unanswered",
         )
+    else:
+        logger.info("No answer extracted and no question identified")
@@ -0,0 +1,281 @@
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+from collections import deque
+from typing import Any, cast
+
+from app.data.connection import Database
+from app.data.jobs import ExtractionJob, ExtractionJobQueue
+from app.extractors.faq_event_extractor import (
+    FaqEventExtractionData,
+    perform_faq_event_extraction_and_update,
+    set_extraction_status,
+)
+from app.extractors.grouped_faq_extractor import (
+    perform_grouped_faq_extraction_and_update,
+)
+from app.utils.log import bind_event_id
+from app.utils.metrics import EXTRACTION_JOBS, record_extraction_outcome
+from app.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+JOB_KIND_FAQ_EVENT = "faq_event"
+
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+
+async def run_extraction_job(db_connection: Database, job: ExtractionJob) -> None:
+    """
+    Dispatch a claimed job to the extractor for its kind.
+    """
+    data: dict[str, Any] = job["data"]
+
+    if job["kind"] != JOB_KIND_FAQ_EVENT:
+        raise ValueError(f"Unknown extraction job kind '{job['kind']}'")
+
+    await perform_faq_event_extraction_and_update(
+        db_connection,
+        cast("FaqEventExtractionData", data),
+    )
+
+
+class ExtractionWorkerPool:
+    """
+    A fixed number of asyncio workers that claim jobs from the extraction
+    job queue and run them. Every process runs its own pool; the queue's
+    leases make sure a job is only processed by one worker at a time.
+
+    With `group_size` > 1, a worker that claims an FAQ event job also claims
+    up to `group_size - 1` queued jobs about the same document and extracts
+    all their answers with a single LLM call.
+    """
+
+    def __init__(
+        self,
+        db_connection: Database,
+        queue: ExtractionJobQueue,
+        *,
+        concurrency: int = 4,
+        group_size: int = 1,
+        poll_interval: float = 1.0,
+        shutdown_grace: float = 10.0,
+    ) -> None:
+        self.db_connection = db_connection
+        self.queue = queue
+        self.concurrency = concurrency
+        self.group_size = group_size
+        self.poll_interval = poll_interval
+        self.shutdown_grace = shutdown_grace
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.total_duration = 0.0
+        self.started_at: float | None = None
+        self._finished_at: deque[float] = deque()
+        self._stopping = asyncio.Event()
+        self._workers: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        """
+        Start the workers. Must be called from a running event loop.
+        """
+        self.started_at = time.monotonic()
+        self._stopping.clear()
+        self._workers = [
+            asyncio.create_task(self._work(f"{self.worker_prefix}:{index}"))
+            for index in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Stop claiming jobs and wait for in-flight jobs to finish. Jobs still
+        running after the grace period are cancelled; their leases expire
+        and they are picked up again later.
+        """
+        self._stopping.set()
+        if not self._workers:
+            return
+
+        _, pending = await asyncio.wait(self._workers, timeout=self.shutdown_grace)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.claim(worker_id)
+            except Exception as e:
+                logger.warning("Worker %s failed to claim a job: %s", worker_id, e)
+                job = None
+
+            if job is None:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                continue
+
+            jobs = [job]
+            if (
+                self.group_size > 1
+                and job["kind"] == JOB_KIND_FAQ_EVENT
+                and job.get("group_key")
+            ):
+                try:
+                    jobs += await self.queue.claim_group(
+                        worker_id,
+                        job["group_key"] or "",
+                        self.group_size - 1,
+                    )
+                except Exception as e:
+                    logger.warning(
+                        "Worker %s failed to claim a job group: %s",
+                        worker_id,
+                        e,
+                    )
+
+            await self._process(jobs)
+
+    async def _process(self, jobs: list[ExtractionJob]) -> None:
+        self.in_flight += len(jobs)
+        start = time.monotonic()
+        try:
+            outcomes = await self._run_jobs(jobs)
+        except Exception as e:
+            outcomes = [e] * len(jobs)
+        finally:
+            self.in_flight -= len(jobs)
+            self.total_duration += (time.monotonic() - start) * len(jobs)
+
+        for job, error in zip(jobs, outcomes, strict=True):
+            await self._record_outcome(job, error)
+
+    async def _record_outcome(
+        self,
+        job: ExtractionJob,
+        error: Exception | None,
+    ) -> None:
+        if error is None:
+            try:
+                await self.queue.complete(job)
+            except Exception as e:
+                logger.warning("Failed to mark job %s done: %s", job["_id"], e)
+            self.succeeded += 1
+            EXTRACTION_JOBS.labels(kind=job["kind"], outcome="succeeded").inc()
+            self._record_finished()
+            return
+
+        logger.warning(
+            "Job %s (%s) failed on attempt %d: %s",
+            job["_id"],
+            job["kind"],
+            job["attempts"],
+            error,
+            extra={"event_id": job["event_id"]},
+        )
+        try:
+            retry = await self.queue.fail(job, str(error))
+        except Exception as e:
+            logger.warning("Failed to record the failure of job %s: %s", job["_id"], e)
+            return
+
+        if retry:
+            self.retried += 1
+            EXTRACTION_JOBS.labels(kind=job["kind"], outcome="retried").inc()
+        else:
+            self.failed += 1
+            EXTRACTION_JOBS.labels(kind=job["kind"], outcome="failed").inc()
+            await self._mark_event_failed(job, str(error))
+
+    async def _mark_event_failed(self, job: ExtractionJob, error: str) -> None:
+        try:
+            await set_extraction_status(
+                self.db_connection,
+                job["event_type"],
+                job["event_id"],
+                "failed",
+                extraction_error=error[:1000],
+            )
+            record_extraction_outcome("failed")
+        except Exception as e:
+            logger.warning(
+                "Failed to mark event as failed: %s",
+                e,
+                extra={"event_id": job["event_id"]},
+            )
+
+    async def _run_jobs(self, jobs: list[ExtractionJob]) -> list[Exception | None]:
+        """
+        Run one job, or a group of FAQ event jobs about the same document.
+        Returns the error of every job (None on success), in order.
+        """
+        outcomes: list[Exception | None] = [None] * len(jobs)
+        runnable: list[int] = []
+        for index, job in enumerate(jobs):
+            # A job re-claimed after its lease expired counts as a new attempt
+            if job["attempts"] > self.queue.max_attempts:
+                outcomes[index] = RuntimeError("Job lease expired too many times")
+            else:
+                runnable.append(index)
+
+        if len(runnable) == 1:
+            index = runnable[0]
+            try:
+                with (
+                    bind_event_id(jobs[index]["event_id"]),
+                    span(
+                        "extraction.job",
+                        kind=jobs[index]["kind"],
+                        event_id=jobs[index]["event_id"],
+                        attempt=jobs[index]["attempts"],
+                    ),
+                ):
+                    await run_extraction_job(self.db_connection, jobs[index])
+            except Exception as e:
+                outcomes[index] = e
+        elif runnable:
+            results = await perform_grouped_faq_extraction_and_update(
+                self.db_connection,
+                [
+                    cast("FaqEventExtractionData", jobs[index]["data"])
+                    for index in runnable
+                ],
+            )
+            for index, result in zip(runnable, results, strict=True):
+                outcomes[index] = result
+
+        return outcomes
+
+    def _expire_finished(self, now: float) -> None:
+        while (
+            self._finished_at and now - self._finished_at[0] > THROUGHPUT_WINDOW_SECONDS
+        ):
+            self._finished_at.popleft()
+
+    def _record_finished(self) -> None:
+        """
+        Records a finished job for `throughput`, dropping the ones outside
+        the window so the record stays bounded without anyone reading it.
+        """
+        now = time.monotonic()
+        self._finished_at.append(now)
+        self._expire_finished(now)
+
+    def throughput(self) -> float:
+        """
+        Jobs completed per second over the last minute.
+        """
+        now = time.monotonic()
+        self._expire_finished(now)
+
+        window = THROUGHPUT_WINDOW_SECONDS
+        if self.started_at is not None:
+            window = min(window, max(now - self.started_at, 1.0))
+        return len(self._finished_at) / window
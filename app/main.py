@@ -1,27 +1,119 @@
+import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api.admin import router as admin_router
+from app.api.analytics import router as analytics_router
 from app.api.events import router as events_router
+from app.api.extraction import router as extraction_router
 from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
 from app.data.connection import Database
+from app.data.jobs import ExtractionJobQueue
+from app.data.rollups import RollupStore
+from app.extractors.core import result_cache
+from app.extractors.worker import ExtractionWorkerPool
+from app.utils.log import RequestIdMiddleware, configure_logging
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilerMiddleware
+from app.utils.response_cache import ResponseCache
 from app.utils.settings import Settings
+from app.utils.tracing import TracingMiddleware, configure_tracing, shutdown_tracing
+
+logger = logging.getLogger(__name__)
 
 settings = Settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
-    db = Database(dsn=settings.MONGO_URL)
+    log_listener = configure_logging(settings)
+    if settings.TRACING_ENABLED:
+        configure_tracing(settings)
+    db = Database.from_settings(settings)
     app.state.db = db
     db.init()
+    if settings.INGEST_BUFFER_ENABLED:
+        db.start_write_buffer(
+            max_batch=settings.INGEST_BUFFER_MAX_BATCH,
+            max_delay=settings.INGEST_BUFFER_MAX_DELAY_MS / 1000,
+            max_pending=settings.INGEST_BUFFER_MAX_PENDING,
+            full_timeout=settings.INGEST_BUFFER_FULL_TIMEOUT_MS / 1000,
+        )
+    if settings.EXTRACTION_RESULT_BUFFER_ENABLED:
+        db.start_update_buffer(
+            max_batch=settings.EXTRACTION_RESULT_BUFFER_MAX_BATCH,
+            max_delay=settings.EXTRACTION_RESULT_BUFFER_MAX_DELAY_MS / 1000,
+        )
+
+    job_queue = ExtractionJobQueue(
+        db.get_internal_collection("extraction_jobs"),
+        lease_seconds=settings.EXTRACTION_LEASE_SECONDS,
+        max_attempts=settings.EXTRACTION_MAX_ATTEMPTS,
+        backoff_base=settings.EXTRACTION_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.EXTRACTION_BACKOFF_MAX_SECONDS,
+        retention_seconds=settings.EXTRACTION_JOB_RETENTION_SECONDS,
+    )
+    try:
+        await job_queue.ensure_indexes()
+    except Exception as e:
+        logger.warning("Failed to create extraction job queue indexes: %s", e)
+    app.state.job_queue = job_queue
+
+    result_cache.attach(db.get_internal_collection("llm_cache"))
+    try:
+        await result_cache.ensure_indexes()
+    except Exception as e:
+        logger.warning("Failed to create LLM cache indexes: %s", e)
+
+    rollups = None
+    if settings.ROLLUP_ENABLED:
+        rollups = RollupStore(
+            db.get_internal_collection("rollups"),
+            db.get_internal_collection("rollup_state"),
+            settings.ROLLUP_DIMENSIONS,
+            flush_interval=settings.ROLLUP_FLUSH_INTERVAL_SECONDS,
+        )
+        try:
+            await rollups.ensure_indexes()
+        except Exception as e:
+            logger.warning("Failed to create rollup indexes: %s", e)
+        rollups.start()
+    app.state.rollups = rollups
+
+    response_cache = ResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    )
+    db.update_listeners.append(response_cache.invalidate)
+    app.state.response_cache = response_cache
+
+    extraction_pool = ExtractionWorkerPool(
+        db,
+        job_queue,
+        concurrency=settings.EXTRACTION_WORKER_CONCURRENCY,
+        group_size=settings.EXTRACTION_GROUP_MAX_SIZE,
+        poll_interval=settings.EXTRACTION_POLL_INTERVAL_SECONDS,
+    )
+    if settings.EXTRACTION_WORKERS_ENABLED:
+        extraction_pool.start()
+    app.state.extraction_pool = extraction_pool
+
     yield
+
+    await extraction_pool.stop()
+    await db.drain()
+    if rollups is not None:
+        await rollups.stop()
     db.disconnect()
+    shutdown_tracing()
+    log_listener.stop()
 
 
 def make_app(settings: Settings) -> FastAPI:
@@ -30,8 +122,18 @@ def make_app(settings: Settings) -> FastAPI:
         description=settings.APP_DESCRIPTION,
         version=settings.API_VERSION,
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         openapi_tags=[
             {"name": "Events", "description": "Ingest usage events"},
+            {
+                "name": "Extraction",
+                "description": "FAQ answer extraction queue status",
+            },
+            {
+                "name": "Analytics",
+                "description": "Aggregated counts over event collections",
+            },
+            {"name": "Admin", "description": "Collection index management"},
             {"name": "Health", "description": "Health check & status"},
         ],
         host=settings.HOST,
@@ -47,9 +149,29 @@ def make_app(settings: Settings) -> FastAPI:
         allow_headers=["*"],
         expose_headers=settings.EXPOSE_HEADERS,
     )
+    if settings.TRACING_ENABLED:
+        app.add_middleware(TracingMiddleware)
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfilerMiddleware,
+            header=settings.PROFILING_HEADER,
+            api_key=settings.API_KEY,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            slow_seconds=settings.PROFILING_SLOW_REQUEST_MS / 1000,
+            output_dir=settings.PROFILING_OUTPUT_DIR,
+            output_format=settings.PROFILING_FORMAT,
+        )
+    app.add_middleware(RequestIdMiddleware)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware, excluded_paths=frozenset({"/metrics"}))
 
     app.include_router(health_router)
     app.include_router(events_router)
+    app.include_router(analytics_router)
+    app.include_router(extraction_router)
+    app.include_router(admin_router)
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_router)
 
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(
@@ -0,0 +1,35 @@
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class IndexInfo(BaseModel):
+    name: str = Field(description="Index name")
+    keys: list[tuple[str, Any]] = Field(
+        description="Indexed fields with their direction (1 or -1), in order",
+        examples=[[["metadata.guildId", 1], ["timestamp", -1]]],
+    )
+    unique: bool = Field(False, description="Whether the index is unique")
+    declared: bool = Field(
+        description="Whether the index is declared for this event type "
+        "(by default or in `EVENT_INDEXES`)",
+    )
+
+
+class CollectionIndexes(BaseModel):
+    event_type: str = Field(description="Name of the event_type / MongoDB collection")
+    indexes: list[IndexInfo] = Field(description="Indexes existing on the collection")
+    missing: list[str] = Field(
+        description="Declared indexes that do not exist on the collection",
+    )
+
+
+class IngestTierLatency(BaseModel):
+    tier: str = Field(
+        description="Write policy of the inserts ('default' if none is configured, "
+        "'buffered' for fast-ack inserts through the write-behind buffer)",
+    )
+    count: int = Field(description="Number of single-event inserts since start")
+    mean_ms: float = Field(description="Mean insert latency in milliseconds")
+    p50_ms: float = Field(description="Median latency of the recent inserts")
+    p99_ms: float = Field(description="99th percentile latency of the recent inserts")
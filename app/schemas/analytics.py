@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+
+class CountSeries(BaseModel):
+    event_type: str = Field(description="Name of the event_type / MongoDB collection")
+    bucket: Literal["hour", "day", "week"] = Field(description="Time bucket size")
+    source: Literal["raw", "rollups"] = Field(
+        description="'rollups' if (part of) the range was read from rollups",
+    )
+    timestamps: list[datetime] = Field(
+        description="Start of each time bucket, oldest first",
+    )
+    counts: list[int] = Field(description="Number of events in each time bucket")
+
+
+class TopValues(BaseModel):
+    event_type: str = Field(description="Name of the event_type / MongoDB collection")
+    field: str = Field(description="Dotted field path the values were taken from")
+    source: Literal["raw", "rollups"] = Field(
+        description="'rollups' if (part of) the range was read from rollups",
+    )
+    values: list[Any] = Field(description="Most frequent values, most frequent first")
+    counts: list[int] = Field(description="Number of events with each value")
+
+
+class DistinctUsers(BaseModel):
+    event_type: str = Field(description="Name of the event_type / MongoDB collection")
+    user_field: str = Field(description="Dotted field path identifying the user")
+    total: int = Field(description="Distinct users over the whole time range")
+    bucket: Literal["hour", "day", "week"] | None = Field(
+        None,
+        description="Time bucket size of the series, if requested",
+    )
+    timestamps: list[datetime] = Field(
+        [],
+        description="Start of each time bucket, oldest first",
+    )
+    users: list[int] = Field([], description="Distinct users in each time bucket")
@@ -28,10 +28,71 @@ class UsageEvent(BaseModel):
         description="The specific user question/query identified for extraction, "
         "either direct or from message context.",
     )
+    extraction_status: (
+        Literal["pending", "identified", "answered", "skipped", "failed"] | None
+    ) = Field(
+        None,
+        description="Progress of FAQ answer extraction: 'pending' until a worker "
+        "runs it, 'identified' once the user question is known, 'answered' once "
+        "the answer was extracted, 'skipped' if no relevant question was found "
+        "and 'failed' if extraction ran out of retries.",
+    )
+    extraction_prompt_version: str | None = Field(
+        None,
+        description="Version of the extraction prompts that produced the "
+        "extraction results, used to find results of older prompts.",
+    )
 
 
 class IngestResponse(BaseModel):
-    status: Literal["ok"] = Field("ok", description="Always 'ok' if ingest succeeded")
+    status: Literal["ok", "accepted"] = Field(
+        "ok",
+        description="'ok' if the event was stored, 'accepted' if it was queued "
+        "for a buffered write (fast-ack mode)",
+    )
     event_type: str = Field(description="The event_type under which this was stored")
     event_id: str = Field(description="The UUID of the stored event")
     inserted_id: str = Field(description="The MongoDB `_id` of the created document")
+
+
+class BatchIngestItemResult(BaseModel):
+    index: int = Field(description="Position of the event in the submitted batch")
+    status: Literal["ok", "error"] = Field(
+        description="'ok' if the event was stored, 'error' otherwise",
+    )
+    event_type: str | None = Field(
+        None,
+        description="The event_type under which this was stored (if it parsed)",
+    )
+    event_id: str | None = Field(
+        None,
+        description="The UUID of the event (if it parsed)",
+    )
+    inserted_id: str | None = Field(
+        None,
+        description="The MongoDB `_id` of the created document (if stored)",
+    )
+    error: str | None = Field(
+        None,
+        description="Validation or insertion error for this event (if any)",
+    )
+
+
+class BatchIngestResponse(BaseModel):
+    status: Literal["ok", "partial", "error"] = Field(
+        description="'ok' if every event was stored, 'partial' if only some were, "
+        "'error' if none were",
+    )
+    inserted: int = Field(description="Number of events stored")
+    failed: int = Field(description="Number of events rejected or not stored")
+    results: list[BatchIngestItemResult] = Field(
+        description="Per-event outcome, in the order the events were submitted",
+    )
+
+
+class EventTypeSummary(BaseModel):
+    event_type: str = Field(description="Name of the event_type / MongoDB collection")
+    count: int = Field(description="Approximate number of stored events")
+    last_seen: datetime | None = Field(
+        description="Timestamp of the newest stored event",
+    )
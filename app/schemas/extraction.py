@@ -0,0 +1,54 @@
+from pydantic import BaseModel, Field
+
+
+class ExtractionQueueDepth(BaseModel):
+    queued: int = Field(description="Jobs waiting to be claimed (incl. retries)")
+    running: int = Field(description="Jobs currently leased by a worker")
+    done: int = Field(description="Finished jobs still within the retention period")
+    failed: int = Field(description="Jobs that ran out of attempts")
+
+
+class ExtractionWorkerStats(BaseModel):
+    concurrency: int = Field(description="Number of workers in this process")
+    in_flight: int = Field(description="Jobs currently being processed")
+    succeeded: int = Field(description="Jobs completed since startup")
+    retried: int = Field(description="Failed attempts that were scheduled for retry")
+    failed: int = Field(description="Jobs that permanently failed since startup")
+    throughput_per_second: float = Field(
+        description="Jobs completed per second over the last minute",
+    )
+    average_duration_seconds: float = Field(
+        description="Average processing time per attempt since startup",
+    )
+
+
+class ExtractionResultBufferStats(BaseModel):
+    enabled: bool = Field(description="Whether results are written in bulk writes")
+    pending: int = Field(description="Events with results waiting to be written")
+    written: int = Field(description="Events whose results were written since startup")
+    failed: int = Field(
+        description="Events whose results failed to write since startup",
+    )
+    bulk_writes: int = Field(description="Bulk writes made since startup")
+
+
+class LLMCacheStats(BaseModel):
+    enabled: bool = Field(description="Whether LLM results are cached")
+    entries: int = Field(description="Results held in the in-memory tier")
+    memory_hits: int = Field(description="Lookups answered by the in-memory tier")
+    mongo_hits: int = Field(description="Lookups answered by the MongoDB tier")
+    misses: int = Field(description="Lookups that required an LLM call")
+    hit_ratio: float = Field(description="Share of lookups answered by either tier")
+
+
+class ExtractionStats(BaseModel):
+    queue: ExtractionQueueDepth = Field(description="Queue depth across all workers")
+    workers: ExtractionWorkerStats = Field(
+        description="Counters of the worker pool in this process",
+    )
+    results: ExtractionResultBufferStats = Field(
+        description="Counters of the extraction result buffer in this process",
+    )
+    cache: LLMCacheStats = Field(
+        description="Counters of the LLM result cache in this process",
+    )
@@ -0,0 +1,168 @@
+"""
+Backfill answers for FAQ events whose question is known but whose answer
+was never extracted, through a Batch-API-style backend.
+
+Usage:
+    python -m app.tools.batch_extract --backend openai --limit 5000
+    python -m app.tools.batch_extract --backend local --dry-run
+    python -m app.tools.batch_extract --start 2025-01-01 --end 2025-02-01
+
+The `openai` backend uses the OpenAI Batch API (cheaper, results within 24h).
+The `local` backend runs the same multi-question requests in-process through
+the configured chat client (set LLM_BACKEND=stub to run fully offline).
+
+Events are scanned newest first, within `--start`/`--end` if given. The
+extraction results of events in a time-series collection cannot be
+filtered on in the query, so there the scan is bounded to the last
+TIMESERIES_DEFAULT_DAYS days unless `--start` is given.
+"""
+
+import argparse
+import asyncio
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import openai
+
+from app.data.aggregations import timestamp_query
+from app.data.connection import Database
+from app.extractors import core
+from app.extractors.batch_api import (
+    BatchBackend,
+    LocalBatchBackend,
+    OpenAIBatchBackend,
+    PendingAnswer,
+    run_batch_extraction,
+)
+from app.utils.log import configure_logging
+from app.utils.settings import Settings
+
+BACKFILL_QUERY = {
+    "extracted_answer": {"$exists": False},
+    "payload.content": {"$type": "string"},
+    "$or": [
+        {"identified_user_question": {"$type": "string"}},
+        {"payload.targetUserMessage.content": {"$type": "string"}},
+    ],
+}
+
+BACKFILL_TIMESERIES_QUERY = {"payload.content": {"$type": "string"}}
+
+TIMESERIES_DEFAULT_DAYS = 30
+
+
+async def find_pending_answers(
+    db: Database,
+    limit: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[PendingAnswer]:
+    """
+    Loads FAQ events in [start, end] that have a question but no extracted
+    answer, newest first. Extraction results of events in a time-series
+    collection live in the enrichment collection, so those events are
+    filtered after merging it in; the `timestamp` index bounds that scan to
+    the range, by default the last TIMESERIES_DEFAULT_DAYS days.
+    """
+    timeseries = await db.is_timeseries("faq")
+    if timeseries and start is None:
+        start = datetime.now(UTC) - timedelta(days=TIMESERIES_DEFAULT_DAYS)
+
+    query: dict[str, Any] = {
+        **(BACKFILL_TIMESERIES_QUERY if timeseries else BACKFILL_QUERY),
+        **timestamp_query(start, end),
+    }
+    cursor = (
+        db.get_collection("faq")
+        .find(
+            query,
+            {
+                "_id": 0,
+                "event_id": 1,
+                "identified_user_question": 1,
+                "payload.content": 1,
+                "payload.targetUserMessage.content": 1,
+            },
+            limit=0 if timeseries else limit,
+        )
+        .sort("timestamp", -1)
+    )
+
+    pending: list[PendingAnswer] = []
+    while len(pending) < limit and (batch := await cursor.to_list(length=1000)):
+        await db.enrich_events("faq", batch)
+        for doc in batch:
+            if "extracted_answer" in doc:
+                continue
+            payload = doc["payload"]
+            question = doc.get("identified_user_question") or payload.get(
+                "targetUserMessage",
+                {},
+            ).get("content")
+            if not question or not doc.get("event_id"):
+                continue
+            pending.append(
+                PendingAnswer(
+                    event_type="faq",
+                    event_id=doc["event_id"],
+                    question=question,
+                    document_content=payload["content"],
+                ),
+            )
+    return pending[:limit]
+
+
+def parse_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--backend", choices=["openai", "local"], default="openai")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--max-questions", type=int, default=8)
+    parser.add_argument("--poll-interval", type=float, default=30.0)
+    parser.add_argument("--start", type=parse_datetime)
+    parser.add_argument("--end", type=parse_datetime)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    settings = Settings()
+    log_listener = configure_logging(settings)
+    db = Database.from_settings(settings)
+    db.init()
+
+    try:
+        pending = await find_pending_answers(db, args.limit, args.start, args.end)
+        documents = len({item["document_content"] for item in pending})
+        print(f"Found {len(pending)} events to backfill across {documents} documents")
+        if args.dry_run or not pending:
+            return
+
+        backend: BatchBackend
+        if args.backend == "openai":
+            backend = OpenAIBatchBackend(
+                openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY),
+            )
+        else:
+            backend = LocalBatchBackend(core.chat_client)
+
+        counts = await run_batch_extraction(
+            db,
+            backend,
+            pending,
+            max_questions=args.max_questions,
+            poll_interval=args.poll_interval,
+        )
+        print(f"Done: {counts}")
+    finally:
+        db.disconnect()
+        log_listener.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
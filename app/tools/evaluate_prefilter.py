@@ -0,0 +1,194 @@
+"""
+Evaluate the local question pre-filter (QUESTION_PREFILTER_*) against FAQ
+events already labelled by LLM question identification.
+
+Usage:
+    python -m app.tools.evaluate_prefilter
+    python -m app.tools.evaluate_prefilter --limit 20000 --top-k 2 --min-scores 0.1 0.2
+
+An event is labelled positive when its `identified_user_question` is one of
+its context messages, and negative when extraction skipped it (no relevant
+message). For every minimum score the pre-filter keeps the `--top-k`
+messages scoring at least that much, and the report shows:
+
+- recall: share of labelled questions among the kept messages (questions
+  the pre-filter would lose are missed answers),
+- precision: share of the kept messages that are the labelled question,
+- skipped: share of positive and negative events that would get no LLM call,
+- sent: share of all context messages that would still be sent.
+
+Label with the pre-filter disabled, or events it skipped count as negatives.
+"""
+
+import argparse
+import asyncio
+from typing import Any, NamedTuple
+
+from app.data.connection import Database
+from app.extractors.prefilter import rank_messages
+from app.utils.settings import Settings
+
+LABELLED_STATUSES = ["identified", "answered", "skipped"]
+
+
+class LabelledEvent(NamedTuple):
+    # (message index, score) pairs, best first
+    scores: list[tuple[int, float]]
+    # Index of the message identified as the question, None for negatives
+    question_index: int | None
+
+
+def label_event(doc: dict[str, Any]) -> LabelledEvent | None:
+    """
+    Scores the context messages of a labelled event, or returns None if it
+    is not usable for the evaluation.
+    """
+    payload = doc.get("payload", {})
+    messages = [
+        msg["content"]
+        for msg in payload.get("context", [])
+        if isinstance(msg, dict)
+        and isinstance(msg.get("content"), str)
+        and msg["content"]
+    ]
+    if not messages:
+        return None
+
+    status = doc.get("extraction_status")
+    if status == "skipped":
+        question_index = None
+    elif status in LABELLED_STATUSES:
+        question = (doc.get("identified_user_question") or "").strip()
+        stripped = [message.strip() for message in messages]
+        if question not in stripped:
+            return None
+        question_index = stripped.index(question)
+    else:
+        return None
+
+    keyword = payload.get("keyword")
+    return LabelledEvent(
+        rank_messages(
+            payload["content"],
+            messages,
+            keyword if isinstance(keyword, str) else None,
+        ),
+        question_index,
+    )
+
+
+def evaluate(
+    events: list[LabelledEvent],
+    top_k: int,
+    min_score: float,
+) -> dict[str, float]:
+    """
+    Precision, recall and skip rates of the pre-filter with the given settings.
+    """
+    positives = [event for event in events if event.question_index is not None]
+    negatives = [event for event in events if event.question_index is None]
+    found = kept_total = messages_total = 0
+    skipped_positives = skipped_negatives = 0
+
+    for event in events:
+        kept = {index for index, score in event.scores[:top_k] if score >= min_score}
+        kept_total += len(kept)
+        messages_total += len(event.scores)
+        if event.question_index is None:
+            skipped_negatives += not kept
+            continue
+        skipped_positives += not kept
+        found += event.question_index in kept
+
+    return {
+        "recall": found / len(positives) if positives else 0.0,
+        "precision": found / kept_total if kept_total else 0.0,
+        "skipped_positives": skipped_positives / len(positives) if positives else 0.0,
+        "skipped_negatives": skipped_negatives / len(negatives) if negatives else 0.0,
+        "sent": kept_total / messages_total if messages_total else 0.0,
+    }
+
+
+async def load_events(db: Database, limit: int) -> list[LabelledEvent]:
+    """
+    Loads up to `limit` labelled FAQ events, newest first. Extraction
+    results of events in a time-series collection live in the enrichment
+    collection, so those are filtered after merging it in.
+    """
+    query: dict[str, Any] = {
+        "payload.content": {"$type": "string"},
+        "payload.context": {"$type": "array"},
+    }
+    if not await db.is_timeseries("faq"):
+        query["extraction_status"] = {"$in": LABELLED_STATUSES}
+
+    cursor = (
+        db.get_collection("faq")
+        .find(
+            query,
+            {
+                "_id": 0,
+                "event_id": 1,
+                "payload.content": 1,
+                "payload.keyword": 1,
+                "payload.context": 1,
+                "identified_user_question": 1,
+                "extraction_status": 1,
+            },
+        )
+        .sort("timestamp", -1)
+    )
+
+    events: list[LabelledEvent] = []
+    while len(events) < limit and (batch := await cursor.to_list(length=1000)):
+        await db.enrich_events("faq", batch)
+        events.extend(event for doc in batch if (event := label_event(doc)) is not None)
+    return events[:limit]
+
+
+async def main() -> None:
+    settings = Settings()
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=settings.QUESTION_PREFILTER_TOP_K)
+    parser.add_argument(
+        "--min-scores",
+        type=float,
+        nargs="+",
+        default=[0.05, 0.1, settings.QUESTION_PREFILTER_MIN_SCORE, 0.2, 0.3],
+    )
+    args = parser.parse_args()
+
+    db = Database.from_settings(settings)
+    db.init()
+    try:
+        events = await load_events(db, args.limit)
+    finally:
+        db.disconnect()
+
+    positives = sum(event.question_index is not None for event in events)
+    print(
+        f"{len(events)} labelled events ({positives} with a question, "
+        f"{len(events) - positives} skipped), top {args.top_k} messages",
+    )
+    if not events:
+        return
+
+    print(
+        f"{'min score':>9}  {'recall':>7}  {'precision':>9}  "
+        f"{'skip +':>7}  {'skip -':>7}  {'sent':>7}",
+    )
+    for min_score in sorted(set(args.min_scores)):
+        result = evaluate(events, args.top_k, min_score)
+        print(
+            f"{min_score:>9.2f}  {result['recall']:>7.1%}  {result['precision']:>9.1%}  "
+            f"{result['skipped_positives']:>7.1%}  {result['skipped_negatives']:>7.1%}  "
+            f"{result['sent']:>7.1%}",
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,252 @@
+"""
+Convert event collections into MongoDB time-series collections.
+
+Usage:
+    python -m app.tools.migrate_timeseries --event-type faq
+    python -m app.tools.migrate_timeseries --event-type faq --batch-size 5000 --drop-source
+    python -m app.tools.migrate_timeseries --event-type faq --dry-run
+
+Time-series collections cannot be converted or renamed in place, so the
+collection is renamed to `<event_type>__pre_timeseries`, recreated as a
+time-series collection (granularity TIMESERIES_GRANULARITY, retention
+EVENT_RETENTION_SECONDS) and the events are copied back in batches of
+`--batch-size`. The renamed collection is not listed as an event type. Extraction results are moved to the enrichment collection.
+Events whose timestamp is not a date are skipped; run
+`app.tools.migrate_timestamps` first.
+
+Progress is checkpointed after every batch, so an interrupted migration is
+resumed by running the command again (a batch that was being copied when
+it was interrupted may be copied twice). Pause ingestion of the event type
+while the collection is switched and restart the service afterwards, so
+running processes pick up the new collection kind.
+The source collection is kept unless `--drop-source` is given.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import Any
+
+from pymongo import ASCENDING, UpdateOne
+
+from app.data.connection import Database
+from app.data.timeseries import (
+    ENRICHMENT_FIELDS,
+    MIGRATION_SOURCE_SUFFIX,
+    TimeSeriesOptions,
+    create_timeseries_collection,
+    is_timeseries_collection,
+)
+from app.utils.settings import Settings
+
+
+def split_enrichment(doc: dict[str, Any]) -> dict[str, Any]:
+    """
+    Removes the extraction results from an event and returns them.
+    Events without an `event_id` keep them, as they cannot be keyed.
+    """
+    if not doc.get("event_id"):
+        return {}
+    return {field: doc.pop(field) for field in ENRICHMENT_FIELDS if field in doc}
+
+
+async def copy_events(
+    db: Database,
+    event_type: str,
+    batch_size: int,
+    *,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Copies the events of `<event_type>__pre_timeseries` into the time-series
+    collection `event_type`, resuming after the last checkpointed `_id`.
+    Returns counts of copied and skipped events.
+    """
+    source = db.get_collection(f"{event_type}{MIGRATION_SOURCE_SUFFIX}")
+    target = db.get_collection(event_type)
+    checkpoints = db.get_internal_collection("migrations")
+    checkpoint_id = f"timeseries:{event_type}"
+
+    checkpoint = await checkpoints.find_one({"_id": checkpoint_id}) or {}
+    last_id = checkpoint.get("last_id")
+    counts = {"copied": 0, "skipped": 0}
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = (
+            await source.find(query)
+            .sort("_id", ASCENDING)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+
+        events = []
+        enrichment = []
+        for doc in batch:
+            if not isinstance(doc.get("timestamp"), datetime):
+                print(
+                    f"{event_type}: Skipping event without date timestamp ({doc['_id']})",
+                )
+                counts["skipped"] += 1
+                continue
+            fields = split_enrichment(doc)
+            if fields:
+                enrichment.append(
+                    UpdateOne(
+                        {"event_type": event_type, "event_id": doc["event_id"]},
+                        {"$set": fields},
+                        upsert=True,
+                    ),
+                )
+            events.append(doc)
+
+        if not dry_run:
+            if enrichment:
+                await db.get_enrichment_collection().bulk_write(
+                    enrichment,
+                    ordered=False,
+                )
+            if events:
+                await target.insert_many(events, ordered=False)
+            await checkpoints.update_one(
+                {"_id": checkpoint_id},
+                {"$set": {"last_id": batch[-1]["_id"]}},
+                upsert=True,
+            )
+
+        counts["copied"] += len(events)
+        last_id = batch[-1]["_id"]
+
+    return counts
+
+
+async def copy_events_dry_run(
+    db: Database,
+    event_type: str,
+    batch_size: int,
+) -> dict[str, int]:
+    """
+    Counts the events a migration of a not yet renamed collection would
+    copy and skip.
+    """
+    coll = db.get_collection(event_type)
+    skipped = await coll.count_documents({"timestamp": {"$not": {"$type": "date"}}})
+    total = await coll.estimated_document_count()
+    print(
+        f"{event_type}: Would rename to {event_type}{MIGRATION_SOURCE_SUFFIX} in batches of {batch_size}",
+    )
+    return {"copied": total - skipped, "skipped": skipped}
+
+
+async def migrate_event_type(
+    db: Database,
+    event_type: str,
+    options: TimeSeriesOptions,
+    *,
+    batch_size: int,
+    dry_run: bool = False,
+    drop_source: bool = False,
+) -> dict[str, int] | None:
+    """
+    Switches one event type to a time-series collection and copies its
+    events over. Returns None if nothing is left to migrate.
+    """
+    source_name = f"{event_type}{MIGRATION_SOURCE_SUFFIX}"
+    names = set(await db.db.list_collection_names())
+    kind = await is_timeseries_collection(db.db, event_type)
+
+    if source_name not in names:
+        if kind is None:
+            print(f"{event_type}: No such collection")
+            return None
+        if kind:
+            print(f"{event_type}: Already a time-series collection")
+            return None
+        if dry_run:
+            return await copy_events_dry_run(db, event_type, batch_size)
+        await db.get_collection(event_type).rename(source_name)
+
+    if dry_run:
+        return await copy_events(db, event_type, batch_size, dry_run=True)
+
+    await create_timeseries_collection(db.db, event_type, options)
+    if not await is_timeseries_collection(db.db, event_type):
+        raise RuntimeError(
+            f"'{event_type}' was recreated as a regular collection, "
+            "pause its ingestion and run the migration again",
+        )
+    await db.ensure_collection(event_type)
+
+    counts = await copy_events(db, event_type, batch_size)
+
+    if drop_source:
+        await db.get_collection(source_name).drop()
+        await db.get_internal_collection("migrations").delete_one(
+            {"_id": f"timeseries:{event_type}"},
+        )
+    return counts
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--event-type",
+        action="append",
+        required=True,
+        help="Collection to migrate (repeatable)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--drop-source",
+        action="store_true",
+        help="Drop the renamed source collection once its events are copied",
+    )
+    args = parser.parse_args()
+
+    settings = Settings()
+    options = TimeSeriesOptions(
+        settings.TIMESERIES_GRANULARITY,
+        settings.EVENT_RETENTION_SECONDS,
+    )
+    db = Database.from_settings(settings, timeseries=options)
+    db.init()
+
+    failed = False
+    try:
+        for event_type in args.event_type:
+            try:
+                counts = await migrate_event_type(
+                    db,
+                    event_type,
+                    options,
+                    batch_size=args.batch_size,
+                    dry_run=args.dry_run,
+                    drop_source=args.drop_source,
+                )
+            except Exception as e:
+                print(f"{event_type}: Migration failed: {e}")
+                failed = True
+                continue
+            if counts is None:
+                continue
+            action = "Would copy" if args.dry_run else "Copied"
+            print(
+                f"{event_type}: {action} {counts['copied']} events, "
+                f"{counts['skipped']} skipped",
+            )
+    finally:
+        db.disconnect()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,182 @@
+"""
+Rewrite event timestamps stored as ISO strings into native BSON dates, so
+timestamp range filters and sorts are served by the `timestamp` index.
+
+Usage:
+    python -m app.tools.migrate_timestamps
+    python -m app.tools.migrate_timestamps --event-type faq --batch-size 5000
+    python -m app.tools.migrate_timestamps --dry-run
+    python -m app.tools.migrate_timestamps --verify
+
+Documents are rewritten in unordered bulk writes of `--batch-size` updates.
+Timestamps that cannot be parsed are reported and left untouched.
+`--verify` checks that no string timestamps are left and that a timestamp
+range query is planned as an index scan; it exits with status 1 otherwise.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, UpdateOne
+
+from app.data.connection import Database
+from app.utils.settings import Settings
+
+STRING_TIMESTAMP_QUERY = {"timestamp": {"$type": "string"}}
+
+
+def parse_timestamp(value: str) -> datetime | None:
+    """
+    Parses an ISO-8601 timestamp, assuming UTC when it has no offset.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed
+
+
+async def migrate_collection(
+    coll: AsyncIOMotorCollection,
+    batch_size: int,
+    *,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Converts the string timestamps of one collection to dates.
+    Returns counts of converted and unparseable documents.
+    """
+    counts = {"converted": 0, "unparseable": 0}
+    operations: list[UpdateOne] = []
+
+    async def flush() -> None:
+        if operations and not dry_run:
+            await coll.bulk_write(operations, ordered=False)
+        operations.clear()
+
+    cursor = coll.find(
+        STRING_TIMESTAMP_QUERY,
+        {"_id": 1, "timestamp": 1},
+        batch_size=batch_size,
+    ).sort("_id", ASCENDING)
+    async for doc in cursor:
+        timestamp = parse_timestamp(doc["timestamp"])
+        if timestamp is None:
+            print(
+                f"{coll.name}: Unparseable timestamp {doc['timestamp']!r} ({doc['_id']})",
+            )
+            counts["unparseable"] += 1
+            continue
+
+        operations.append(
+            UpdateOne(
+                {"_id": doc["_id"], "timestamp": doc["timestamp"]},
+                {"$set": {"timestamp": timestamp}},
+            ),
+        )
+        counts["converted"] += 1
+        if len(operations) >= batch_size:
+            await flush()
+
+    await flush()
+    return counts
+
+
+def plan_stages(plan: dict[str, Any]) -> list[str]:
+    """
+    Flattens a query plan into the list of its stage names.
+    """
+    stages = [plan["stage"]] if "stage" in plan else []
+    if "inputStage" in plan:
+        stages += plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+async def verify_collection(coll: AsyncIOMotorCollection) -> list[str]:
+    """
+    Checks that a collection has no string timestamps left and that the
+    timestamp range query of list_events uses an index. Returns the problems found.
+    """
+    problems = []
+
+    remaining = await coll.count_documents(STRING_TIMESTAMP_QUERY)
+    if remaining:
+        problems.append(f"{remaining} documents still have a string timestamp")
+
+    end = datetime.now(UTC)
+    explain = (
+        await coll.find({"timestamp": {"$gte": end - timedelta(days=1), "$lte": end}})
+        .sort("timestamp", -1)
+        .limit(100)
+        .explain()
+    )
+    winning_plan = explain["queryPlanner"]["winningPlan"]
+    # The slot-based engine (MongoDB 7+) nests the plan under "queryPlan"
+    stages = plan_stages(winning_plan.get("queryPlan", winning_plan))
+    if "IXSCAN" not in stages or "COLLSCAN" in stages:
+        problems.append(f"timestamp range query is not index-backed: {stages}")
+
+    return problems
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--event-type",
+        action="append",
+        help="Collection to migrate (repeatable, default: all)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--verify", action="store_true")
+    args = parser.parse_args()
+
+    settings = Settings()
+    db = Database.from_settings(settings)
+    db.init()
+
+    failed = False
+    try:
+        event_types = args.event_type or await db.event_types()
+        for event_type in event_types:
+            coll = await db.ensure_collection(event_type)
+
+            if args.verify:
+                problems = await verify_collection(coll)
+                for problem in problems:
+                    print(f"{event_type}: {problem}")
+                failed = failed or bool(problems)
+                if not problems:
+                    print(f"{event_type}: OK")
+                continue
+
+            counts = await migrate_collection(
+                coll,
+                args.batch_size,
+                dry_run=args.dry_run,
+            )
+            action = "Would convert" if args.dry_run else "Converted"
+            print(
+                f"{event_type}: {action} {counts['converted']} timestamps, "
+                f"{counts['unparseable']} unparseable",
+            )
+    finally:
+        db.disconnect()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
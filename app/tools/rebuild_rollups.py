@@ -0,0 +1,74 @@
+"""
+Recompute the hourly and daily rollups of event collections from raw events.
+
+Usage:
+    python -m app.tools.rebuild_rollups
+    python -m app.tools.rebuild_rollups --event-type faq --shard-days 1 --concurrency 8
+
+Rollups are maintained incrementally at ingest from the day after an event
+type was first ingested with rollups enabled. This command recomputes all
+days before the current UTC day (also any day whose rollups were lost, since
+shards are replaced) in parallel shards of `--shard-days` UTC days, after
+which analytics queries read rollups for the whole history. The current day
+is left to the live increments, so an event type first ingested with rollups
+enabled today can only be rebuilt from tomorrow on. Do not backfill events
+with past timestamps while it runs, their counts may be lost.
+Dimensions are taken from ROLLUP_DIMENSIONS; rebuild after changing them.
+"""
+
+import argparse
+import asyncio
+
+from app.data.connection import Database
+from app.data.rollups import RollupStore
+from app.utils.settings import Settings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--event-type",
+        action="append",
+        help="Collection to rebuild (repeatable, default: all)",
+    )
+    parser.add_argument("--shard-days", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    settings = Settings()
+    db = Database.from_settings(settings)
+    db.init()
+
+    rollups = RollupStore(
+        db.get_internal_collection("rollups"),
+        db.get_internal_collection("rollup_state"),
+        settings.ROLLUP_DIMENSIONS,
+    )
+
+    try:
+        await rollups.ensure_indexes()
+        event_types = args.event_type or await db.event_types()
+        for event_type in event_types:
+            try:
+                counts = await rollups.rebuild(
+                    await db.ensure_collection(event_type),
+                    event_type,
+                    shard_days=args.shard_days,
+                    concurrency=args.concurrency,
+                )
+            except RuntimeError as e:
+                print(f"{event_type}: Skipped, {e}")
+                continue
+            print(
+                f"{event_type}: Rebuilt {counts['shards']} shards "
+                f"covering {counts['events']} events",
+            )
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
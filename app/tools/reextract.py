@@ -0,0 +1,417 @@
+"""
+Re-run FAQ extraction for stored events: events stored while extraction was
+down (no answer and not yet extracted with the current prompts) or, with
+`--stale`, every event extracted with an older prompt version.
+
+Usage:
+    python -m app.tools.reextract
+    python -m app.tools.reextract --stale --shards 16 --concurrency 16
+    python -m app.tools.reextract --start 2025-01-01 --end 2025-07-01 --dry-run
+
+The time range (by default that of all FAQ events) is split into `--shards`
+equal slices that are scanned in parallel, oldest first, in pages of
+`--batch-size` events. Questions are resolved per event, answers are
+extracted with one multi-question LLM call per document (up to
+`--group-size` questions), and at most `--concurrency` LLM calls run at a
+time (LLM_RATE_LIMIT_PER_SECOND still applies). The results of a page are
+written with one unordered bulk write.
+
+Progress is checkpointed per shard after every page, so an interrupted run
+is resumed by running the same command again (it keeps the range and shard
+count it started with); `--restart` starts over. Events whose extraction
+failed are left unchanged and are retried by a later run with `--restart`.
+`--dry-run` only counts the events that would be re-extracted.
+"""
+
+import argparse
+import asyncio
+import hashlib
+from collections import Counter, defaultdict
+from datetime import UTC, datetime, timedelta
+from typing import Any, NamedTuple
+
+from pymongo import ASCENDING
+
+from app.data.connection import Database
+from app.extractors.context_faq_extractor import prepare_context_faq_data
+from app.extractors.core import EXTRACTION_PROMPT_VERSION, extract_answers_from_llm
+from app.extractors.targeted_faq_extractor import prepare_direct_faq_data
+from app.schemas.events import UsageEvent
+from app.utils.log import configure_logging
+from app.utils.metrics import record_extraction_outcome
+from app.utils.settings import Settings
+
+EVENT_TYPE = "faq"
+
+PROJECTION = {
+    "_id": 0,
+    "event_id": 1,
+    "timestamp": 1,
+    "payload.content": 1,
+    "payload.context": 1,
+    "payload.targetUserMessage": 1,
+    "extracted_answer": 1,
+    "extraction_prompt_version": 1,
+}
+
+
+class Shard(NamedTuple):
+    number: int
+    start: datetime
+    end: datetime
+    # Checkpointed progress: the last timestamp and event_id processed, or done
+    position: dict[str, Any]
+
+
+def selection_query(*, stale: bool, timeseries: bool) -> dict[str, Any]:
+    """
+    Query for the events to re-extract. Extraction results of events in a
+    time-series collection live in the enrichment collection, so those are
+    only filtered by `needs_extraction` after merging it in.
+    """
+    query: dict[str, Any] = {
+        "event_id": {"$type": "string"},
+        "payload.content": {"$type": "string"},
+    }
+    if timeseries:
+        return query
+
+    query["extraction_prompt_version"] = {"$ne": EXTRACTION_PROMPT_VERSION}
+    if not stale:
+        query["extracted_answer"] = {"$exists": False}
+    return query
+
+
+def needs_extraction(doc: dict[str, Any], *, stale: bool) -> bool:
+    if doc.get("extraction_prompt_version") == EXTRACTION_PROMPT_VERSION:
+        return False
+    return stale or "extracted_answer" not in doc
+
+
+def split_range(
+    start: datetime,
+    end: datetime,
+    shards: int,
+    positions: dict[str, dict[str, Any]] | None = None,
+) -> list[Shard]:
+    """
+    Splits [start, end) into `shards` equal time slices, starting from the
+    checkpointed `positions` (keyed by shard index) if given.
+    """
+    step = (end - start) / shards
+    return [
+        Shard(
+            index,
+            start + step * index,
+            end if index == shards - 1 else start + step * (index + 1),
+            (positions or {}).get(str(index), {}),
+        )
+        for index in range(shards)
+    ]
+
+
+async def timestamp_range(db: Database) -> tuple[datetime, datetime] | None:
+    """
+    Returns the timestamps of the oldest event and just after the newest one.
+    """
+    coll = db.get_collection(EVENT_TYPE)
+    first = await coll.find_one(
+        {"timestamp": {"$type": "date"}},
+        {"timestamp": 1},
+        sort=[("timestamp", ASCENDING)],
+    )
+    last = await coll.find_one(
+        {"timestamp": {"$type": "date"}},
+        {"timestamp": 1},
+        sort=[("timestamp", -1)],
+    )
+    if first is None or last is None:
+        return None
+    # BSON dates have millisecond precision
+    return (
+        first["timestamp"].replace(tzinfo=UTC),
+        last["timestamp"].replace(tzinfo=UTC) + timedelta(milliseconds=1),
+    )
+
+
+async def resolve_question(doc: dict[str, Any]) -> str | None:
+    """
+    Returns the direct user question of an event, or identifies one from
+    its context with the LLM (None if there is no relevant message).
+    """
+    event = UsageEvent(
+        event_type=EVENT_TYPE,
+        event_id=doc["event_id"],
+        payload=doc["payload"],
+    )
+    if direct_faq_data := prepare_direct_faq_data(event):
+        return direct_faq_data["user_question"]
+    if context_faq_data := await prepare_context_faq_data(event):
+        return context_faq_data["identified_question"]
+    return None
+
+
+async def extract_page(
+    docs: list[dict[str, Any]],
+    semaphore: asyncio.Semaphore,
+    group_size: int,
+) -> tuple[list[tuple[str, dict[str, Any]]], Counter[str]]:
+    """
+    Runs the FAQ pipeline for a page of events without writing anything.
+    Returns the (event_id, fields) updates and counts of the outcomes.
+    """
+    counts: Counter[str] = Counter()
+
+    async def limited_resolve(doc: dict[str, Any]) -> str | None:
+        async with semaphore:
+            return await resolve_question(doc)
+
+    resolved = await asyncio.gather(
+        *(limited_resolve(doc) for doc in docs),
+        return_exceptions=True,
+    )
+
+    updates: list[tuple[str, dict[str, Any]]] = []
+    by_document: defaultdict[str, list[tuple[dict[str, Any], str]]] = defaultdict(list)
+    for doc, question in zip(docs, resolved, strict=True):
+        if isinstance(question, BaseException):
+            counts["failed"] += 1
+        elif question is None:
+            counts["skipped"] += 1
+            updates.append(
+                (
+                    doc["event_id"],
+                    {
+                        "extraction_status": "skipped",
+                        "extraction_prompt_version": EXTRACTION_PROMPT_VERSION,
+                    },
+                ),
+            )
+        else:
+            content = doc["payload"]["content"]
+            key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            by_document[key].append((doc, question))
+
+    chunks = [
+        items[offset : offset + group_size]
+        for items in by_document.values()
+        for offset in range(0, len(items), group_size)
+    ]
+
+    async def limited_extract(
+        chunk: list[tuple[dict[str, Any], str]],
+    ) -> list[str | None]:
+        async with semaphore:
+            return await extract_answers_from_llm(
+                questions=[question for _, question in chunk],
+                context=chunk[0][0]["payload"]["content"],
+            )
+
+    extracted = await asyncio.gather(
+        *(limited_extract(chunk) for chunk in chunks),
+        return_exceptions=True,
+    )
+    for chunk, answers in zip(chunks, extracted, strict=True):
+        if isinstance(answers, BaseException):
+            counts["failed"] += len(chunk)
+            continue
+        for (doc, question), answer in zip(chunk, answers, strict=True):
+            update_fields = {
+                "identified_user_question": question,
+                "extraction_status": "answered" if answer is not None else "identified",
+                "extraction_prompt_version": EXTRACTION_PROMPT_VERSION,
+            }
+            if answer is not None:
+                update_fields["extracted_answer"] = answer
+            counts["answered" if answer is not None else "unanswered"] += 1
+            updates.append((doc["event_id"], update_fields))
+
+    return updates, counts
+
+
+async def reextract_shard(
+    db: Database,
+    shard: Shard,
+    checkpoint_id: str,
+    *,
+    stale: bool,
+    batch_size: int,
+    group_size: int,
+    semaphore: asyncio.Semaphore,
+    dry_run: bool,
+) -> Counter[str]:
+    """
+    Re-extracts the events of one shard, oldest first, resuming after the
+    last checkpointed position. Returns counts of the outcomes.
+    """
+    if shard.position.get("done"):
+        return Counter()
+
+    coll = db.get_collection(EVENT_TYPE)
+    checkpoints = db.get_internal_collection("migrations")
+    timeseries = await db.is_timeseries(EVENT_TYPE)
+    base_query = selection_query(stale=stale, timeseries=timeseries)
+    last_timestamp = shard.position.get("timestamp")
+    last_event_id = shard.position.get("last_event_id")
+
+    counts: Counter[str] = Counter()
+    while True:
+        query = {**base_query, "timestamp": {"$gte": shard.start, "$lt": shard.end}}
+        if last_timestamp is not None:
+            query["$or"] = [
+                {"timestamp": {"$gt": last_timestamp}},
+                {"timestamp": last_timestamp, "event_id": {"$gt": last_event_id}},
+            ]
+        batch = (
+            await coll.find(query, PROJECTION)
+            .sort([("timestamp", ASCENDING), ("event_id", ASCENDING)])
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+        last_timestamp = batch[-1]["timestamp"]
+        last_event_id = batch[-1]["event_id"]
+
+        await db.enrich_events(EVENT_TYPE, batch)
+        docs = [doc for doc in batch if needs_extraction(doc, stale=stale)]
+        if dry_run:
+            counts["pending"] += len(docs)
+            continue
+
+        updates, page_counts = await extract_page(docs, semaphore, group_size)
+        await db.update_events(EVENT_TYPE, updates)
+        await checkpoints.update_one(
+            {"_id": checkpoint_id},
+            {
+                "$set": {
+                    f"shards.{shard.number}": {
+                        "timestamp": last_timestamp,
+                        "last_event_id": last_event_id,
+                    },
+                },
+            },
+        )
+        counts += page_counts
+        for outcome in ("answered", "unanswered", "skipped"):
+            record_extraction_outcome(outcome, page_counts[outcome])
+
+    if not dry_run:
+        await checkpoints.update_one(
+            {"_id": checkpoint_id},
+            {"$set": {f"shards.{shard.number}.done": True}},
+        )
+    print(f"Shard {shard.number} ({shard.start} - {shard.end}): {dict(counts)}")
+    return counts
+
+
+async def load_shards(
+    db: Database,
+    checkpoint_id: str,
+    args: argparse.Namespace,
+) -> list[Shard] | None:
+    """
+    Returns the shards of the run, from its checkpoint when resuming, or
+    splits the requested range (recording it in a new checkpoint).
+    """
+    checkpoints = db.get_internal_collection("migrations")
+    if args.restart:
+        if not args.dry_run:
+            await checkpoints.delete_one({"_id": checkpoint_id})
+    elif checkpoint := await checkpoints.find_one({"_id": checkpoint_id}):
+        print(
+            f"Resuming run '{checkpoint_id}' started at {checkpoint['started_at']}",
+        )
+        return split_range(
+            checkpoint["start"].replace(tzinfo=UTC),
+            checkpoint["end"].replace(tzinfo=UTC),
+            checkpoint["shard_count"],
+            checkpoint["shards"],
+        )
+
+    bounds = await timestamp_range(db)
+    if bounds is None:
+        return None
+    start = args.start or bounds[0]
+    end = args.end or bounds[1]
+    if not args.dry_run:
+        await checkpoints.insert_one(
+            {
+                "_id": checkpoint_id,
+                "started_at": datetime.now(UTC),
+                "start": start,
+                "end": end,
+                "shard_count": args.shards,
+                "prompt_version": EXTRACTION_PROMPT_VERSION,
+                "shards": {},
+            },
+        )
+    return split_range(start, end, args.shards)
+
+
+def parse_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--stale",
+        action="store_true",
+        help="Also re-extract answered events extracted with older prompts",
+    )
+    parser.add_argument("--start", type=parse_datetime)
+    parser.add_argument("--end", type=parse_datetime)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--group-size", type=int, default=8)
+    parser.add_argument("--restart", action="store_true")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    settings = Settings()
+    log_listener = configure_logging(settings)
+    db = Database.from_settings(settings)
+    db.init()
+
+    mode = "stale" if args.stale else "missing"
+    checkpoint_id = f"reextract:{EVENT_TYPE}:{mode}:{EXTRACTION_PROMPT_VERSION}"
+    try:
+        shards = await load_shards(db, checkpoint_id, args)
+        if shards is None:
+            print("No FAQ events to re-extract")
+            return
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        results = await asyncio.gather(
+            *(
+                reextract_shard(
+                    db,
+                    shard,
+                    checkpoint_id,
+                    stale=args.stale,
+                    batch_size=args.batch_size,
+                    group_size=args.group_size,
+                    semaphore=semaphore,
+                    dry_run=args.dry_run,
+                )
+                for shard in shards
+            ),
+        )
+        total = sum(results, Counter())
+        if args.dry_run:
+            print(f"Would re-extract {total['pending']} events")
+        else:
+            print(f"Done (prompt version {EXTRACTION_PROMPT_VERSION}): {dict(total)}")
+    finally:
+        db.disconnect()
+        log_listener.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime
+from typing import Any
+
+from motor.motor_asyncio import AsyncIOMotorCursor
+
+from app.data.aggregations import validate_field_path
+
+DEFAULT_CSV_FIELDS = [
+    "event_type",
+    "event_id",
+    "timestamp",
+    "metadata",
+    "payload",
+    "extracted_answer",
+    "identified_user_question",
+    "extraction_status",
+]
+
+type BatchHook = Callable[[list[dict[str, Any]]], Awaitable[None]]
+
+
+def parse_fields(fields: str | None) -> list[str]:
+    """
+    Parses a comma-separated list of dotted field paths for projection.
+    Raises ValueError if a field is not a plain dotted path or is listed
+    together with one of its parents, which MongoDB rejects as a path
+    collision. Both are only reported once the cursor is iterated, i.e.
+    after the response has started.
+    """
+    if not fields:
+        return []
+
+    parsed = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    for field in parsed:
+        validate_field_path(field)
+    for field in parsed:
+        for other in parsed:
+            if other.startswith(f"{field}."):
+                raise ValueError(f"Field '{other}' is already included by '{field}'")
+    return parsed
+
+
+def get_field(doc: dict[str, Any], path: str) -> Any:  # noqa: ANN401
+    """
+    Resolves a dotted field path in a document, None if it is missing.
+    """
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def json_default(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:  # noqa: ANN401
+    if value is None:
+        return ""
+    if isinstance(value, dict | list):
+        return json.dumps(value, ensure_ascii=False, default=json_default)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def iter_ndjson(
+    cursor: AsyncIOMotorCursor,
+    batch_size: int,
+    enrich: BatchHook | None = None,
+) -> AsyncIterator[str]:
+    """
+    Streams documents as NDJSON, one chunk per batch of `batch_size` documents.
+    `enrich` is awaited on each batch before it is written.
+    """
+    while batch := await cursor.to_list(length=batch_size):
+        if enrich is not None:
+            await enrich(batch)
+        yield "".join(
+            json.dumps(doc, ensure_ascii=False, default=json_default) + "\n"
+            for doc in batch
+        )
+
+
+async def iter_csv(
+    cursor: AsyncIOMotorCursor,
+    batch_size: int,
+    fields: list[str],
+    enrich: BatchHook | None = None,
+) -> AsyncIterator[str]:
+    """
+    Streams documents as CSV with one column per field, one chunk per batch
+    of `batch_size` documents. Nested objects are written as JSON.
+    `enrich` is awaited on each batch before it is written.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+
+    while batch := await cursor.to_list(length=batch_size):
+        if enrich is not None:
+            await enrich(batch)
+        writer.writerows(
+            [_csv_value(get_field(doc, field)) for field in fields] for doc in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
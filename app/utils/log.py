@@ -0,0 +1,189 @@
+import contextlib
+import copy
+import logging
+import queue
+import random
+import sys
+import uuid
+from collections.abc import Iterator
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.settings import Settings
+
+# Correlation ids added to every log record of the current request or job
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+event_id_var: ContextVar[str | None] = ContextVar("event_id", default=None)
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# Attributes of every LogRecord; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)),
+) | {"message", "asctime", "request_id", "event_id"}
+
+
+@contextlib.contextmanager
+def bind_event_id(event_id: str | None) -> Iterator[None]:
+    """
+    Tags the log records emitted inside the block with an event id.
+    """
+    token = event_id_var.set(event_id)
+    try:
+        yield
+    finally:
+        event_id_var.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, the correlation
+    ids, the exception (if any) and the fields passed with `extra`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in ("request_id", "event_id"):
+            if value := getattr(record, name, None):
+                entry[name] = value
+        entry |= {
+            name: value
+            for name, value in vars(record).items()
+            if name not in _RECORD_ATTRIBUTES
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry, default=str, option=orjson.OPT_UTC_Z).decode()
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:  # noqa: N802
+        message = super().formatMessage(record)
+        ids = [
+            f"{name}={value}"
+            for name in ("request_id", "event_id")
+            if (value := getattr(record, name, None))
+        ]
+        return f"{message} [{' '.join(ids)}]" if ids else message
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the INFO and DEBUG records of the configured
+    loggers (and their children). Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        # Longest prefix first, so the most specific rate wins
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(f"{name}."):
+                return random.random() < rate  # noqa: S311
+        return True
+
+
+class CorrelatingQueueHandler(QueueHandler):
+    """
+    Queue handler that runs on the emitting thread (the event loop): it only
+    attaches the correlation ids and renders the message and traceback, so
+    the record no longer references mutable arguments. Serializing and
+    writing happen in the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Ids passed explicitly with `extra` take precedence
+        record.request_id = getattr(record, "request_id", None) or request_id_var.get()
+        record.event_id = getattr(record, "event_id", None) or event_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(settings: Settings) -> QueueListener:
+    """
+    Routes the records of the `app` loggers through a queue to a stdout
+    handler running in a background thread, so logging never blocks the
+    event loop on I/O. Levels are set per logger, so records below them
+    are dropped before their message is formatted.
+    Returns the started listener; stop it on shutdown to flush the queue.
+    """
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+    handler = CorrelatingQueueHandler(log_queue)
+    if settings.LOG_SAMPLE_RATES:
+        handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(
+        JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter(),
+    )
+
+    logger = logging.getLogger("app")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    return listener
+
+
+class RequestIdMiddleware:
+    """
+    Binds a request id (the X-Request-ID header, or a new one) to the log
+    records of the request and returns it in the X-Request-ID header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = REQUEST_ID_HEADER.encode()
+        request_id = (
+            next(
+                (value for name, value in scope["headers"] if name == header),
+                b"",
+            )[:128].decode("latin-1")
+            or uuid.uuid4().hex
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (header, request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,241 @@
+import os
+import time
+from collections.abc import Callable, Container
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Buckets in seconds, from fast cached reads up to slow LLM calls
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests per route template.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongo_command_duration_seconds",
+    "Latency of MongoDB commands per collection.",
+    ["command", "database", "collection", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_CALL_LATENCY = Histogram(
+    "llm_call_duration_seconds",
+    "Latency of LLM chat completion calls per model (rate limiter waits excluded).",
+    ["model", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens",
+    "Tokens used by LLM chat completion calls per model.",
+    ["model", "kind"],
+)
+EXTRACTION_OUTCOMES = Counter(
+    "extraction_outcomes",
+    "FAQ extraction results recorded on events.",
+    ["outcome"],
+)
+EXTRACTION_JOBS = Counter(
+    "extraction_jobs",
+    "Extraction jobs processed by the worker pools.",
+    ["kind", "outcome"],
+)
+QUESTION_PREFILTER_DECISIONS = Counter(
+    "question_prefilter_decisions",
+    "Question identifications by the local pre-filter decision.",
+    ["decision"],
+)
+EXTRACTION_QUEUE_DEPTH = Gauge(
+    "extraction_queue_depth",
+    "Extraction jobs in the durable queue per status.",
+    ["status"],
+    multiprocess_mode="mostrecent",
+)
+
+# Collection label of commands on collections of the events database that
+# are not known event types, or beyond the first MAX_COLLECTION_LABELS ones
+OTHER_COLLECTION = "other"
+MAX_COLLECTION_LABELS = 100
+
+# Commands issued by the driver itself, not by the service
+IGNORED_COMMANDS = frozenset(
+    {
+        "hello",
+        "ismaster",
+        "isMaster",
+        "ping",
+        "saslStart",
+        "saslContinue",
+        "endSessions",
+    },
+)
+
+
+def record_extraction_outcome(outcome: str, count: int = 1) -> None:
+    """
+    Counts FAQ extraction results: answered, unanswered, skipped or failed.
+    """
+    EXTRACTION_OUTCOMES.labels(outcome=outcome).inc(count)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    Registry to expose. Under gunicorn every worker writes its samples to
+    PROMETHEUS_MULTIPROC_DIR and the scraped worker aggregates all of them.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Returns the exposition of all metrics and its content type.
+    """
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Records the latency of every HTTP request, labelled with the route
+    template (e.g. /events/{event_type}/) rather than the path, so the number
+    of series stays bounded. Requests that matched no route are labelled
+    "unmatched".
+    """
+
+    def __init__(self, app: ASGIApp, *, excluded_paths: frozenset[str]) -> None:
+        self.app = app
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            ).observe(time.perf_counter() - start)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Command listener recording the latency of every MongoDB command per
+    collection. Registered on the client with `event_listeners`; it only
+    keeps the target of in-flight commands between their start and end.
+
+    Collections of the events database are named after client-supplied
+    event types, so they are labelled by name only if they are known event
+    types (see `watch_event_types`), at most MAX_COLLECTION_LABELS of them;
+    the others are labelled "other", which keeps the number of series bounded.
+    """
+
+    def __init__(self) -> None:
+        self._targets: dict[tuple[Any, int], tuple[str, str]] = {}
+        self._events_database: str | None = None
+        self._event_types: Callable[[], Container[str]] = frozenset
+        self._labelled: set[str] = set()
+
+    def watch_event_types(
+        self,
+        database: str,
+        event_types: Callable[[], Container[str]],
+    ) -> None:
+        """
+        Sets the events database and a function returning the known event
+        types, which must not block (it is called for every command).
+        """
+        self._events_database = database
+        self._event_types = event_types
+
+    def _collection_label(self, database: str, collection: str) -> str:
+        if database != self._events_database or collection in self._labelled:
+            return collection
+        if (
+            collection in self._event_types()
+            and len(self._labelled) < MAX_COLLECTION_LABELS
+        ):
+            self._labelled.add(collection)
+            return collection
+        return OTHER_COLLECTION if collection else collection
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        # getMore names the cursor id first and the collection separately
+        target = (
+            event.command.get("collection")
+            if event.command_name == "getMore"
+            else event.command.get(event.command_name)
+        )
+        collection = target if isinstance(target, str) else ""
+        self._targets[event.connection_id, event.request_id] = (
+            event.database_name,
+            self._collection_label(event.database_name, collection),
+        )
+
+    def _observe(
+        self,
+        event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent,
+        outcome: str,
+    ) -> None:
+        target = self._targets.pop((event.connection_id, event.request_id), None)
+        if target is None:
+            return
+        database, collection = target
+        MONGO_COMMAND_LATENCY.labels(
+            command=event.command_name,
+            database=database,
+            collection=collection,
+            outcome=outcome,
+        ).observe(event.duration_micros / 1_000_000)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._observe(event, "succeeded")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._observe(event, "failed")
@@ -0,0 +1,48 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any
+
+from bson import json_util
+
+SORT_KEYS = [("timestamp", -1), ("event_id", -1)]
+
+
+def encode_cursor(doc: dict[str, Any]) -> str:
+    """
+    Encodes the sort key of the last event of a page as an opaque token.
+    """
+    raw = json_util.dumps({"t": doc.get("timestamp"), "id": doc.get("event_id")})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, str]:
+    """
+    Decodes a token made by `encode_cursor` into (timestamp, event_id).
+    Raises ValueError if the token is malformed or its values are not a
+    date and a string, so no query operators can be smuggled in.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        key = json_util.loads(raw.decode("utf-8"))
+        timestamp, event_id = key["t"], key["id"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+    if not isinstance(timestamp, datetime) or not isinstance(event_id, str):
+        raise ValueError("Invalid pagination cursor")  # noqa: TRY004
+    return timestamp, event_id
+
+
+def keyset_filter(cursor: str) -> dict[str, Any]:
+    """
+    Returns the filter selecting the events that sort after the cursor,
+    newest first by (timestamp, event_id).
+    """
+    timestamp, event_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "event_id": {"$lt": event_id}},
+        ],
+    }
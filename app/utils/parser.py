@@ -1,7 +1,16 @@
+import json
 from typing import TypedDict
 
+from pydantic import ValidationError
+
 from app.schemas.events import UsageEvent
 
+NDJSON_CONTENT_TYPES = (
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+)
+
 
 class FaqEventData(TypedDict):
     user_question: str
@@ -33,3 +42,52 @@ def get_faq_event_data(event: UsageEvent) -> FaqEventData | None:
         return None
 
     return FaqEventData(user_question=user_question, document_content=document_content)
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    """
+    Flattens a Pydantic ValidationError into a single human-readable line.
+    """
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'body'}: {err['msg']}"
+        for err in exc.errors(include_url=False)
+    )
+
+
+def parse_event_batch(body: bytes, content_type: str) -> list[UsageEvent | str]:
+    """
+    Parses a batch request body, either a JSON array or an NDJSON stream
+    (one event per line), into usage events.
+    Entries that fail validation are returned as error strings at their position,
+    so a single bad event does not reject the whole batch.
+    Raises ValueError if the body itself is neither a JSON array nor NDJSON.
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    results: list[UsageEvent | str] = []
+
+    if media_type in NDJSON_CONTENT_TYPES:
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                results.append(UsageEvent.model_validate_json(line))
+            except ValidationError as exc:
+                results.append(format_validation_error(exc))
+        return results
+
+    try:
+        raw = json.loads(body)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Body is not valid JSON: {exc}") from exc
+
+    if not isinstance(raw, list):
+        raise ValueError(  # noqa: TRY004
+            "Body must be a JSON array of events or an NDJSON stream",
+        )
+
+    for item in raw:
+        try:
+            results.append(UsageEvent.model_validate(item))
+        except ValidationError as exc:
+            results.append(format_validation_error(exc))
+    return results
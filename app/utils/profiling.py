@@ -0,0 +1,126 @@
+import asyncio
+import functools
+import logging
+import random
+import re
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Literal
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+type ProfileFormat = Literal["html", "speedscope"]
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class ProfilerMiddleware:
+    """
+    Profiles requests with pyinstrument (a sampling profiler) and writes the
+    flame profile of slow ones to `output_dir`. A request is profiled when
+    it carries the `header` together with a valid `x-api-key` (as the
+    protected routes require), or otherwise with probability `sample_rate`.
+    Profiles of requests asking for it with the header are always written,
+    sampled ones only if the request took at least `slow_seconds`.
+    One request per process is profiled at a time. Needs the `profiling` extra.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        header: str,
+        api_key: str,
+        sample_rate: float,
+        slow_seconds: float,
+        output_dir: str,
+        output_format: ProfileFormat,
+    ) -> None:
+        try:
+            import pyinstrument  # noqa: F401, PLC0415
+        except ImportError as exc:
+            raise RuntimeError(
+                "PROFILING_ENABLED needs the 'profiling' extra (pyinstrument)",
+            ) from exc
+
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.api_key = api_key.encode("latin-1")
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.output_dir = Path(output_dir)
+        self.output_format = output_format
+        self._active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        requested = self.header in headers and headers.get(b"x-api-key") == self.api_key
+        if not requested and random.random() >= self.sample_rate:  # noqa: S311
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler  # noqa: PLC0415
+        from pyinstrument.renderers import (  # noqa: PLC0415
+            HTMLRenderer,
+            SpeedscopeRenderer,
+        )
+
+        profiler = Profiler(async_mode="enabled")
+        self._active = True
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            self._active = False
+
+        duration = time.perf_counter() - start
+        if not requested and duration < self.slow_seconds:
+            return
+
+        path = self._profile_path(scope, duration)
+        renderer = (
+            SpeedscopeRenderer()
+            if self.output_format == "speedscope"
+            else HTMLRenderer()
+        )
+        try:
+            # Rendering a profile takes a while, keep it off the event loop
+            await asyncio.to_thread(
+                self._save,
+                path,
+                functools.partial(profiler.output, renderer),
+            )
+        except Exception as e:
+            logger.warning("Failed to write profile %s: %s", path, e)
+        else:
+            logger.info(
+                "Wrote profile of a %.0fms request to %s",
+                duration * 1000,
+                path,
+            )
+
+    def _profile_path(self, scope: Scope, duration: float) -> Path:
+        route = getattr(scope.get("route"), "path", scope["path"])
+        name = _UNSAFE_FILENAME_CHARS.sub(
+            "_",
+            f"{datetime.now(UTC):%Y%m%dT%H%M%S.%f}-{scope['method']}-{route}"
+            f"-{duration * 1000:.0f}ms",
+        )
+        suffix = ".speedscope.json" if self.output_format == "speedscope" else ".html"
+        return self.output_dir / f"{name}{suffix}"
+
+    @staticmethod
+    def _save(path: Path, render: Callable[[], str]) -> None:
+        content = render()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import DESCENDING
+
+type CacheKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    headers: dict[str, str]
+
+
+def make_cache_key(event_type: str, params: Iterable[tuple[str, str]]) -> CacheKey:
+    """
+    Key of a cached query: the event type and its sorted query parameters.
+    """
+    return event_type, tuple(sorted(params))
+
+
+async def window_version(
+    coll: AsyncIOMotorCollection,
+    query: dict[str, Any],
+) -> tuple[datetime | None, int]:
+    """
+    Timestamp of the newest event and number of events matching a time
+    window query, which change whenever an event is added to the window.
+    The newest timestamp is read from the `timestamp` index, and so is the
+    count of a bounded window. An unbounded window (empty query) uses the
+    collection's metadata count instead of counting every event.
+    """
+    newest, count = await asyncio.gather(
+        coll.find_one(
+            query,
+            {"_id": 0, "timestamp": 1},
+            sort=[("timestamp", DESCENDING)],
+        ),
+        coll.count_documents(query) if query else coll.estimated_document_count(),
+    )
+    return (newest.get("timestamp") if newest else None), count
+
+
+def make_etag(
+    key: CacheKey,
+    newest: datetime | None,
+    count: int,
+    modified: int,
+) -> str:
+    """
+    Strong ETag of a query result, derived from the query, the version of
+    the time window it reads and the modification version of the event type
+    (see `Database.modification_version`), which changes when stored events
+    are updated, e.g. with extraction results.
+    """
+    material = json.dumps(
+        [key, newest.isoformat() if newest else None, count, modified],
+        ensure_ascii=False,
+    )
+    return f'"{hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag (weak comparison).
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class ResponseCache:
+    """
+    In-process LRU of serialized query responses, at most `max_entries`
+    kept for `ttl_seconds`. Entries of an event type are dropped by
+    `invalidate`, which ingest and the extraction result writes call after
+    writing to its collection; writes made by other processes (every
+    gunicorn worker has its own cache) are only picked up once the entries
+    expire.
+    A `ttl_seconds` of 0 disables the cache.
+    """
+
+    def __init__(self, *, max_entries: int = 1000, ttl_seconds: float = 10.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[CacheKey, tuple[CachedResponse, float]] = (
+            OrderedDict()
+        )
+        self._generations: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _generation_key(self, key: CacheKey) -> CacheKey:
+        event_type, params = key
+        generation = str(self._generations.get(event_type, 0))
+        return event_type, (*params, ("", generation))
+
+    def get(self, key: CacheKey) -> CachedResponse | None:
+        if not self.enabled:
+            return None
+
+        entry_key = self._generation_key(key)
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return None
+
+        response, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[entry_key]
+            return None
+
+        self._entries.move_to_end(entry_key)
+        return response
+
+    def set(self, key: CacheKey, response: CachedResponse) -> None:
+        if not self.enabled:
+            return
+
+        entry_key = self._generation_key(key)
+        self._entries[entry_key] = (response, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, event_type: str) -> None:
+        """
+        Drops every cached response of an event type. The stale entries are
+        left to be evicted by the LRU.
+        """
+        self._generations[event_type] = self._generations.get(event_type, 0) + 1
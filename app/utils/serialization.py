@@ -0,0 +1,29 @@
+from collections.abc import Iterable
+from typing import Any
+
+import orjson
+
+from app.schemas.events import UsageEvent
+
+EVENT_FIELDS = list(UsageEvent.model_fields)
+
+# Reads only what a UsageEvent returns, so extra stored fields never leak
+EVENT_PROJECTION = {"_id": 0, **dict.fromkeys(EVENT_FIELDS, 1)}
+
+_EMPTY_EVENT: dict[str, Any] = dict.fromkeys(EVENT_FIELDS)
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC
+
+
+def dump_events(docs: Iterable[dict[str, Any]]) -> bytes:
+    """
+    Serializes stored events as a JSON array of UsageEvent without
+    validating them again, as they were validated at ingest. The output
+    matches the validated one: missing optional fields are null and
+    datetimes are UTC with a `Z` suffix.
+    """
+    return orjson.dumps(
+        [{**_EMPTY_EVENT, **doc} for doc in docs],
+        default=str,
+        option=ORJSON_OPTIONS,
+    )
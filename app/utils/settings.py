@@ -1,5 +1,9 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
+type LogLevel = Literal["debug", "info", "warning", "error", "critical"]
+
 
 class Settings(BaseSettings):
     """
@@ -11,11 +15,110 @@ class Settings(BaseSettings):
     API_VERSION: str = "0.1.0"
 
     MONGO_URL: str = "mongodb://mongo:27017"
+    MONGO_DB_NAME: str = "usage_data"
+    MONGO_INTERNAL_DB_NAME: str = "usage_internal"
+    MONGO_MAX_POOL_SIZE: int | None = None
+    MONGO_MIN_POOL_SIZE: int | None = None
+    MONGO_MAX_IDLE_TIME_MS: int | None = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int | None = None
+    MONGO_COMPRESSORS: list[Literal["zstd", "snappy", "zlib"]] = []
+    MONGO_READ_PREFERENCE: (
+        Literal[
+            "primary",
+            "primaryPreferred",
+            "secondary",
+            "secondaryPreferred",
+            "nearest",
+        ]
+        | None
+    ) = None
+    MONGO_WRITE_CONCERN: int | Literal["majority"] | None = None
+    MONGO_WRITE_JOURNAL: bool | None = None
 
     API_KEY: str = "your_api_key_here"
 
     OPENAI_API_KEY: str = "your_openai_api_key_here"
 
+    LLM_BACKEND: Literal["openai", "stub"] = "openai"
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_RATE_LIMIT_PER_SECOND: float = 5.0
+    LLM_RATE_LIMIT_BURST: int = 10
+    LLM_STUB_LATENCY_MS: int = 0
+
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    LLM_CACHE_NEGATIVE_TTL_SECONDS: int = 24 * 3600
+
+    QUESTION_PREFILTER_ENABLED: bool = False
+    QUESTION_PREFILTER_TOP_K: int = 3
+    QUESTION_PREFILTER_MIN_SCORE: float = 0.15
+
+    EXTRACTION_WORKERS_ENABLED: bool = True
+    EXTRACTION_WORKER_CONCURRENCY: int = 4
+    EXTRACTION_POLL_INTERVAL_SECONDS: float = 1.0
+    EXTRACTION_LEASE_SECONDS: int = 300
+    EXTRACTION_MAX_ATTEMPTS: int = 5
+    EXTRACTION_BACKOFF_BASE_SECONDS: float = 2.0
+    EXTRACTION_BACKOFF_MAX_SECONDS: float = 600.0
+    EXTRACTION_JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
+    EXTRACTION_GROUP_MAX_SIZE: int = 8
+    EXTRACTION_GROUP_DELAY_SECONDS: float = 2.0
+    EXTRACTION_RESULT_BUFFER_ENABLED: bool = True
+    EXTRACTION_RESULT_BUFFER_MAX_BATCH: int = 200
+    EXTRACTION_RESULT_BUFFER_MAX_DELAY_MS: int = 100
+
+    INGEST_BATCH_MAX_EVENTS: int = 5000
+
+    INGEST_BUFFER_ENABLED: bool = False
+    INGEST_BUFFER_MAX_BATCH: int = 500
+    INGEST_BUFFER_MAX_DELAY_MS: int = 50
+    INGEST_BUFFER_MAX_PENDING: int = 10000
+    INGEST_BUFFER_FULL_TIMEOUT_MS: int = 1000
+    INGEST_FAST_ACK: bool = False
+    EVENT_WRITE_POLICIES: dict[
+        str,
+        Literal["unacknowledged", "acknowledged", "majority", "journaled"],
+    ] = {}
+
+    EVENT_INDEXES: dict[str, list[str]] = {}
+    EVENT_TYPES_CACHE_TTL_SECONDS: float = 30.0
+
+    TIMESERIES_ENABLED: bool = False
+    TIMESERIES_GRANULARITY: Literal["seconds", "minutes", "hours"] = "seconds"
+    EVENT_RETENTION_SECONDS: dict[str, int] = {}
+
+    EXPORT_BATCH_SIZE: int = 1000
+
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_TTL_SECONDS: float = 10.0
+
+    ANALYTICS_MAX_BUCKETS: int = 5000
+    ANALYTICS_MAX_TIME_MS: int = 30000
+
+    ROLLUP_ENABLED: bool = True
+    ROLLUP_DIMENSIONS: dict[str, list[str]] = {}
+    ROLLUP_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    METRICS_ENABLED: bool = True
+
+    LOG_LEVEL: LogLevel = "info"
+    LOG_LEVELS: dict[str, LogLevel] = {}
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_SAMPLE_RATES: dict[str, float] = {}
+
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: Literal["console", "file", "otlp"] = "console"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_SAMPLE_RATE: float = 1.0
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SLOW_REQUEST_MS: int = 500
+    PROFILING_OUTPUT_DIR: str = "profiles"
+    PROFILING_FORMAT: Literal["html", "speedscope"] = "html"
+
     ALLOWED_ORIGINS: list[str] = ["*"]
     EXPOSE_HEADERS: list[str] = ["*"]
 
@@ -0,0 +1,153 @@
+import contextlib
+import functools
+import sys
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.log import request_id_var
+from app.utils.settings import Settings
+
+# OpenTelemetry objects, set by `configure_tracing`. While they are None
+# (the default) spans are no-ops and OpenTelemetry is not imported.
+_tracer: Any = None
+_provider: Any = None
+_server_kind: Any = None
+
+
+def span(name: str, **attributes: Any) -> contextlib.AbstractContextManager[Any]:  # noqa: ANN401
+    """
+    Context manager recording the enclosed block as a child span of the
+    current one, if tracing is enabled.
+    """
+    if _tracer is None:
+        return contextlib.nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced[**P, R](
+    name: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """
+    Decorator recording every call of a coroutine function as a span.
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if _tracer is None:
+                return await func(*args, **kwargs)
+            with _tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def configure_tracing(settings: Settings) -> None:
+    """
+    Sets up an OpenTelemetry tracer provider exporting the spans of a
+    TRACING_SAMPLE_RATE fraction of the traces in a background thread:
+    to stdout, as JSON lines to TRACING_FILE, or to an OTLP/HTTP collector
+    (configured with the standard OTEL_EXPORTER_OTLP_* variables).
+    Needs the `tracing` extra.
+    """
+    global _tracer, _provider, _server_kind  # noqa: PLW0603
+
+    try:
+        from opentelemetry import trace  # noqa: PLC0415
+        from opentelemetry.sdk.resources import Resource  # noqa: PLC0415
+        from opentelemetry.sdk.trace import TracerProvider  # noqa: PLC0415
+        from opentelemetry.sdk.trace.export import (  # noqa: PLC0415
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+            SpanExporter,
+        )
+        from opentelemetry.sdk.trace.sampling import (  # noqa: PLC0415
+            ParentBased,
+            TraceIdRatioBased,
+        )
+    except ImportError as exc:
+        raise RuntimeError(
+            "TRACING_ENABLED needs the 'tracing' extra (opentelemetry-sdk)",
+        ) from exc
+
+    exporter: SpanExporter
+    if settings.TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (  # noqa: PLC0415
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter()
+    elif settings.TRACING_EXPORTER == "file":
+        exporter = ConsoleSpanExporter(
+            out=Path(settings.TRACING_FILE).open("a", encoding="utf-8"),  # noqa: SIM115
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        exporter = ConsoleSpanExporter(out=sys.stdout)
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.APP_TITLE}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATE)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    _tracer = _provider.get_tracer("app")
+    _server_kind = trace.SpanKind.SERVER
+
+
+def shutdown_tracing() -> None:
+    """
+    Exports the remaining spans and disables tracing.
+    """
+    global _tracer, _provider, _server_kind  # noqa: PLW0603
+
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = _server_kind = None
+
+
+class TracingMiddleware:
+    """
+    Starts the root span of every HTTP request, named after its route
+    template. Time spent outside the handler's own spans is routing, body
+    parsing and validation of the request model.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        with _tracer.start_as_current_span(
+            scope["method"],
+            kind=_server_kind,
+            attributes={
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+            },
+        ) as request_span:
+            if request_id := request_id_var.get():
+                request_span.set_attribute("request.id", request_id)
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute(
+                        "http.response.status_code",
+                        message["status"],
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if (route := getattr(scope.get("route"), "path", None)) is not None:
+                    request_span.update_name(f"{scope['method']} {route}")
+                    request_span.set_attribute("http.route", route)
@@ -0,0 +1,81 @@
+"""
+Compares two result files of benchmarks.suite, e.g. of two commits.
+
+Usage:
+    python -m benchmarks.compare before.json after.json
+    python -m benchmarks.compare before.json after.json --threshold 0.05
+
+Every throughput (`*_per_sec`, higher is better) and latency (`*_ms`, lower
+is better) metric present in both files is printed with its relative
+change. Exits with status 1 if any of them got worse by more than
+`--threshold`, so it can gate a CI job.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+
+def flatten(results: Any, prefix: str = "") -> dict[str, float]:  # noqa: ANN401
+    """
+    Maps dotted paths of the throughput and latency metrics to their values.
+    Entries of lists are keyed by their `page` or `window` field.
+    """
+    metrics: dict[str, float] = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            if key != "params":
+                metrics |= flatten(value, f"{prefix}{key}.")
+    elif isinstance(results, list):
+        for item in results:
+            label = item.get("page", item.get("window"))
+            metrics |= flatten(item, f"{prefix}{label}.")
+    elif isinstance(results, int | float) and prefix.endswith(("_per_sec.", "_ms.")):
+        metrics[prefix.rstrip(".")] = float(results)
+    return metrics
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    before_results = json.loads(args.before.read_text(encoding="utf-8"))
+    after_results = json.loads(args.after.read_text(encoding="utf-8"))
+    before = flatten(before_results)
+    after = flatten(after_results)
+
+    print(
+        f"{(before_results.get('commit') or '?')[:10]} -> "
+        f"{(after_results.get('commit') or '?')[:10]}",
+    )
+    regressions = []
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        change = (new - old) / old if old else 0.0
+        # For latencies an increase is a regression, for throughput a decrease
+        worse = change if name.endswith("_ms") else -change
+        marker = ""
+        if worse > args.threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        elif worse < -args.threshold:
+            marker = "  improved"
+        print(f"{name:45} {old:12,.1f} {new:12,.1f} {change:+8.1%}{marker}")
+
+    if regressions:
+        print(
+            f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}",
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
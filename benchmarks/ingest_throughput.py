@@ -0,0 +1,115 @@
+"""
+Compares ingest throughput (events/sec) of the single-event endpoint
+against the batch endpoint on a running instance of the service.
+
+Usage:
+    python -m benchmarks.ingest_throughput --url http://localhost:8088 --events 10000
+
+Non-FAQ events are used so the numbers are not skewed by LLM extraction.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import UTC, datetime
+from typing import Any
+
+import httpx
+
+
+def make_event(index: int) -> dict[str, Any]:
+    return {
+        "event_type": "benchmark_staff",
+        "event_id": str(uuid.uuid4()),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "metadata": {
+            "callerId": str(198249751001563136 + index % 500),
+            "channelId": "814540709612486676",
+            "commandName": "staff",
+            "guildId": "810997107376914444",
+        },
+        "payload": {
+            "keyword": f"Вработен {index % 200}",
+            "staff": {"name": f"Вработен {index % 200}", "cabinet": "Ф12"},
+        },
+    }
+
+
+async def bench_single(
+    client: httpx.AsyncClient,
+    events: list[dict[str, Any]],
+    concurrency: int,
+) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(event: dict[str, Any]) -> None:
+        async with semaphore:
+            response = await client.post("/events/ingest", json=event)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(event) for event in events))
+    return time.perf_counter() - start
+
+
+async def bench_batch(
+    client: httpx.AsyncClient,
+    events: list[dict[str, Any]],
+    batch_size: int,
+    concurrency: int,
+) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    batches = [events[i : i + batch_size] for i in range(0, len(events), batch_size)]
+
+    async def send(batch: list[dict[str, Any]]) -> None:
+        async with semaphore:
+            response = await client.post("/events/ingest/batch", json=batch)
+            response.raise_for_status()
+            if response.json()["failed"]:
+                raise RuntimeError(f"Batch had failures: {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(batch) for batch in batches))
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8088")
+    parser.add_argument("--api-key", default="your_api_key_here")
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        headers={"x-api-key": args.api_key},
+        timeout=60.0,
+    ) as client:
+        single_events = [make_event(i) for i in range(args.events)]
+        single_elapsed = await bench_single(client, single_events, args.concurrency)
+
+        batch_events = [make_event(i) for i in range(args.events)]
+        batch_elapsed = await bench_batch(
+            client,
+            batch_events,
+            args.batch_size,
+            args.concurrency,
+        )
+
+    single_rate = args.events / single_elapsed
+    batch_rate = args.events / batch_elapsed
+    print(
+        f"single: {args.events} events in {single_elapsed:.2f}s ({single_rate:.0f} ev/s)",
+    )
+    print(
+        f"batch ({args.batch_size}/req): {args.events} events in {batch_elapsed:.2f}s "
+        f"({batch_rate:.0f} ev/s)",
+    )
+    print(f"speedup: {batch_rate / single_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Compares page latency of offset (`skip`) and keyset (`cursor`) pagination
+of `GET /events/{event_type}/` at increasing depths, on a running instance
+of the service.
+
+Usage:
+    python -m benchmarks.pagination_depth --url http://localhost:8088 --events 200000
+
+Seeds `--events` events through the batch endpoint (skip with `--no-seed` to
+reuse a previous run), then walks all pages with the cursor and fetches the
+same pages with `skip`. Cursor page latency should stay flat with depth.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import httpx
+
+EVENT_TYPE = "benchmark_pagination"
+
+
+def make_event(index: int, start: datetime) -> dict[str, Any]:
+    return {
+        "event_type": EVENT_TYPE,
+        "event_id": str(uuid.uuid4()),
+        "timestamp": (start + timedelta(milliseconds=index * 10)).isoformat(),
+        "metadata": {"callerId": str(198249751001563136 + index % 500)},
+        "payload": {"keyword": f"Вработен {index % 200}"},
+    }
+
+
+async def seed(client: httpx.AsyncClient, events: int, batch_size: int) -> None:
+    start = datetime.now(UTC) - timedelta(days=30)
+    for offset in range(0, events, batch_size):
+        batch = [
+            make_event(index, start)
+            for index in range(offset, min(offset + batch_size, events))
+        ]
+        response = await client.post("/events/ingest/batch", json=batch)
+        response.raise_for_status()
+
+
+async def timed_get(
+    client: httpx.AsyncClient,
+    params: dict[str, Any],
+) -> tuple[float, httpx.Response]:
+    start = time.perf_counter()
+    response = await client.get(f"/events/{EVENT_TYPE}/", params=params)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed, response
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--url", default="http://localhost:8088")
+    parser.add_argument("--api-key", default="your_api_key_here")
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        headers={"x-api-key": args.api_key},
+        timeout=120.0,
+    ) as client:
+        if not args.no_seed:
+            await seed(client, args.events, batch_size=1000)
+
+        pages = args.events // args.page_size
+        sample_pages = sorted(
+            {
+                round(i * (pages - 1) / max(args.samples - 1, 1))
+                for i in range(args.samples)
+            },
+        )
+
+        cursor_latency: dict[int, float] = {}
+        cursor = None
+        for page in range(pages):
+            params: dict[str, Any] = {"limit": args.page_size}
+            if cursor:
+                params["cursor"] = cursor
+            elapsed, response = await timed_get(client, params)
+            if page in sample_pages:
+                cursor_latency[page] = elapsed
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+
+        skip_latency = {
+            page: (
+                await timed_get(
+                    client,
+                    {"limit": args.page_size, "skip": page * args.page_size},
+                )
+            )[0]
+            for page in sample_pages
+        }
+
+    print(f"{'depth':>10} {'skip ms':>10} {'cursor ms':>10}")
+    for page in sample_pages:
+        print(
+            f"{page * args.page_size:>10} {skip_latency[page] * 1000:>10.1f} "
+            f"{cursor_latency.get(page, float('nan')) * 1000:>10.1f}",
+        )
+
+    cursor_values = list(cursor_latency.values())
+    print(
+        f"cursor latency: median {statistics.median(cursor_values) * 1000:.1f}ms, "
+        f"max {max(cursor_values) * 1000:.1f}ms",
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
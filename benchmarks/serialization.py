@@ -0,0 +1,108 @@
+"""
+Compares how fast a page of stored events is serialized (rows/sec) by the
+response paths `list_events` has used, without MongoDB or a server:
+
+- validated: revalidate against `response_model=list[UsageEvent]`, then
+  `jsonable_encoder` and `json.dumps` (FastAPI's default path)
+- pydantic: revalidate, then dump with pydantic-core
+- trusted: dump the Mongo documents with orjson as-is (the current path)
+
+Usage:
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+
+import argparse
+import json
+import time
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.schemas.events import UsageEvent
+from app.utils.serialization import dump_events
+
+EVENT_LIST_ADAPTER = TypeAdapter(list[UsageEvent])
+
+
+def make_document(index: int, now: datetime) -> dict[str, Any]:
+    """
+    A stored FAQ event as read from Mongo (native datetime, no `_id`).
+    """
+    return {
+        "event_type": "faq",
+        "event_id": str(uuid.uuid4()),
+        "timestamp": now - timedelta(seconds=index),
+        "metadata": {
+            "callerId": str(198249751001563136 + index % 500),
+            "guildId": "810997107376914444",
+        },
+        "payload": {
+            "content": "Испитната сесија трае две недели. " * 20,
+            "targetUserMessage": {"content": f"Колку трае сесијата {index}?"},
+        },
+        "identified_user_question": f"Колку трае сесијата {index}?",
+        "extracted_answer": "Две недели.",
+        "extraction_status": "answered",
+    }
+
+
+def validated(docs: list[dict[str, Any]]) -> bytes:
+    events = EVENT_LIST_ADAPTER.validate_python(docs)
+    return json.dumps(jsonable_encoder(events), ensure_ascii=False).encode("utf-8")
+
+
+def pydantic(docs: list[dict[str, Any]]) -> bytes:
+    return EVENT_LIST_ADAPTER.dump_json(EVENT_LIST_ADAPTER.validate_python(docs))
+
+
+def trusted(docs: list[dict[str, Any]]) -> bytes:
+    return dump_events(docs)
+
+
+def measure(
+    serialize: Callable[[list[dict[str, Any]]], bytes],
+    docs: list[dict[str, Any]],
+    repeat: int,
+) -> float:
+    """
+    Best rows/sec over `repeat` runs.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serialize(docs)
+        best = min(best, time.perf_counter() - start)
+    return len(docs) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    now = datetime.now(UTC)
+    docs = [make_document(index, now) for index in range(args.rows)]
+
+    assert json.loads(trusted(docs)) == json.loads(pydantic(docs))  # noqa: S101
+
+    baseline = None
+    for name, serialize in (
+        ("validated", validated),
+        ("pydantic", pydantic),
+        ("trusted", trusted),
+    ):
+        rate = measure(serialize, docs, args.repeat)
+        baseline = baseline or rate
+        print(f"{name:>10}: {rate:>12,.0f} rows/sec  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
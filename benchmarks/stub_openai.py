@@ -0,0 +1,92 @@
+"""
+Minimal OpenAI-compatible chat completions server for benchmarks, so the
+real OpenAI client, HTTP round trip and response parsing are exercised
+without calling the API. Answers come from `StubChatClient`.
+
+Usage:
+    python -m benchmarks.stub_openai --port 18089 --latency-ms 300
+
+Point the service at it with OPENAI_BASE_URL=http://127.0.0.1:18089/v1.
+`GET /stats` returns the number of completions served.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+from app.extractors.llm import StubChatClient
+
+
+def make_app(latency: float, jitter: float) -> FastAPI:
+    app = FastAPI()
+    client = StubChatClient()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> dict[str, Any]:
+        body = await request.json()
+        if latency or jitter:
+            await asyncio.sleep(latency + random.uniform(0, jitter))  # noqa: S311
+
+        content = await client.complete(
+            body["messages"],
+            body["model"],
+            body.get("max_tokens") or 256,
+            response_format=body.get("response_format"),
+        )
+        prompt_tokens = sum(
+            len(str(message.get("content", ""))) // 4 for message in body["messages"]
+        )
+        completion_tokens = len(content or "") // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                },
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.get("/stats")
+    async def stats() -> dict[str, int]:
+        return {"completions": client.calls}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18089)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        make_app(args.latency_ms / 1000, args.jitter_ms / 1000),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Reproducible benchmark suite: ingest, query and extraction throughput of the
+service, run with gunicorn against a local mongod and a stub OpenAI server.
+
+Usage:
+    python -m benchmarks.suite --events 100000
+    python -m benchmarks.suite --events 10000000 --workers 4 --output results.json
+    python -m benchmarks.compare before.json after.json
+
+1. ingest: `--events` synthetic faq/staff/course/office events, spread over
+   the last `--days` days, are sent through the batch endpoint from
+   `--concurrency` connections, then `--single-events` through the
+   single-event endpoint. Extraction workers are off, and the jobs queued
+   for the seeded FAQ events are dropped afterwards.
+2. list_events: p50/p99 latency of pages of `--query-event-type` at
+   increasing cursor depths, and of the first page of time windows of
+   increasing size. The response cache is disabled.
+3. extraction: `--extraction-events` new FAQ events are ingested with
+   extraction workers on; the time until the job queue drains gives the
+   pipeline throughput. LLM calls go through the OpenAI client to the stub
+   server (`--llm-latency-ms`), with the LLM cache and rate limit off.
+
+Results, with the parameters and the git commit, are written as JSON to
+`--output` (by default benchmarks/results/<time>-<commit>.json). The
+benchmark databases are dropped at the end unless `--keep-data` is given.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks.synthetic import generate_events
+from benchmarks.worker_scaling import start_service, wait_until_healthy
+
+DB_NAME = "benchmark_suite_usage_data"
+INTERNAL_DB_NAME = "benchmark_suite_usage_internal"
+
+PAGE_DEPTHS = [1, 10, 100, 1000]
+WINDOWS = {
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+    "365d": timedelta(days=365),
+}
+
+
+def git_revision() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],  # noqa: S607
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip(),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "samples": len(latencies),
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def service_env(args: argparse.Namespace, *, extraction: bool) -> dict[str, str]:
+    return {
+        "MONGO_DB_NAME": DB_NAME,
+        "MONGO_INTERNAL_DB_NAME": INTERNAL_DB_NAME,
+        "INGEST_BATCH_MAX_EVENTS": str(max(args.batch_size, 5000)),
+        "RESPONSE_CACHE_TTL_SECONDS": "0",
+        "LLM_BACKEND": "openai",
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.llm_port}/v1",
+        "LLM_CACHE_ENABLED": "false",
+        "LLM_RATE_LIMIT_PER_SECOND": "0",
+        "EXTRACTION_WORKERS_ENABLED": str(extraction).lower(),
+        "EXTRACTION_WORKER_CONCURRENCY": str(args.extraction_concurrency),
+        "EXTRACTION_GROUP_DELAY_SECONDS": "0",
+        "EXTRACTION_POLL_INTERVAL_SECONDS": "0.1",
+    }
+
+
+def start_llm_server(port: int, latency_ms: float) -> subprocess.Popen:
+    return subprocess.Popen(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.stub_openai",
+            "--port",
+            str(port),
+            "--latency-ms",
+            str(latency_ms),
+        ],
+    )
+
+
+def make_client(args: argparse.Namespace) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{args.port}",
+        headers={"x-api-key": args.api_key},
+        timeout=120.0,
+        limits=httpx.Limits(max_connections=args.concurrency),
+    )
+
+
+async def bench_ingest(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    end: datetime,
+) -> dict[str, Any]:
+    batches = itertools.batched(
+        generate_events(
+            args.events,
+            start=end - timedelta(days=args.days),
+            end=end,
+            seed=args.seed,
+        ),
+        args.batch_size,
+        strict=False,
+    )
+
+    async def send_batches() -> None:
+        # The loops share the generator, each takes the next batch
+        for batch in batches:
+            response = await client.post("/events/ingest/batch", json=batch)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send_batches() for _ in range(args.concurrency)))
+    batch_seconds = time.perf_counter() - start
+    print(f"Batch ingest: {args.events / batch_seconds:,.0f} events/sec")
+
+    singles = generate_events(
+        args.single_events,
+        start=end - timedelta(minutes=1),
+        end=end,
+        seed=args.seed + 1,
+    )
+    latencies: list[float] = []
+
+    async def send_singles() -> None:
+        for event in singles:
+            request_start = time.perf_counter()
+            response = await client.post("/events/ingest", json=event)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - request_start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send_singles() for _ in range(args.concurrency)))
+    single_seconds = time.perf_counter() - start
+    print(f"Single ingest: {args.single_events / single_seconds:,.0f} events/sec")
+
+    return {
+        "events": args.events,
+        "batch_size": args.batch_size,
+        "batch_events_per_sec": args.events / batch_seconds,
+        "single_events": args.single_events,
+        "single_events_per_sec": args.single_events / single_seconds,
+        "single": latency_summary(latencies),
+    }
+
+
+async def timed_get(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict[str, Any],
+) -> tuple[float, httpx.Response]:
+    start = time.perf_counter()
+    response = await client.get(url, params=params)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed, response
+
+
+async def bench_list_events(
+    client: httpx.AsyncClient,
+    args: argparse.Namespace,
+    end: datetime,
+) -> dict[str, Any]:
+    url = f"/events/{args.query_event_type}/"
+    by_depth = []
+    cursor: str | None = None
+    page = 1
+    for depth in PAGE_DEPTHS:
+        # Walk the cursor pages up to the depth, then time that page
+        while page < depth and (page == 1 or cursor):
+            _, response = await timed_get(
+                client,
+                url,
+                {"limit": args.page_size} | ({"cursor": cursor} if cursor else {}),
+            )
+            cursor = response.headers.get("x-next-cursor")
+            page += 1
+        if page < depth or (depth > 1 and not cursor):
+            break
+
+        params = {"limit": args.page_size} | ({"cursor": cursor} if cursor else {})
+        latencies = [
+            (await timed_get(client, url, params))[0] for _ in range(args.samples)
+        ]
+        by_depth.append({"page": depth, **latency_summary(latencies)})
+        print(f"list_events page {depth}: p50 {by_depth[-1]['p50_ms']:.1f}ms")
+
+    by_window = []
+    for name, window in WINDOWS.items():
+        if window > timedelta(days=args.days):
+            break
+        params = {
+            "limit": args.page_size,
+            "start_time": (end - window).isoformat(),
+            "end_time": end.isoformat(),
+        }
+        latencies = [
+            (await timed_get(client, url, params))[0] for _ in range(args.samples)
+        ]
+        by_window.append({"window": name, **latency_summary(latencies)})
+        print(f"list_events window {name}: p50 {by_window[-1]['p50_ms']:.1f}ms")
+
+    return {
+        "event_type": args.query_event_type,
+        "page_size": args.page_size,
+        "by_depth": by_depth,
+        "by_window": by_window,
+    }
+
+
+async def bench_extraction(
+    client: httpx.AsyncClient,
+    llm: httpx.AsyncClient,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    now = datetime.now(UTC)
+    events = list(
+        generate_events(
+            args.extraction_events,
+            start=now - timedelta(minutes=1),
+            end=now,
+            event_type="faq",
+            seed=args.seed + 2,
+        ),
+    )
+    completions_before = (await llm.get("/stats")).json()["completions"]
+
+    start = time.perf_counter()
+    for batch in itertools.batched(events, args.batch_size, strict=False):
+        response = await client.post("/events/ingest/batch", json=batch)
+        response.raise_for_status()
+
+    deadline = start + args.extraction_timeout
+    while True:
+        queue = (await client.get("/extraction/stats")).json()["queue"]
+        finished = queue["done"] + queue["failed"]
+        if not queue["queued"] and not queue["running"] and finished:
+            break
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"Extraction queue did not drain: {queue}")
+        await asyncio.sleep(0.2)
+    seconds = time.perf_counter() - start
+
+    completions = (await llm.get("/stats")).json()["completions"] - completions_before
+    print(f"Extraction: {args.extraction_events / seconds:,.1f} events/sec")
+    return {
+        "events": args.extraction_events,
+        "seconds": seconds,
+        "events_per_sec": args.extraction_events / seconds,
+        "failed_jobs": queue["failed"],
+        "llm_completions": completions,
+    }
+
+
+async def run_phase(
+    args: argparse.Namespace,
+    *,
+    extraction: bool,
+) -> subprocess.Popen:
+    process = start_service(
+        args.workers,
+        args.port,
+        args.mongo_url,
+        service_env(args, extraction=extraction),
+    )
+    async with make_client(args) as client:
+        await wait_until_healthy(client, max_wait=30.0)
+    return process
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    process.wait(timeout=30)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--api-key", default="your_api_key_here")
+    parser.add_argument("--port", type=int, default=18088)
+    parser.add_argument("--llm-port", type=int, default=18089)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--single-events", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--query-event-type", default="faq")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--extraction-events", type=int, default=2000)
+    parser.add_argument("--extraction-concurrency", type=int, default=8)
+    parser.add_argument("--extraction-timeout", type=float, default=900.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--keep-data", action="store_true")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    started_at = datetime.now(UTC)
+    results: dict[str, Any] = {
+        **revision,
+        "started_at": started_at.isoformat(),
+        "params": {
+            name: str(value) if isinstance(value, Path) else value
+            for name, value in vars(args).items()
+            if name != "api_key"
+        },
+    }
+
+    llm_server = start_llm_server(args.llm_port, args.llm_latency_ms)
+    mongo: AsyncIOMotorClient = AsyncIOMotorClient(args.mongo_url)
+    try:
+        await mongo.drop_database(DB_NAME)
+        await mongo.drop_database(INTERNAL_DB_NAME)
+        end = datetime.now(UTC)
+
+        service = await run_phase(args, extraction=False)
+        try:
+            async with make_client(args) as client:
+                results["ingest"] = await bench_ingest(client, args, end)
+                # Seeded FAQ events are history; only phase 3 extracts
+                await mongo[INTERNAL_DB_NAME].extraction_jobs.delete_many({})
+                results["list_events"] = await bench_list_events(client, args, end)
+        finally:
+            stop(service)
+
+        service = await run_phase(args, extraction=True)
+        try:
+            async with (
+                make_client(args) as client,
+                httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.llm_port}") as llm,
+            ):
+                results["extraction"] = await bench_extraction(client, llm, args)
+        finally:
+            stop(service)
+    finally:
+        llm_server.terminate()
+        llm_server.wait(timeout=30)
+        if not args.keep_data:
+            await mongo.drop_database(DB_NAME)
+            await mongo.drop_database(INTERNAL_DB_NAME)
+        mongo.close()
+
+    output = args.output or Path(
+        "benchmarks",
+        "results",
+        f"{started_at:%Y%m%dT%H%M%S}-{(revision['commit'] or 'unknown')[:10]}.json",
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,247 @@
+"""
+Synthetic usage events shaped like the `faq`, `staff`, `office` and `course`
+events sent by the Discord bot (see the examples in docs/DOCS.md).
+
+Events are generated deterministically from their index and a seed, with
+timestamps spread evenly over a time range, so runs with the same
+parameters store the same data.
+"""
+
+import random
+import uuid
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from typing import Any
+
+# Share of each event type in the generated stream
+EVENT_TYPE_WEIGHTS = {"faq": 0.4, "staff": 0.3, "course": 0.2, "office": 0.1}
+
+GUILD_ID = "810997107376914444"
+CHANNEL_IDS = ["814540709612486676", "814540709612486677", "923611459207426128"]
+
+FAQ_DOCUMENTS = [
+    (
+        "Студентска служба",
+        (
+            "Студентската служба е достапна секој работен ден, од **09:00 до 12:00 часот**. "
+            "Просторијата на Студентската служба се наоѓа во ТМФ, до кабинетот 117.\n\n"
+            "Контакт:\n- Електронска пошта: `studentski@finki.ukim.mk`\n"
+            "- Број: `070 302 440` (ретко работи, само од 13:00 до 15:00 часот)"
+        ),
+        ["kade se naogja studentskata sluzba", "koga raboti studentska"],
+    ),
+    (
+        "Испитна сесија",
+        (
+            "Испитните сесии се во јануари, јуни и септември и траат по две недели. "
+            "Пријавувањето на испити се врши преку iKnow најдоцна 7 дена пред сесијата."
+        ),
+        ["kolku trae ispitnata sesija", "do koga se prijavuvaat ispiti"],
+    ),
+    (
+        "Магистерски студии",
+        (
+            "Еден семестар на магистерски студии чини 30.000 денари. "
+            "Школарината се плаќа во две рати, на почетокот на секој семестар."
+        ),
+        ["kolku chini 1 semestar na magisterski", "dali moze na rati skolarinata"],
+    ),
+    (
+        "Запишување семестар",
+        (
+            "Семестарот се запишува електронски преку iKnow во првите две недели од семестарот. "
+            "По тој рок запишувањето е можно само со молба до продеканот за настава."
+        ),
+        ["kako da zapisam semestar", "do koga se zapisuva semestar"],
+    ),
+    (
+        "Стипендии",
+        (
+            "Конкурсот за државни стипендии се објавува на почетокот на академската година. "
+            "Документите се поднесуваат во Министерството за образование и наука."
+        ),
+        [
+            "koga izleguva konkursot za stipendii",
+            "kade se predavaat dokumenti za stipendija",
+        ],
+    ),
+]
+
+STAFF_NAMES = [
+    ("Георгина Мирчева", "georgina.mirceva", "Редовен професор"),
+    ("Иван Чорбев", "ivan.chorbev", "Редовен професор"),
+    ("Ана Мадевска Богданова", "ana.madevska.bogdanova", "Редовен професор"),
+    ("Бобан Јоксимоски", "boban.joksimoski", "Вонреден професор"),
+    ("Марија Михова", "marija.mihova", "Вонреден професор"),
+    ("Петре Ламески", "petre.lameski", "Вонреден професор"),
+]
+
+COURSES = [
+    ("F18L1W020", "Структурно програмирање", 1),
+    ("F18L1W031", "Бизнис и менаџмент", 1),
+    ("F18L2W001", "Објектно-ориентирано програмирање", 2),
+    ("F18L2S017", "Алгоритми и податочни структури", 3),
+    ("F18L3W004", "Бази на податоци", 4),
+    ("F18L3S030", "Оперативни системи", 5),
+    ("F18L3S116", "Веб програмирање", 5),
+]
+
+OFFICES = [
+    ("Студентска служба", "ТМФ", "117"),
+    ("Деканат", "ФИНКИ", "2"),
+    ("Библиотека", "ТМФ", "200"),
+    ("Лабораторија 138", "ФИНКИ", "138"),
+]
+
+
+def _metadata(rng: random.Random, command: str) -> dict[str, str]:
+    return {
+        "callerId": str(198249751001563136 + rng.randrange(5000)),
+        "channelId": rng.choice(CHANNEL_IDS),
+        "commandName": command,
+        "guildId": GUILD_ID,
+    }
+
+
+def _context(
+    rng: random.Random,
+    timestamp: datetime,
+    question: str,
+) -> list[dict[str, str]]:
+    """
+    A few chat messages preceding the command, the last one (or one of the
+    last ones) being the question.
+    """
+    filler = ["zdravo", "dali nekoj znae", "fala mnogu", "ok", "imam prasanje"]
+    messages = [rng.choice(filler) for _ in range(rng.randrange(0, 4))]
+    messages.insert(
+        len(messages) - rng.randrange(0, min(2, len(messages) + 1)),
+        question,
+    )
+    return [
+        {
+            "authorId": str(198249751001563136 + rng.randrange(5000)),
+            "content": content,
+            "messageId": str(1386733822363832415 + rng.randrange(10**9)),
+            "timestamp": (timestamp - timedelta(seconds=30 * (len(messages) - i)))
+            .isoformat()
+            .replace("+00:00", "Z"),
+        }
+        for i, content in enumerate(messages)
+    ]
+
+
+def make_faq_payload(rng: random.Random, timestamp: datetime) -> dict[str, Any]:
+    keyword, content, questions = rng.choice(FAQ_DOCUMENTS)
+    question = rng.choice(questions)
+    payload: dict[str, Any] = {
+        "content": content,
+        "keyword": keyword,
+        "question": keyword,
+        "context": _context(rng, timestamp, question),
+    }
+    # About half the commands reply to a message, which makes it the question
+    if rng.random() < 0.5:
+        payload["targetUserMessage"] = {
+            "authorId": str(198249751001563136 + rng.randrange(5000)),
+            "content": question,
+        }
+    return payload
+
+
+def make_staff_payload(rng: random.Random, timestamp: datetime) -> dict[str, Any]:
+    name, handle, position = rng.choice(STAFF_NAMES)
+    return {
+        "keyword": name,
+        "staff": {
+            "cabinet": f"Ф{rng.randrange(1, 40)}",
+            "consultations": f"https://consultations.finki.ukim.mk/display/{handle}",
+            "email": f"{handle}@finki.ukim.mk",
+            "name": name,
+            "position": position,
+            "profile": f"https://www.finki.ukim.mk/mk/staff/{handle.replace('.', '-')}",
+            "title": "д-р",
+        },
+        "context": _context(
+            rng,
+            timestamp,
+            f"koj e kabinetot na {handle.split('.')[0]}",
+        ),
+    }
+
+
+def make_course_payload(rng: random.Random, timestamp: datetime) -> dict[str, Any]:
+    code, name, semester = rng.choice(COURSES)
+    return {
+        "keyword": name,
+        "course": {
+            "code": code,
+            "name": name,
+            "semester": semester,
+            "credits": 6,
+            "link": f"https://courses.finki.ukim.mk/course/search.php?search={code}",
+        },
+        "context": _context(rng, timestamp, f"koj predava {name.split()[0].lower()}"),
+    }
+
+
+def make_office_payload(rng: random.Random, timestamp: datetime) -> dict[str, Any]:
+    name, building, room = rng.choice(OFFICES)
+    return {
+        "keyword": name,
+        "office": {"name": name, "building": building, "room": room},
+        "context": _context(rng, timestamp, f"kade e {name.split()[0].lower()}"),
+    }
+
+
+PAYLOAD_FACTORIES = {
+    "faq": make_faq_payload,
+    "staff": make_staff_payload,
+    "course": make_course_payload,
+    "office": make_office_payload,
+}
+
+
+def make_event(
+    index: int,
+    timestamp: datetime,
+    *,
+    event_type: str | None = None,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    The `index`-th synthetic event, of a random type (by EVENT_TYPE_WEIGHTS)
+    unless `event_type` is given.
+    """
+    rng = random.Random(seed * 1_000_003 + index)  # noqa: S311
+    event_type = (
+        event_type
+        or rng.choices(
+            list(EVENT_TYPE_WEIGHTS),
+            weights=list(EVENT_TYPE_WEIGHTS.values()),
+        )[0]
+    )
+    return {
+        "event_type": event_type,
+        "event_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "timestamp": timestamp.isoformat().replace("+00:00", "Z"),
+        "metadata": _metadata(rng, event_type),
+        "payload": PAYLOAD_FACTORIES[event_type](rng, timestamp),
+    }
+
+
+def generate_events(
+    count: int,
+    *,
+    start: datetime,
+    end: datetime,
+    event_type: str | None = None,
+    seed: int = 0,
+) -> Iterator[dict[str, Any]]:
+    """
+    `count` events with timestamps spread evenly from `start` to `end`,
+    oldest first.
+    """
+    step = (end - start) / max(count, 1)
+    for index in range(count):
+        yield make_event(index, start + step * index, event_type=event_type, seed=seed)
@@ -0,0 +1,185 @@
+"""
+Measures how request throughput scales with the number of gunicorn workers.
+
+Usage:
+    python -m benchmarks.worker_scaling --mongo-url mongodb://localhost:27017
+    python -m benchmarks.worker_scaling --workers 1 2 4 8 --duration 30 --concurrency 128
+
+For every worker count the service is started with gunicorn.conf.py on a
+local port, against a local mongod and throwaway databases (dropped
+afterwards), with extraction workers disabled and the stub LLM backend.
+A pure-asyncio client then sends a mix of single ingests and `list_events`
+reads (`--read-ratio`) from `--concurrency` connections for `--duration`
+seconds, and requests/sec and latency percentiles are reported.
+Pool settings (MONGO_MAX_POOL_SIZE etc.) are passed through from the
+environment, so profiles can be compared by re-running with other values.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks.ingest_throughput import make_event
+
+DB_NAME = "benchmark_usage_data"
+INTERNAL_DB_NAME = "benchmark_usage_internal"
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, max_wait: float) -> None:
+    deadline = time.monotonic() + max_wait
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/health/health")
+            if response.status_code == httpx.codes.OK:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("Service did not become healthy")
+
+
+def start_service(
+    workers: int,
+    port: int,
+    mongo_url: str,
+    env_overrides: dict[str, str] | None = None,
+) -> subprocess.Popen:
+    """
+    Starts the service with gunicorn against the benchmark databases,
+    without extraction workers and with the stub LLM backend unless
+    overridden by `env_overrides`.
+    """
+    env = {
+        **os.environ,
+        "WORKERS": str(workers),
+        "PORT": str(port),
+        "HOST": "127.0.0.1",
+        "MONGO_URL": mongo_url,
+        "MONGO_DB_NAME": DB_NAME,
+        "MONGO_INTERNAL_DB_NAME": INTERNAL_DB_NAME,
+        "EXTRACTION_WORKERS_ENABLED": "false",
+        "LLM_BACKEND": "stub",
+        "LOG_LEVEL": "warning",
+        **(env_overrides or {}),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    *,
+    duration: float,
+    concurrency: int,
+    read_ratio: float,
+) -> list[float]:
+    """
+    Sends requests from `concurrency` loops for `duration` seconds and
+    returns the latency of every successful one.
+    """
+    latencies: list[float] = []
+    deadline = time.monotonic() + duration
+    counter = 0
+
+    async def loop() -> None:
+        nonlocal counter
+        while time.monotonic() < deadline:
+            counter += 1
+            start = time.perf_counter()
+            if random.random() < read_ratio:  # noqa: S311
+                response = await client.get(
+                    "/events/benchmark_staff/",
+                    params={"limit": 100},
+                )
+            else:
+                response = await client.post("/events/ingest", json=make_event(counter))
+            if response.is_success:
+                latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return latencies
+
+
+async def bench_workers(args: argparse.Namespace, workers: int) -> dict[str, Any]:
+    process = start_service(workers, args.port, args.mongo_url)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}",
+            headers={"x-api-key": args.api_key},
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=args.concurrency),
+        ) as client:
+            await wait_until_healthy(client, max_wait=30.0)
+            # Make sure the collection exists, so reads are not 404s
+            seed = await client.post("/events/ingest", json=make_event(0))
+            seed.raise_for_status()
+            await run_load(
+                client,
+                duration=2.0,
+                concurrency=args.concurrency,
+                read_ratio=args.read_ratio,
+            )
+            latencies = await run_load(
+                client,
+                duration=args.duration,
+                concurrency=args.concurrency,
+                read_ratio=args.read_ratio,
+            )
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "workers": workers,
+        "rps": len(latencies) / args.duration,
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--api-key", default="your_api_key_here")
+    parser.add_argument("--port", type=int, default=18088)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--read-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    mongo: AsyncIOMotorClient = AsyncIOMotorClient(args.mongo_url)
+    results = []
+    try:
+        for workers in args.workers:
+            results.append(await bench_workers(args, workers))
+            result = results[-1]
+            print(
+                f"{workers:>3} workers: {result['rps']:>8.0f} req/s  "
+                f"p50 {result['p50_ms']:.1f}ms  p99 {result['p99_ms']:.1f}ms  "
+                f"({result['rps'] / results[0]['rps']:.2f}x)",
+            )
+    finally:
+        await mongo.drop_database(DB_NAME)
+        await mongo.drop_database(INTERNAL_DB_NAME)
+        mongo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,43 @@
 import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any
 
 host = os.getenv("HOST", "0.0.0.0")  # noqa: S104
 port = os.getenv("PORT", "8088")
 bind = f"{host}:{port}"
 
+# Every worker runs its own LLM rate limiter, extraction worker pool, rollup
+# flusher and caches, so raising this multiplies the LLM budget (see DOCS).
 workers = int(os.getenv("WORKERS", "1"))
 
+# Each worker creates its own Mongo client in the app lifespan, after the
+# fork; preloading the app would share one client's sockets across workers.
+preload_app = False
+
 worker_class = "uvicorn.workers.UvicornWorker"
 
 accesslog = "-"
 errorlog = "-"
 loglevel = os.getenv("LOG_LEVEL", "info")
+
+# Prometheus metrics of all workers are aggregated through files in this
+# directory, which must be set before the workers import the app and is
+# emptied on every start so counters of a previous run do not leak in.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    str(Path(tempfile.gettempdir()) / "finki-analytics-metrics"),
+)
+
+
+def on_starting(server: Any) -> None:  # noqa: ANN401
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    Path(metrics_dir).mkdir(parents=True, exist_ok=True)
+
+
+def child_exit(server: Any, worker: Any) -> None:  # noqa: ANN401
+    from prometheus_client import multiprocess  # noqa: PLC0415
+
+    multiprocess.mark_process_dead(worker.pid)